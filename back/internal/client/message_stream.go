@@ -51,6 +51,8 @@ type StreamMessage struct {
 	Usage             *UsageStats   `json:"usage,omitempty"`
 	Provider          string        `json:"provider"`
 	FileURL           *string       `json:"file_url,omitempty"`
+	// Tag приходит отдельным событием, когда тег определяет классификатор
+	Tag *string `json:"tag,omitempty"`
 }
 
 // ChoiceDelta представляет выбор с дельтой изменений.
@@ -151,6 +153,7 @@ func NewStreamMessageClient(method, url, path string, historyLen int, logger *lo
 }
 
 // StreamRequestToModel выполняет запрос и возвращает канал для чтения сообщений StreamMessage.
+// Заголовок Tag есть только у заранее известного тега, иначе тег приходит сообщением с полем Tag.
 func (c *StreamMessageClient) StreamRequestToModel(payload PayloadStream) (<-chan *StreamMessage, string, error) {
 	var tag string
 	// Маршалим payload в JSON
@@ -245,15 +248,18 @@ func (c *StreamMessageClient) processSSEStream(resp *http.Response, messageChan
 				continue
 			}
 
-			if message.FileURL != nil {
+			if message.Tag != nil || message.FileURL != nil {
 				messageChan <- &message
 				continue
 			}
 
-			if len(message.Choices) > 0 {
-				if message.Choices[0].Delta.Content == "" {
-					continue
-				}
+			// Служебные события (например, прогресс графа) не содержат choices
+			if len(message.Choices) == 0 {
+				continue
+			}
+
+			if message.Choices[0].Delta.Content == "" {
+				continue
 			}
 
 			// Отправляем сообщение в канал
@@ -172,6 +172,31 @@ func (sh *Stream) Handler(c *fiber.Ctx) error {
 
 		// Обрабатываем поток сообщений
 		for message := range messageChan {
+			if message != nil && message.Tag != nil {
+				// Тег от классификатора приходит после метаданных, пересылаем его отдельным чанком
+				tag = *message.Tag
+				tagOut := streamChunckOut{
+					Content: "",
+					Time:    time.Now().UTC(),
+					Done:    false,
+					Tag:     message.Tag,
+				}
+
+				tagJSON, err := json.Marshal(tagOut)
+				if err != nil {
+					sh.logger.Errorf("Error encoding tag: %v", err)
+					continue
+				}
+
+				if _, err := fmt.Fprintf(w, "data: %s\n\n", tagJSON); err != nil {
+					sh.logger.Errorf("Error writing tag: %v", err)
+					break
+				}
+				if err := w.Flush(); err != nil {
+					sh.logger.Errorf("Error flush data: %v", err)
+				}
+				continue
+			}
 			if len(message.Choices) != 0 {
 				content = message.Choices[0].Delta.Content
 			}
@@ -264,4 +289,5 @@ type streamChunckOut struct {
 	Time    time.Time `json:"time"`
 	Done    bool      `json:"done"`
 	FileURL *string   `json:"file_url,omitempty"`
+	Tag     *string   `json:"tag,omitempty"`
 }
@@ -244,3 +244,125 @@ package handlers
 // 	// Заменяем все временные метки на фиксированное мок-значение
 // 	return timeRegex.ReplaceAllString(input, "2024-01-01T12:00:00.0000000Z")
 // }
+
+import (
+	"bytes"
+	"io"
+	"jabki/internal/client"
+	"jabki/internal/database"
+	"net/http/httptest"
+	"testing"
+	"time"
+
+	"github.com/gofiber/fiber/v2"
+	"github.com/google/uuid"
+	"github.com/sirupsen/logrus"
+	"github.com/stretchr/testify/assert"
+	"github.com/stretchr/testify/mock"
+)
+
+// MockStreamClient реализует интерфейс client.StreamMessageProcessor для тестов.
+type MockStreamClient struct {
+	mock.Mock
+}
+
+func (m *MockStreamClient) StreamRequestToModel(payload client.PayloadStream) (<-chan *client.StreamMessage, string, error) {
+	args := m.Called(payload)
+	return args.Get(0).(<-chan *client.StreamMessage), args.String(1), args.Error(2)
+}
+
+func (m *MockStreamClient) StreamRequestToModelWithTimeout(payload client.PayloadStream, timeout time.Duration) (<-chan *client.StreamMessage, string, error) {
+	args := m.Called(payload, timeout)
+	return args.Get(0).(<-chan *client.StreamMessage), args.String(1), args.Error(2)
+}
+
+// MockMessageManager реализует интерфейс database.MessageManager для тестов.
+type MockMessageManager struct {
+	mock.Mock
+}
+
+func (m *MockMessageManager) WriteMessage(
+	chatID int,
+	question, answer string,
+	questionTime, answerTime time.Time,
+	tag string,
+	voiceURL string,
+	fileURL string,
+) (int, int, error) {
+	args := m.Called(chatID, question, answer, questionTime, answerTime, tag, voiceURL, fileURL)
+	return args.Int(0), args.Int(1), args.Error(2)
+}
+
+func (m *MockMessageManager) UpdateAnswer(answerID int, answer string, file_url string) (int64, error) {
+	args := m.Called(answerID, answer, file_url)
+	return args.Get(0).(int64), args.Error(1)
+}
+
+func (m *MockMessageManager) UpdateAnswerAndQuestionTag(answerID, questionID int, answer string, tag string, file_url string) (int64, error) {
+	args := m.Called(answerID, questionID, answer, tag, file_url)
+	return args.Get(0).(int64), args.Error(1)
+}
+
+func (m *MockMessageManager) WriteEmptyMessage(chatID int, questionTime, answerTime time.Time, voiceURL string) (int, int, error) {
+	args := m.Called(chatID, questionTime, answerTime, voiceURL)
+	return args.Int(0), args.Int(1), args.Error(2)
+}
+
+func (m *MockMessageManager) CheckChat(userUUID string, chatID int) (bool, error) {
+	args := m.Called(userUUID, chatID)
+	return args.Bool(0), args.Error(1)
+}
+
+func (m *MockMessageManager) GetHistory(chatID int, uuid string, historyLen int, tag string) ([]database.Message, error) {
+	args := m.Called(chatID, uuid, historyLen, tag)
+	return args.Get(0).([]database.Message), args.Error(1)
+}
+
+func Test_StreamHandler_ForwardsClassifiedTag(t *testing.T) {
+	logger := logrus.New()
+	testUUID := uuid.New()
+
+	// Тег не выбран пользователем: заголовок пустой, тег приходит событием из стрима
+	classified := "finance"
+	fileURL := ""
+	streamChan := make(chan *client.StreamMessage, 2)
+	streamChan <- &client.StreamMessage{Tag: &classified}
+	streamChan <- &client.StreamMessage{FileURL: &fileURL}
+	close(streamChan)
+
+	repo := new(MockMessageManager)
+	streamClient := new(MockStreamClient)
+
+	repo.On("CheckChat", testUUID.String(), 1).Return(true, nil)
+	repo.On("GetHistory", 1, testUUID.String(), 5, "").Return([]database.Message{}, nil)
+	repo.On("WriteMessage", 1, "Сколько стоит доллар?", "", mock.Anything, mock.Anything, "", "", "").
+		Return(123, 456, nil)
+	repo.On("UpdateAnswerAndQuestionTag", 456, 123, "", classified, "").Return(int64(1), nil)
+	streamClient.On("StreamRequestToModel", mock.AnythingOfType("client.PayloadStream")).
+		Return((<-chan *client.StreamMessage)(streamChan), "", nil)
+
+	app := fiber.New()
+	app.Use(func(c *fiber.Ctx) error {
+		c.Locals("uuid", testUUID)
+		return c.Next()
+	})
+	app.Post("/message_stream/:chat_id", NewStream(streamClient, repo, 5, logger).Handler)
+
+	req := httptest.NewRequest("POST", "/message_stream/1", bytes.NewBufferString(`{"question":"Сколько стоит доллар?"}`))
+	req.Header.Set("Content-Type", "application/json")
+
+	resp, err := app.Test(req, -1)
+	assert.NoError(t, err)
+	defer func() {
+		assert.NoError(t, resp.Body.Close())
+	}()
+
+	body, err := io.ReadAll(resp.Body)
+	assert.NoError(t, err)
+
+	assert.Equal(t, fiber.StatusOK, resp.StatusCode)
+	assert.Contains(t, string(body), `"tag":""`)
+	assert.Contains(t, string(body), `"content":"","time":`)
+	assert.Contains(t, string(body), `"done":false,"tag":"finance"}`)
+	repo.AssertExpectations(t)
+}
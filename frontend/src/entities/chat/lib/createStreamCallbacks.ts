@@ -91,6 +91,8 @@ export const createStreamCallbacks = ({
                 ...item,
                 answer: newAnswer,
                 answer_time: chunk.time,
+                // тег, определённый классификатором, приходит отдельным чанком
+                tag: chunk.tag || item.tag,
                 answer_file_url:
                   chunk.done && chunk.file_url
                     ? chunk.file_url
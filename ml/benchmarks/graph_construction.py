@@ -0,0 +1,54 @@
+"""
+Measures per-request graph construction overhead.
+
+Compares building the pipeline on every request (old behaviour) with
+looking up the pre-compiled graph from the pipeline registry.
+
+Run from ml/: uv run python benchmarks/graph_construction.py --iterations 200
+"""
+
+import argparse
+import statistics
+import time
+from collections.abc import Callable
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.domain.models import ModelMode
+from ml.domain.workflow.agent.pipeline import create_pipeline
+from ml.domain.workflow.agent.pipeline_registry import get_pipeline, initialize_pipelines
+
+
+def _measure(fn: Callable[[], object], iterations: int) -> list[float]:
+    timings: list[float] = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def _report(name: str, timings: list[float]) -> None:
+    ordered = sorted(timings)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"{name:<28} mean={statistics.mean(timings):9.4f}ms "
+        f"p50={statistics.median(timings):9.4f}ms p95={p95:9.4f}ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=100)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    initialize_pipelines()
+    print(f"registry startup cost: {(time.perf_counter() - started) * 1000:.2f}ms")
+
+    for mode in ModelMode:
+        _report(f"before ({mode.value})", _measure(create_pipeline, args.iterations))
+        _report(f"after ({mode.value})", _measure(lambda: get_pipeline(mode), args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+End-to-end load test of /message_stream and /message.
+
+Replays the payloads from a JSONL file (one MessagePayload per line) against a
+running service with a fixed number of concurrent clients and reports, per
+endpoint and ModelMode:
+
+- ttfb: request sent -> response head received
+- ttft: request sent -> first answer chunk (stream only)
+- total: request sent -> response fully read
+- throughput: finished requests per second of the run, answer chunks per second
+
+Results are written as JSON so runs can be compared across commits.
+Every request gets its own chat_id, concurrent requests must not share a graph log socket.
+
+Start the model stub and the service pointed at it first, e.g. from ml/:
+    uv run python benchmarks/stub_llm.py --port 11434 --token-latency 0.02
+    export OLLAMA_HOST=http://127.0.0.1:11434 GRAPH_LOG_SERVER_URL=ws://127.0.0.1:11434
+    uv run uvicorn ml.api.app:app --factory --port 8000
+    uv run python benchmarks/load_test.py --concurrency 8 --rounds 3 --output bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import subprocess
+import time
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from itertools import count
+from pathlib import Path
+from typing import Any
+
+import httpx
+
+_DEFAULT_REQUESTS = Path(__file__).with_name("requests.jsonl")
+_ENDPOINTS = ("/message_stream", "/message")
+
+
+@dataclass
+class Sample:
+    endpoint: str
+    mode: str
+    ok: bool
+    ttfb: float
+    total: float
+    ttft: float | None = None
+    answer_chunks: int = 0
+    error: str | None = None
+
+
+@dataclass
+class RunResult:
+    wall_time: float
+    samples: list[Sample] = field(default_factory=list)
+
+
+def load_payloads(path: Path, modes: list[str] | None) -> list[dict[str, Any]]:
+    payloads: list[dict[str, Any]] = []
+    with path.open(encoding="utf-8") as requests_file:
+        for line in requests_file:
+            if not line.strip():
+                continue
+            payload = json.loads(line)
+            if modes is None:
+                payloads.append(payload)
+                continue
+            # replay every payload under each requested mode
+            payloads.extend({**payload, "mode": mode} for mode in modes)
+
+    if not payloads:
+        raise ValueError(f"No payloads found in {path}")
+
+    return payloads
+
+
+def is_answer_chunk(data: str) -> bool:
+    """Tells answer chunks from progress events and the closing file_url/usage chunk"""
+    try:
+        chunk = json.loads(data)
+    except json.JSONDecodeError:
+        return bool(data)
+
+    if not isinstance(chunk, dict):
+        return True
+
+    message = chunk.get("message")
+    if isinstance(message, dict):
+        return bool(message.get("content") or message.get("thinking"))
+
+    choices = chunk.get("choices")
+    if isinstance(choices, list):
+        return any((choice.get("delta") or {}).get("content") for choice in choices)
+
+    return False
+
+
+async def _send_stream(
+    client: httpx.AsyncClient, payload: dict[str, Any], endpoint: str
+) -> Sample:
+    started = time.perf_counter()
+    ttft: float | None = None
+    answer_chunks = 0
+
+    async with client.stream("POST", endpoint, json=payload) as response:
+        ttfb = time.perf_counter() - started
+        if response.status_code != 200:
+            await response.aread()
+            return Sample(
+                endpoint=endpoint,
+                mode=payload["mode"],
+                ok=False,
+                ttfb=ttfb,
+                total=time.perf_counter() - started,
+                error=f"HTTP {response.status_code}",
+            )
+
+        async for line in response.aiter_lines():
+            if not line.startswith("data: ") or not is_answer_chunk(line[len("data: ") :]):
+                continue
+            answer_chunks += 1
+            if ttft is None:
+                ttft = time.perf_counter() - started
+
+    return Sample(
+        endpoint=endpoint,
+        mode=payload["mode"],
+        ok=True,
+        ttfb=ttfb,
+        total=time.perf_counter() - started,
+        ttft=ttft,
+        answer_chunks=answer_chunks,
+    )
+
+
+async def _send_collected(
+    client: httpx.AsyncClient, payload: dict[str, Any], endpoint: str
+) -> Sample:
+    started = time.perf_counter()
+    async with client.stream("POST", endpoint, json=payload) as response:
+        ttfb = time.perf_counter() - started
+        await response.aread()
+
+    return Sample(
+        endpoint=endpoint,
+        mode=payload["mode"],
+        ok=response.status_code == 200,
+        ttfb=ttfb,
+        total=time.perf_counter() - started,
+        error=None if response.status_code == 200 else f"HTTP {response.status_code}",
+    )
+
+
+async def run_load(
+    target: str,
+    endpoint: str,
+    payloads: list[dict[str, Any]],
+    *,
+    concurrency: int,
+    rounds: int,
+    timeout: float,
+    chat_ids: count,
+) -> RunResult:
+    send = _send_stream if endpoint == "/message_stream" else _send_collected
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: list[Sample] = []
+
+    async def _one(client: httpx.AsyncClient, payload: dict[str, Any]) -> None:
+        request_payload = {**payload, "chat_id": next(chat_ids)}
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                samples.append(await send(client, request_payload, endpoint))
+            except httpx.HTTPError as exc:
+                elapsed = time.perf_counter() - started
+                samples.append(
+                    Sample(
+                        endpoint=endpoint,
+                        mode=payload["mode"],
+                        ok=False,
+                        ttfb=elapsed,
+                        total=elapsed,
+                        error=type(exc).__name__,
+                    )
+                )
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(_one(client, payload) for _ in range(rounds) for payload in payloads)
+        )
+        wall_time = time.perf_counter() - started
+
+    return RunResult(wall_time=wall_time, samples=samples)
+
+
+def percentiles(values: list[float]) -> dict[str, float | None]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+
+    ordered = sorted(values)
+
+    def _rank(quantile: float) -> float:
+        # nearest-rank, so small runs report an observed value instead of an interpolation
+        index = max(0, math.ceil(quantile * len(ordered)) - 1)
+        return round(ordered[index] * 1000, 2)
+
+    return {"p50": _rank(0.50), "p95": _rank(0.95), "p99": _rank(0.99)}
+
+
+def summarize(endpoint: str, result: RunResult) -> list[dict[str, Any]]:
+    by_mode: dict[str, list[Sample]] = {}
+    for sample in result.samples:
+        by_mode.setdefault(sample.mode, []).append(sample)
+
+    summaries: list[dict[str, Any]] = []
+    for mode, samples in sorted(by_mode.items()):
+        succeeded = [sample for sample in samples if sample.ok]
+        generation_rates = [
+            (sample.answer_chunks - 1) / (sample.total - sample.ttft)
+            for sample in succeeded
+            if sample.ttft is not None and sample.answer_chunks > 1 and sample.total > sample.ttft
+        ]
+        summaries.append(
+            {
+                "endpoint": endpoint,
+                "mode": mode,
+                "requests": len(samples),
+                "errors": len(samples) - len(succeeded),
+                "ttfb_ms": percentiles([sample.ttfb for sample in succeeded]),
+                "ttft_ms": percentiles(
+                    [sample.ttft for sample in succeeded if sample.ttft is not None]
+                ),
+                "total_ms": percentiles([sample.total for sample in succeeded]),
+                "requests_per_second": round(len(succeeded) / result.wall_time, 3),
+                "answer_chunks_per_second": (
+                    round(sum(generation_rates) / len(generation_rates), 2)
+                    if generation_rates
+                    else None
+                ),
+            }
+        )
+
+    return summaries
+
+
+def _git_commit() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def _print_summary(summary: dict[str, Any]) -> None:
+    def _fmt(values: dict[str, float | None]) -> str:
+        return "/".join("-" if value is None else f"{value:.0f}" for value in values.values())
+
+    print(f"{'endpoint':<16} {'mode':<10} {'n':>4} {'err':>4}  ttfb / ttft / total p50/p95/p99 ms")
+    for row in summary["results"]:
+        print(
+            f"{row['endpoint']:<16} {row['mode']:<10} {row['requests']:>4} {row['errors']:>4}  "
+            f"{_fmt(row['ttfb_ms'])} | {_fmt(row['ttft_ms'])} | {_fmt(row['total_ms'])}  "
+            f"rps={row['requests_per_second']}"
+        )
+
+
+async def _run(args: argparse.Namespace) -> dict[str, Any]:
+    modes = args.modes.split(",") if args.modes else None
+    payloads = load_payloads(args.requests, modes)
+    chat_ids = count(args.first_chat_id)
+
+    results: list[dict[str, Any]] = []
+    for endpoint in args.endpoints.split(","):
+        if endpoint not in _ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {endpoint}, expected one of {_ENDPOINTS}")
+
+        result = await run_load(
+            args.target,
+            endpoint,
+            payloads,
+            concurrency=args.concurrency,
+            rounds=args.rounds,
+            timeout=args.timeout,
+            chat_ids=chat_ids,
+        )
+        results.extend(summarize(endpoint, result))
+
+    return {
+        "commit": _git_commit(),
+        "started_at": datetime.now(UTC).isoformat(),
+        "target": args.target,
+        "requests_file": str(args.requests),
+        "concurrency": args.concurrency,
+        "rounds": args.rounds,
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--target", default="http://127.0.0.1:8000")
+    parser.add_argument("--requests", type=Path, default=_DEFAULT_REQUESTS)
+    parser.add_argument("--endpoints", default=",".join(_ENDPOINTS))
+    parser.add_argument("--modes", default=None, help="comma separated, overrides payload modes")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--first-chat-id", type=int, default=1_000_000)
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    args = parser.parse_args()
+
+    summary = asyncio.run(_run(args))
+
+    args.output.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding="utf-8")
+    _print_summary(summary)
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Latency comparison of pre-flight classification strategies against a live model.
+
+- chain: voice -> tag -> mode, one call after another (old pipeline)
+- fan-out: the same three calls issued concurrently
+- fused: one structured call through classify_preflight
+
+Needs the same environment as the service (LLM_MODE, model names, reachable backend).
+Run from ml/: uv run python benchmarks/preflight_classification.py --rounds 5
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.domain.models import (
+    ChatHistory,
+    GraphState,
+    Message,
+    MetaData,
+    ModelMode,
+    Role,
+    Tag,
+    UserProfile,
+)
+from ml.domain.workflow.agent.nodes.mode_definition import node as mode_node
+from ml.domain.workflow.agent.nodes.preflight_classification import node as preflight_node
+from ml.domain.workflow.agent.nodes.tag_validation import node as tag_node
+from ml.domain.workflow.agent.nodes.voice_validation import node as voice_node
+
+_MESSAGES: list[str] = [
+    "Составь договор аренды офиса на год",
+    "Как снизить налоги для ИП на упрощёнке?",
+    "Придумай рекламный слоган для кофейни",
+    "Привет, как дела?",
+]
+
+
+async def _noop_graph_log(**_: Any) -> None:
+    return None
+
+
+def _build_state(content: str) -> GraphState:
+    return GraphState(
+        chat_id=0,
+        chat=ChatHistory(messages=[Message(id=1, role=Role.user, content=content)]),
+        user=UserProfile(
+            id=0,
+            login="bench",
+            username="",
+            user_info="",
+            business_info="",
+            additional_instructions="",
+        ),
+        meta=MetaData(is_voice=True, tag=Tag.Empty),
+        file_url=None,
+        model_mode=ModelMode.Auto,
+        voice_is_valid=None,
+        final_prompt=None,
+    )
+
+
+async def _chain(state: GraphState) -> None:
+    await voice_node.validate_voice(state)
+    await tag_node.validate_tag(state)
+    await mode_node.define_mode(state)
+
+
+async def _fan_out(state: GraphState) -> None:
+    await asyncio.gather(
+        voice_node.validate_voice(state),
+        tag_node.validate_tag(state),
+        mode_node.define_mode(state),
+    )
+
+
+async def _fused(state: GraphState) -> None:
+    await preflight_node.classify_preflight(state)
+
+
+async def _measure(strategy: Callable[[GraphState], Awaitable[None]], rounds: int) -> list[float]:
+    timings: list[float] = []
+    for _ in range(rounds):
+        for content in _MESSAGES:
+            started = time.perf_counter()
+            await strategy(_build_state(content))
+            timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+async def _run(rounds: int) -> None:
+    for module in (voice_node, tag_node, preflight_node):
+        module.send_graph_log = _noop_graph_log  # type: ignore[attr-defined]
+
+    # warm the model once, so the first strategy does not pay for loading it
+    await _fused(_build_state(_MESSAGES[0]))
+
+    for name, strategy in (("chain", _chain), ("fan-out", _fan_out), ("fused", _fused)):
+        timings = await _measure(strategy, rounds)
+        print(
+            f"{name:<8} mean={statistics.mean(timings):8.1f}ms "
+            f"p50={statistics.median(timings):8.1f}ms max={max(timings):8.1f}ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(_run(args.rounds))
+
+
+if __name__ == "__main__":
+    main()
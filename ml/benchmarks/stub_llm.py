@@ -0,0 +1,279 @@
+"""
+Ollama/OpenAI compatible model stub for load tests.
+
+Answers chat, structured (format / response_format) and embedding calls with
+canned content, streaming tokens with a fixed per-token delay, so the measured
+latency is the service's own overhead plus a predictable generation time.
+Structured answers are built from the requested JSON schema; tool names are
+always "final_answer", so agent loops finish after one planning call.
+It also accepts the graph log websocket the service writes progress to.
+
+Run from ml/: uv run python benchmarks/stub_llm.py --port 11434 --token-latency 0.02
+Then start the service with OLLAMA_HOST / base url and GRAPH_LOG_SERVER_URL pointing here.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from collections.abc import AsyncIterator
+from datetime import UTC, datetime
+from typing import Any
+
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
+
+_TOOL_FIELDS = {"chosen_tool", "tool"}
+_ANSWER_TOKENS = "Это ответ заглушки модели для нагрузочного тестирования сервиса .".split()
+_EMBEDDING_SIZE = 8
+
+
+class StubSettings:
+    def __init__(
+        self, *, first_token_latency: float, token_latency: float, answer_tokens: int
+    ) -> None:
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.answer_tokens = answer_tokens
+
+    def tokens(self) -> list[str]:
+        return [
+            _ANSWER_TOKENS[index % len(_ANSWER_TOKENS)] + " "
+            for index in range(self.answer_tokens)
+        ]
+
+
+def _fake_instance(schema: dict[str, Any], defs: dict[str, Any], field: str = "") -> Any:
+    if "$ref" in schema:
+        return _fake_instance(defs[schema["$ref"].rsplit("/", 1)[-1]], defs, field)
+
+    for combinator in ("anyOf", "oneOf", "allOf"):
+        if combinator in schema:
+            return _fake_instance(schema[combinator][0], defs, field)
+
+    if "enum" in schema:
+        return schema["enum"][0]
+
+    schema_type = schema.get("type", "object")
+
+    if schema_type == "object":
+        properties: dict[str, Any] = schema.get("properties", {})
+        return {name: _fake_instance(value, defs, name) for name, value in properties.items()}
+
+    if schema_type == "array":
+        size = schema.get("minItems", 0)
+        return [_fake_instance(schema.get("items", {}), defs, field) for _ in range(size)]
+
+    if schema_type == "string":
+        return "final_answer" if field in _TOOL_FIELDS else "stub"
+
+    if schema_type == "integer":
+        return schema.get("minimum", 1)
+
+    if schema_type == "number":
+        return 0.0
+
+    if schema_type == "boolean":
+        return True
+
+    return None
+
+
+def _structured_content(schema: dict[str, Any] | None) -> str:
+    if not schema:
+        return "{}"
+    return json.dumps(_fake_instance(schema, schema.get("$defs", {})), ensure_ascii=False)
+
+
+def _ollama_chunk(model: str, content: str, *, done: bool, **counters: Any) -> dict[str, Any]:
+    return {
+        "model": model,
+        "created_at": datetime.now(UTC).isoformat(),
+        "message": {"role": "assistant", "content": content},
+        "done": done,
+        **counters,
+    }
+
+
+def _ollama_counters(prompt_tokens: int, completion_tokens: int, elapsed: float) -> dict[str, Any]:
+    elapsed_ns = int(elapsed * 1_000_000_000)
+    return {
+        "done_reason": "stop",
+        "prompt_eval_count": prompt_tokens,
+        "eval_count": completion_tokens,
+        "prompt_eval_duration": 0,
+        "eval_duration": elapsed_ns,
+        "load_duration": 0,
+        "total_duration": elapsed_ns,
+    }
+
+
+def _prompt_tokens(messages: list[dict[str, Any]]) -> int:
+    # close enough for a stub: one token per whitespace separated word
+    return sum(len(str(message.get("content") or "").split()) for message in messages)
+
+
+def create_app(settings: StubSettings) -> FastAPI:
+    app = FastAPI(title="llm stub")
+
+    @app.get("/api/tags")
+    async def tags() -> dict[str, Any]:
+        return {"models": []}
+
+    @app.post("/api/pull")
+    async def pull() -> StreamingResponse:
+        async def _progress() -> AsyncIterator[str]:
+            yield json.dumps({"status": "success"}) + "\n"
+
+        return StreamingResponse(_progress(), media_type="application/x-ndjson")
+
+    @app.post("/api/embed")
+    async def embed(request: Request) -> dict[str, Any]:
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        return {
+            "model": body.get("model", "stub"),
+            "embeddings": [[0.1] * _EMBEDDING_SIZE for _ in inputs],
+        }
+
+    @app.post("/api/chat", response_model=None)
+    async def chat(request: Request) -> JSONResponse | StreamingResponse:
+        body = await request.json()
+        model = body.get("model", "stub")
+        prompt_tokens = _prompt_tokens(body.get("messages", []))
+        started = time.perf_counter()
+
+        if not body.get("stream", True) or body.get("format"):
+            await asyncio.sleep(settings.first_token_latency)
+            content = _structured_content(body.get("format")) if body.get("format") else "ok"
+            counters = _ollama_counters(prompt_tokens, 1, time.perf_counter() - started)
+            return JSONResponse(_ollama_chunk(model, content, done=True, **counters))
+
+        async def _stream() -> AsyncIterator[str]:
+            await asyncio.sleep(settings.first_token_latency)
+            tokens = settings.tokens()
+            for token in tokens:
+                yield json.dumps(_ollama_chunk(model, token, done=False), ensure_ascii=False)
+                yield "\n"
+                await asyncio.sleep(settings.token_latency)
+
+            counters = _ollama_counters(prompt_tokens, len(tokens), time.perf_counter() - started)
+            yield json.dumps(_ollama_chunk(model, "", done=True, **counters)) + "\n"
+
+        return StreamingResponse(_stream(), media_type="application/x-ndjson")
+
+    @app.post("/v1/embeddings")
+    async def openai_embeddings(request: Request) -> dict[str, Any]:
+        body = await request.json()
+        inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+        return {
+            "object": "list",
+            "model": body.get("model", "stub"),
+            "data": [
+                {"object": "embedding", "index": index, "embedding": [0.1] * _EMBEDDING_SIZE}
+                for index in range(len(inputs))
+            ],
+            "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+        }
+
+    @app.post("/v1/chat/completions", response_model=None)
+    async def openai_chat(request: Request) -> JSONResponse | StreamingResponse:
+        body = await request.json()
+        model = body.get("model", "stub")
+        prompt_tokens = _prompt_tokens(body.get("messages", []))
+        created = int(time.time())
+
+        if not body.get("stream"):
+            await asyncio.sleep(settings.first_token_latency)
+            response_format = body.get("response_format") or {}
+            if response_format.get("type") == "json_schema":
+                content = _structured_content(response_format["json_schema"]["schema"])
+            elif response_format:
+                content = "{}"
+            else:
+                content = "ok"
+
+            return JSONResponse(
+                {
+                    "id": "stub",
+                    "object": "chat.completion",
+                    "created": created,
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": content},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": 1,
+                        "total_tokens": prompt_tokens + 1,
+                    },
+                }
+            )
+
+        def _chunk(choices: list[dict[str, Any]], usage: dict[str, int] | None = None) -> str:
+            payload = {
+                "id": "stub",
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": choices,
+                "usage": usage,
+            }
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        async def _stream() -> AsyncIterator[str]:
+            await asyncio.sleep(settings.first_token_latency)
+            tokens = settings.tokens()
+            for token in tokens:
+                yield _chunk([{"index": 0, "delta": {"content": token}, "finish_reason": None}])
+                await asyncio.sleep(settings.token_latency)
+
+            yield _chunk([{"index": 0, "delta": {}, "finish_reason": "stop"}])
+            if (body.get("stream_options") or {}).get("include_usage"):
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": prompt_tokens + len(tokens),
+                }
+                yield _chunk([], usage)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(_stream(), media_type="text/event-stream")
+
+    @app.websocket("/graph_log_writer/{chat_id}")
+    async def graph_log_writer(websocket: WebSocket, chat_id: int) -> None:
+        await websocket.accept()
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            return
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--first-token-latency", type=float, default=0.2)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    parser.add_argument("--answer-tokens", type=int, default=64)
+    args = parser.parse_args()
+
+    settings = StubSettings(
+        first_token_latency=args.first_token_latency,
+        token_latency=args.token_latency,
+        answer_tokens=args.answer_tokens,
+    )
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ from fastapi import FastAPI
 
 from ml.api.external import (
     clients_warmup,
+    close_clients,
     download_missing_models,
     fetch_available_models,
     get_models_from_env,
@@ -14,6 +15,7 @@ from ml.api.external import (
     init_warmup_clients,
 )
 from ml.api.routes.health import router as health_router
+from ml.api.routes.metrics import router as metrics_router
 from ml.api.routes.workflow import router as workflow_router
 from ml.configs import LLMMode, get_llm_mode
 
@@ -29,7 +31,13 @@ async def lifespan(app: FastAPI):
         logger.info("Starting model initialization for mode=%s", mode.value)
 
         try:
-            if mode is LLMMode.OLLAMA:
+            # graphs don't depend on models, compile them once before serving requests
+            # (imported here: graph nodes import ml.api.external, which would be a cycle)
+            from ml.domain.workflow.agent.pipeline_registry import initialize_pipelines
+
+            initialize_pipelines()
+
+            if mode in (LLMMode.OLLAMA, LLMMode.RECORD):
                 available_models = await fetch_available_models()
                 requested_models = await get_models_from_env()
 
@@ -66,7 +74,10 @@ async def lifespan(app: FastAPI):
 
     yield
 
-    await app.state.models_task
+    try:
+        await app.state.models_task
+    finally:
+        await close_clients()
 
 
 def app() -> FastAPI:
@@ -75,6 +86,9 @@ def app() -> FastAPI:
     # /ping
     app.include_router(health_router)
 
+    # /metrics
+    app.include_router(metrics_router)
+
     # /message_stream and /message
     app.include_router(workflow_router)
 
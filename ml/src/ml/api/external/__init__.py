@@ -3,7 +3,7 @@ from ml.api.external.ollama_init import (
     fetch_available_models,
     get_models_from_env,
 )
-from ml.api.external.ollama_warmup import clients_warmup, init_warmup_clients
+from ml.api.external.ollama_warmup import clients_warmup, close_clients, init_warmup_clients
 from ml.api.external.minio_client import read_minio_file, write_minio_file
 from ml.api.external.websocket_client import (
     GraphLogWebSocketClient,
@@ -17,6 +17,7 @@ __all__ = [
     "download_missing_models",
     "clients_warmup",
     "init_warmup_clients",
+    "close_clients",
     "GraphLogWebSocketClient",
     "init_graph_log_client",
     "send_graph_log",
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from pathlib import Path
+from typing import Any, ClassVar
+
+from pydantic import BaseModel
+
+from ml.configs import (
+    get_classifier_cache_path,
+    get_classifier_cache_size,
+    get_classifier_cache_ttl,
+)
+from ml.domain.models import ChatHistory, Role
+from ml.utils import LRUCache
+from ml.utils.metrics import CLASSIFIER_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+_TRAILING_PUNCTUATION = ".!?… "
+
+
+def normalize_text(text: str) -> str:
+    """Folds case, whitespace and closing punctuation, which do not change a classification"""
+    return " ".join(text.casefold().split()).rstrip(_TRAILING_PUNCTUATION)
+
+
+class ClassificationCache:
+    """
+    LRU+TTL cache of classifier answers, optionally persisted to a JSONL file
+
+    Answers are keyed by the model, the schema, the system prompt and the
+    normalized user text, so a changed prompt or model never serves old answers.
+    The file is append-only and is rewritten once it holds twice as many lines
+    as the cache has entries.
+    """
+
+    _instance: ClassVar[ClassificationCache | None] = None
+
+    def __init__(
+        self, maxsize: int, ttl: float | None = None, path: str | Path | None = None
+    ) -> None:
+        self._entries: LRUCache[str, str] = LRUCache(maxsize, ttl)
+        self.path = None if path is None else Path(path)
+        self._written_lines = 0
+
+        if self.path is not None and maxsize > 0:
+            self._load(self.path)
+
+    @classmethod
+    def instance(cls) -> ClassificationCache:
+        if cls._instance is None:
+            cls._instance = cls(
+                get_classifier_cache_size(),
+                get_classifier_cache_ttl(),
+                get_classifier_cache_path(),
+            )
+        return cls._instance
+
+    @classmethod
+    def reset_instance(cls) -> None:
+        cls._instance = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(
+        model: str,
+        messages: ChatHistory,
+        output_schema: type[BaseModel],
+        options: dict[str, Any] | None = None,
+    ) -> str:
+        turns = [
+            [
+                message.role.value,
+                normalize_text(message.content) if message.role is Role.user else message.content,
+            ]
+            for message in messages.messages
+        ]
+        encoded = json.dumps(
+            {
+                "model": model,
+                "schema": output_schema.__name__,
+                "messages": turns,
+                "options": options or {},
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, schema_name: str) -> str | None:
+        """Cached answer as JSON, None on a miss"""
+        value = self._entries.get(key)
+        CLASSIFIER_CACHE_REQUESTS.labels(
+            schema=schema_name, result="miss" if value is None else "hit"
+        ).inc()
+        return value
+
+    def put(self, key: str, value: str) -> None:
+        if self._entries.maxsize == 0:
+            return
+
+        stored_at = time.time()
+        self._entries.put(key, value, stored_at=stored_at)
+
+        if self.path is None:
+            return
+
+        self._append(self.path, {"key": key, "stored_at": stored_at, "value": value})
+
+        if self._written_lines > 2 * self._entries.maxsize:
+            self._rewrite(self.path)
+
+    def _load(self, path: Path) -> None:
+        if not path.exists():
+            return
+
+        with path.open(encoding="utf-8") as cache_file:
+            for line in cache_file:
+                self._written_lines += 1
+                try:
+                    entry = json.loads(line)
+                    self._entries.put(entry["key"], entry["value"], stored_at=entry["stored_at"])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    logger.warning("Skipping a malformed classifier cache line in %s", path)
+
+        logger.info("Loaded %d cached classifier answers from %s", len(self._entries), path)
+
+    def _append(self, path: Path, entry: dict[str, Any]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as cache_file:
+            cache_file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._written_lines += 1
+
+    def _rewrite(self, path: Path) -> None:
+        lines = [
+            json.dumps({"key": key, "stored_at": stored_at, "value": value}, ensure_ascii=False)
+            for key, stored_at, value in self._entries.items()
+        ]
+
+        compacted = path.with_suffix(path.suffix + ".tmp")
+        compacted.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+        compacted.replace(path)
+        self._written_lines = len(lines)
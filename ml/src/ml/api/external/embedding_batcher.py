@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import numpy as np
+
+from ml.utils.metrics import EMBEDDING_BATCH_SIZE
+
+
+class EmbeddingBatcher:
+    """
+    Merges concurrent single embedding calls into batched requests
+
+    The first text of a batch waits up to window seconds for others, a batch is
+    sent as soon as it holds max_batch_size texts. Each caller gets its own row
+    of the returned matrix. A cancelled caller leaves the batch, a batch nobody
+    waits for anymore is not sent.
+    """
+
+    def __init__(
+        self,
+        embed: Callable[[list[str]], Awaitable[np.ndarray]],
+        max_batch_size: int,
+        window: float,
+    ) -> None:
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if window < 0:
+            raise ValueError("window must not be negative")
+
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._embed = embed
+        self._pending: list[tuple[str, asyncio.Future[np.ndarray]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._batches: set[asyncio.Task[None]] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def submit(self, content: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[np.ndarray] = loop.create_future()
+        self._pending.append((content, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[: self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size :]
+
+            task = asyncio.create_task(self._send(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _send(self, batch: list[tuple[str, asyncio.Future[np.ndarray]]]) -> None:
+        waiting = [(content, future) for content, future in batch if not future.done()]
+        if not waiting:
+            return
+
+        EMBEDDING_BATCH_SIZE.observe(len(waiting))
+
+        try:
+            matrix = await self._embed([content for content, _ in waiting])
+        except Exception as exc:
+            for _, future in waiting:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+
+        for row, (_, future) in zip(matrix, waiting, strict=True):
+            if not future.done():
+                future.set_result(row)
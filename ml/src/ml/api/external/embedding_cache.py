@@ -0,0 +1,276 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import threading
+from pathlib import Path
+from typing import ClassVar
+
+import numpy as np
+
+from ml.configs import (
+    get_embedding_cache_dir,
+    get_embedding_cache_disk_bytes,
+    get_embedding_cache_size,
+)
+from ml.utils import LRUCache
+from ml.utils.metrics import EMBEDDING_CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE_PATH_CHARACTERS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def content_key(model: str, content: str) -> str:
+    return hashlib.sha256(f"{model}\0{content}".encode()).hexdigest()
+
+
+class EmbeddingDiskStore:
+    """
+    Embeddings of one model in a memory-mapped float32 file with a JSONL key index
+
+    vectors.f32 holds capacity rows of dimension floats, index.jsonl maps keys to
+    rows and later lines win. Rows are filled as a ring, so once the file is full
+    the embedding written longest ago is overwritten. A line without a key clears
+    its row before the row is overwritten, and the new key is appended only after
+    its vector is flushed, so an interrupted write never serves a wrong vector.
+
+    put_many does blocking file I/O and is meant to run in a worker thread,
+    get may run concurrently with it.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int) -> None:
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be positive")
+
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._meta_path = self.directory / "meta.json"
+        self._vectors_path = self.directory / "vectors.f32"
+        self._index_path = self.directory / "index.jsonl"
+
+        self._vectors: np.memmap | None = None
+        self._rows: dict[str, int] = {}
+        self._keys_by_row: dict[int, str] = {}
+        self._next_row = 0
+        self._written_lines = 0
+        # _lock guards the key maps, _write_lock keeps one writer at a time
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+        if self._meta_path.exists():
+            self._load()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._vectors is None else self._vectors.shape[0]
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None or self._vectors is None:
+                return None
+            # copied under the lock, a writer overwrites a row only after dropping its key
+            return np.array(self._vectors[row])
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        self.put_many([(key, vector)])
+
+    def put_many(self, entries: list[tuple[str, np.ndarray]]) -> None:
+        with self._write_lock:
+            if not entries:
+                return
+            if self._vectors is None:
+                self._create(dimension=entries[0][1].shape[0])
+            assert self._vectors is not None
+
+            for _, vector in entries:
+                if vector.shape != self._vectors.shape[1:]:
+                    raise ValueError(
+                        f"Embedding of dimension {vector.shape} does not fit the store of "
+                        f"dimension {self._vectors.shape[1]}"
+                    )
+
+            fresh = {key: vector for key, vector in entries if key not in self._rows}
+            # a batch larger than the ring keeps only its newest vectors
+            items = list(fresh.items())[-self.capacity :]
+            if not items:
+                return
+
+            with self._lock:
+                rows = [(self._next_row + offset) % self.capacity for offset in range(len(items))]
+                self._next_row = (rows[-1] + 1) % self.capacity
+                cleared = [row for row in rows if row in self._keys_by_row]
+                for row in cleared:
+                    del self._rows[self._keys_by_row.pop(row)]
+
+            if cleared:
+                self._append([{"row": row} for row in cleared])
+
+            for (_, vector), row in zip(items, rows, strict=True):
+                self._vectors[row] = vector
+            self._vectors.flush()
+
+            with self._lock:
+                for (key, _), row in zip(items, rows, strict=True):
+                    self._rows[key] = row
+                    self._keys_by_row[row] = key
+            self._append(
+                [{"key": key, "row": row} for (key, _), row in zip(items, rows, strict=True)]
+            )
+
+            if self._written_lines > 2 * self.capacity:
+                self._rewrite()
+
+    def _create(self, dimension: int) -> None:
+        capacity = max(1, self.max_bytes // (dimension * np.dtype(np.float32).itemsize))
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._index_path.unlink(missing_ok=True)
+        self._vectors = np.memmap(
+            self._vectors_path, dtype=np.float32, mode="w+", shape=(capacity, dimension)
+        )
+        self._meta_path.write_text(
+            json.dumps({"dimension": dimension, "capacity": capacity}), encoding="utf-8"
+        )
+
+    def _load(self) -> None:
+        meta = json.loads(self._meta_path.read_text(encoding="utf-8"))
+        shape = (meta["capacity"], meta["dimension"])
+        self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r+", shape=shape)
+
+        if not self._index_path.exists():
+            return
+
+        with self._index_path.open(encoding="utf-8") as index_file:
+            for line in index_file:
+                self._written_lines += 1
+                try:
+                    entry = json.loads(line)
+                    key, row = entry.get("key"), int(entry["row"])
+                except (json.JSONDecodeError, AttributeError, KeyError, TypeError, ValueError):
+                    logger.warning("Skipping a malformed embedding index line in %s", self.directory)
+                    continue
+
+                if not 0 <= row < self.capacity:
+                    continue
+
+                previous = self._keys_by_row.pop(row, None)
+                if previous is not None:
+                    del self._rows[previous]
+                if key is None:
+                    # the row was cleared for a vector whose line never made it
+                    continue
+                self._rows[key] = row
+                self._keys_by_row[row] = key
+                self._next_row = (row + 1) % self.capacity
+
+        logger.info("Loaded %d cached embeddings from %s", len(self._rows), self.directory)
+
+    def _append(self, entries: list[dict[str, str | int]]) -> None:
+        with self._index_path.open("a", encoding="utf-8") as index_file:
+            index_file.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._written_lines += len(entries)
+
+    def _rewrite(self) -> None:
+        # oldest row first, so replaying the index resumes the ring after the newest one
+        order = [(row + self._next_row) % self.capacity for row in range(self.capacity)]
+        lines = [
+            json.dumps({"key": self._keys_by_row[row], "row": row})
+            for row in order
+            if row in self._keys_by_row
+        ]
+
+        compacted = self._index_path.with_suffix(".jsonl.tmp")
+        compacted.write_text("".join(line + "\n" for line in lines), encoding="utf-8")
+        compacted.replace(self._index_path)
+        self._written_lines = len(lines)
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of embeddings keyed by the model and a hash of the content
+
+    Recent vectors live in an in-memory LRU, every vector is also written to a
+    per-model EmbeddingDiskStore when a directory is configured, so a restarted
+    service does not embed the same texts again. Disk hits are promoted to memory.
+    """
+
+    _instance: ClassVar[EmbeddingCache | None] = None
+
+    def __init__(
+        self,
+        maxsize: int,
+        directory: str | Path | None = None,
+        disk_bytes: int | None = None,
+    ) -> None:
+        self._memory: LRUCache[str, np.ndarray] = LRUCache(maxsize)
+        self.directory = None if directory is None else Path(directory)
+        self.disk_bytes = get_embedding_cache_disk_bytes() if disk_bytes is None else disk_bytes
+        self._stores: dict[str, EmbeddingDiskStore] = {}
+
+    @classmethod
+    def instance(cls) -> EmbeddingCache:
+        if cls._instance is None:
+            cls._instance = cls(get_embedding_cache_size(), get_embedding_cache_dir())
+        return cls._instance
+
+    @classmethod
+    def reset_instance(cls) -> None:
+        cls._instance = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._memory.maxsize > 0 or self.directory is not None
+
+    def get(self, model: str, content: str) -> np.ndarray | None:
+        """Cached float32 vector, None on a miss"""
+        key = content_key(model, content)
+
+        vector = self._memory.get(key)
+        if vector is not None:
+            EMBEDDING_CACHE_REQUESTS.labels(result="memory").inc()
+            return vector
+
+        store = self._store(model)
+        vector = None if store is None else store.get(key)
+        if vector is not None:
+            vector.flags.writeable = False
+            self._memory.put(key, vector)
+            EMBEDDING_CACHE_REQUESTS.labels(result="disk").inc()
+            return vector
+
+        EMBEDDING_CACHE_REQUESTS.labels(result="miss").inc()
+        return None
+
+    async def put_many(self, model: str, contents: list[str], matrix: np.ndarray) -> None:
+        """Caches one vector per text, the disk tier is written in a worker thread"""
+        entries: list[tuple[str, np.ndarray]] = []
+        for content, row in zip(contents, matrix, strict=True):
+            key = content_key(model, content)
+            vector = np.array(row, dtype=np.float32)
+            vector.flags.writeable = False
+            self._memory.put(key, vector)
+            entries.append((key, vector))
+
+        store = self._store(model)
+        if store is not None:
+            await asyncio.to_thread(store.put_many, entries)
+
+    def _store(self, model: str) -> EmbeddingDiskStore | None:
+        if self.directory is None:
+            return None
+
+        store = self._stores.get(model)
+        if store is None:
+            # vector dimensions differ between models, each one gets its own file
+            name = _UNSAFE_PATH_CHARACTERS.sub("_", model)
+            digest = hashlib.sha256(model.encode()).hexdigest()[:8]
+            store = EmbeddingDiskStore(self.directory / f"{name}-{digest}", self.disk_bytes)
+            self._stores[model] = store
+        return store
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import functools
+import json
+import math
+from dataclasses import dataclass, replace
+from typing import Any
+
+from pydantic import BaseModel
+
+from ml.domain.models import ChatHistory
+
+# quotes, colon, comma and the whitespace the grammar allows around one value
+_VALUE_OVERHEAD_TOKENS = 4
+_NUMBER_TOKENS = 8
+# JSON keys and enum labels, mostly latin
+_LABEL_CHARS_PER_TOKEN = 3
+# the schema estimate is doubled, a cut answer is a failed call
+_OUTPUT_MARGIN = 2
+_MIN_OUTPUT_TOKENS = 64
+
+# Russian prompts get 2.5-4 chars per token, a low guess keeps the prompt from being cut
+_PROMPT_CHARS_PER_TOKEN = 2
+# the middle of that range, for counting a prompt the backend never reported
+_TYPICAL_CHARS_PER_TOKEN = 3
+_MESSAGE_TEMPLATE_TOKENS = 8
+# room for an answer the schema does not bound
+_UNBOUNDED_OUTPUT_TOKENS = 2048
+_MIN_NUM_CTX = 2048
+
+
+@dataclass(frozen=True)
+class GenerationProfile:
+    """
+    Generation limits of one structured call
+
+    Fields left None are filled by the client: num_predict from the output
+    schema, num_ctx from the prompt length when the schema bounds the answer
+    and think from the model tier.
+    A node passes its own profile to call_structured to override any of them.
+    """
+
+    num_predict: int | None = None
+    num_ctx: int | None = None
+    think: bool | None = None
+
+    def override(self, profile: GenerationProfile | None) -> GenerationProfile:
+        if profile is None:
+            return self
+
+        changes = {
+            name: value
+            for name, value in (
+                ("num_predict", profile.num_predict),
+                ("num_ctx", profile.num_ctx),
+                ("think", profile.think),
+            )
+            if value is not None
+        }
+        return replace(self, **changes)
+
+    def options(self) -> dict[str, int]:
+        """Ollama options of the profile, unset limits keep the tier options"""
+        options: dict[str, int] = {}
+        if self.num_predict is not None:
+            options["num_predict"] = self.num_predict
+        if self.num_ctx is not None:
+            options["num_ctx"] = self.num_ctx
+        return options
+
+
+@functools.cache
+def json_schema(output_schema: type[BaseModel]) -> dict[str, Any]:
+    """model_json_schema of a schema class, generated once per class"""
+    return output_schema.model_json_schema()
+
+
+@functools.cache
+def schema_output_tokens(output_schema: type[BaseModel]) -> int | None:
+    """Output tokens an answer matching the schema can need, None when free text is allowed"""
+    schema = json_schema(output_schema)
+    tokens = _value_tokens(schema, schema.get("$defs", {}), frozenset())
+
+    if tokens is None:
+        return None
+
+    return max(_MIN_OUTPUT_TOKENS, tokens * _OUTPUT_MARGIN)
+
+
+def context_bucket(messages: ChatHistory, num_predict: int | None, ceiling: int) -> int:
+    """
+    Smallest power of two that holds the prompt and the answer, at most ceiling
+
+    The prompt is measured in characters; the guess of tokens per character
+    is low, so a prompt is rather given too much room than cut from the start.
+    """
+    prompt_tokens = _prompt_tokens(messages, _PROMPT_CHARS_PER_TOKEN)
+    needed = prompt_tokens + (_UNBOUNDED_OUTPUT_TOKENS if num_predict is None else num_predict)
+    bucket = max(_MIN_NUM_CTX, 1 << (needed - 1).bit_length())
+    return min(bucket, ceiling)
+
+
+def estimate_prompt_tokens(messages: ChatHistory) -> int:
+    """Likely token count of a prompt whose call ended before the usage was reported"""
+    return _prompt_tokens(messages, _TYPICAL_CHARS_PER_TOKEN)
+
+
+def _prompt_tokens(messages: ChatHistory, chars_per_token: int) -> int:
+    return sum(
+        math.ceil(len(message.content) / chars_per_token) + _MESSAGE_TEMPLATE_TOKENS
+        for message in messages.messages
+    )
+
+
+def _value_tokens(node: dict[str, Any], defs: dict[str, Any], seen: frozenset[str]) -> int | None:
+    if "$ref" in node:
+        name = node["$ref"].rsplit("/", 1)[-1]
+        if name in seen or name not in defs:
+            # a recursive schema has no upper bound
+            return None
+        return _value_tokens(defs[name], defs, seen | {name})
+
+    if "enum" in node:
+        return max(_label_tokens(json.dumps(value, ensure_ascii=False)) for value in node["enum"])
+
+    if "const" in node:
+        return _label_tokens(json.dumps(node["const"], ensure_ascii=False))
+
+    variants = node.get("anyOf") or node.get("oneOf") or node.get("allOf")
+    if variants:
+        sizes = [_value_tokens(variant, defs, seen) for variant in variants]
+        return None if None in sizes else max(size for size in sizes if size is not None)
+
+    kind = node.get("type")
+
+    if kind in ("boolean", "null"):
+        return 1
+
+    if kind in ("integer", "number"):
+        return _NUMBER_TOKENS
+
+    if kind == "string":
+        max_length = node.get("maxLength")
+        return None if max_length is None else _label_tokens("x" * max_length) + 2
+
+    if kind == "array":
+        max_items = node.get("maxItems")
+        item = _value_tokens(node.get("items", {}), defs, seen)
+        if max_items is None or item is None:
+            return None
+        return max_items * (item + 1) + 2
+
+    if kind == "object":
+        # dict[str, Any] and other free objects take any number of keys
+        if node.get("additionalProperties") not in (None, False):
+            return None
+
+        total = 2
+        for name, value in node.get("properties", {}).items():
+            size = _value_tokens(value, defs, seen)
+            if size is None:
+                return None
+            total += _label_tokens(name) + size + _VALUE_OVERHEAD_TOKENS
+        return total
+
+    return None
+
+
+def _label_tokens(text: str) -> int:
+    return math.ceil(len(text) / _LABEL_CHARS_PER_TOKEN) + 1
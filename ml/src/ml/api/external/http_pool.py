@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, ClassVar
+
+import httpx
+
+from ml.configs import (
+    get_http2_enabled,
+    get_http_keepalive_expiry,
+    get_http_max_connections,
+    get_http_max_keepalive_connections,
+)
+from ml.utils.metrics import HTTP_POOL_CONNECTIONS, HTTP_POOL_QUEUED_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    active: int = 0
+    idle: int = 0
+    queued: int = 0
+
+
+class ModelHTTPPool:
+    """
+    One keep-alive connection pool shared by every model client
+
+    The ollama and openai clients each wrap their own httpx.AsyncClient, all of
+    them are built on this transport, so a model call reuses a warm connection
+    instead of paying for TCP and TLS setup. Closing one of those clients would
+    close the shared pool, only close_instance does that.
+    """
+
+    _instance: ClassVar[ModelHTTPPool | None] = None
+
+    def __init__(
+        self,
+        max_connections: int | None = None,
+        max_keepalive_connections: int | None = None,
+        keepalive_expiry: float | None = None,
+        http2: bool | None = None,
+    ) -> None:
+        limits = httpx.Limits(
+            max_connections=(
+                get_http_max_connections() if max_connections is None else max_connections
+            ),
+            max_keepalive_connections=(
+                get_http_max_keepalive_connections()
+                if max_keepalive_connections is None
+                else max_keepalive_connections
+            ),
+            keepalive_expiry=(
+                get_http_keepalive_expiry() if keepalive_expiry is None else keepalive_expiry
+            ),
+        )
+        self.http2 = _http2_available(get_http2_enabled() if http2 is None else http2)
+        self.transport = httpx.AsyncHTTPTransport(limits=limits, http2=self.http2)
+
+    @classmethod
+    def instance(cls) -> ModelHTTPPool:
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def reset_instance(cls) -> None:
+        cls._instance = None
+
+    @classmethod
+    async def close_instance(cls) -> None:
+        if cls._instance is None:
+            return
+
+        pool, cls._instance = cls._instance, None
+        await pool.transport.aclose()
+
+    def stats(self) -> PoolStats:
+        # httpx keeps its httpcore pool private, a changed layout only blanks the metrics
+        pool: Any = getattr(self.transport, "_pool", None)
+        if pool is None:
+            return PoolStats()
+
+        connections = list(getattr(pool, "connections", []))
+        idle = sum(1 for connection in connections if connection.is_idle())
+        active = sum(
+            1
+            for connection in connections
+            if not connection.is_idle() and not connection.is_closed()
+        )
+        queued = sum(1 for request in getattr(pool, "_requests", []) if request.is_queued())
+        return PoolStats(active=active, idle=idle, queued=queued)
+
+
+def _http2_available(requested: bool) -> bool:
+    if not requested:
+        return False
+
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("HTTP2_ENABLED is set but the h2 package is missing, using HTTP/1.1")
+        return False
+
+    return True
+
+
+def _current_stats() -> PoolStats:
+    pool = ModelHTTPPool._instance
+    return PoolStats() if pool is None else pool.stats()
+
+
+HTTP_POOL_CONNECTIONS.labels(state="active").set_function(lambda: _current_stats().active)
+HTTP_POOL_CONNECTIONS.labels(state="idle").set_function(lambda: _current_stats().idle)
+HTTP_POOL_QUEUED_REQUESTS.set_function(lambda: _current_stats().queued)
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from pathlib import Path
+from typing import Any
+
+from ollama import ChatResponse, EmbedResponse
+
+logger = logging.getLogger(__name__)
+
+# request fields that decide the answer; model, options and keep_alive do not,
+# so a cassette recorded with one model can be replayed under another name
+_KEY_FIELDS: dict[str, tuple[str, ...]] = {
+    "chat": ("messages", "format", "stream"),
+    "embed": ("input",),
+}
+
+
+def interaction_key(kind: str, request: dict[str, Any]) -> str:
+    fields = {name: request.get(name) for name in _KEY_FIELDS[kind]}
+    if kind == "chat":
+        # the ollama client treats a missing stream flag as a non-streaming call
+        fields["stream"] = bool(fields["stream"])
+
+    encoded = json.dumps({"kind": kind, **fields}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class CassetteRecorder:
+    """
+    Wraps an ollama AsyncClient and appends every chat/embed interaction to a JSONL cassette
+
+    Chunk offsets of streams and the duration of plain calls are stored,
+    so a replay can reproduce the model timing. A stream its consumer stopped
+    reading early is stored up to the last chunk read; the same consumer stops
+    at the same place on replay.
+    """
+
+    def __init__(self, client: Any, path: str | Path) -> None:
+        self.client = client
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    async def chat(self, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+
+        if not kwargs.get("stream", False):
+            response = await self.client.chat(**kwargs)
+            self._write("chat", kwargs, response=response, duration=time.perf_counter() - started)
+            return response
+
+        stream = await self.client.chat(**kwargs)
+        return self._record_stream(kwargs, stream, started)
+
+    async def embed(self, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        response = await self.client.embed(**kwargs)
+        self._write("embed", kwargs, response=response, duration=time.perf_counter() - started)
+        return response
+
+    async def _record_stream(
+        self, request: dict[str, Any], stream: AsyncIterator[Any], started: float
+    ) -> AsyncIterator[Any]:
+        chunks: list[dict[str, Any]] = []
+
+        try:
+            # closing the recording must close the model response as well
+            async with aclosing(stream):
+                async for chunk in stream:
+                    chunks.append(
+                        {
+                            "offset": time.perf_counter() - started,
+                            "chunk": chunk.model_dump(mode="json"),
+                        }
+                    )
+                    yield chunk
+        finally:
+            # planners stop reading once the plan is parsed, the prefix they read is their answer
+            if chunks:
+                self._write("chat", request, chunks=chunks, duration=time.perf_counter() - started)
+
+    def _write(
+        self,
+        kind: str,
+        request: dict[str, Any],
+        *,
+        duration: float,
+        response: Any = None,
+        chunks: list[dict[str, Any]] | None = None,
+    ) -> None:
+        interaction: dict[str, Any] = {
+            "key": interaction_key(kind, request),
+            "kind": kind,
+            "request": request,
+            "duration": duration,
+        }
+        if chunks is not None:
+            interaction["chunks"] = chunks
+        else:
+            interaction["response"] = response.model_dump(mode="json")
+
+        line = json.dumps(interaction, ensure_ascii=False, default=str)
+        # one synchronous write per interaction, concurrent calls can not interleave
+        with self.path.open("a", encoding="utf-8") as cassette:
+            cassette.write(line + "\n")
+
+
+class CassetteReplayer:
+    """
+    Serves chat/embed calls from a cassette written by CassetteRecorder
+
+    Identical requests are answered with their recordings in the recorded order,
+    cycling when the requests repeat more often than they were recorded.
+    Timings are multiplied by time_scale: 1 keeps them, 0 answers at once.
+    """
+
+    def __init__(self, path: str | Path, time_scale: float = 1.0) -> None:
+        if time_scale < 0:
+            raise ValueError("time_scale must not be negative")
+
+        self.path = Path(path)
+        self.time_scale = time_scale
+        self._interactions: dict[str, list[dict[str, Any]]] = {}
+        self._cursors: dict[str, int] = {}
+
+        with self.path.open(encoding="utf-8") as cassette:
+            for line in cassette:
+                if not line.strip():
+                    continue
+                interaction = json.loads(line)
+                self._interactions.setdefault(interaction["key"], []).append(interaction)
+
+        logger.info(
+            "Loaded %d recorded model interactions from %s",
+            sum(len(recorded) for recorded in self._interactions.values()),
+            self.path,
+        )
+
+    async def chat(self, **kwargs: Any) -> Any:
+        interaction = self._next("chat", kwargs)
+
+        if "chunks" not in interaction:
+            await self._sleep(interaction["duration"])
+            return ChatResponse.model_validate(interaction["response"])
+
+        return self._replay_stream(interaction["chunks"])
+
+    async def embed(self, **kwargs: Any) -> EmbedResponse:
+        interaction = self._next("embed", kwargs)
+        await self._sleep(interaction["duration"])
+        return EmbedResponse.model_validate(interaction["response"])
+
+    async def _replay_stream(self, chunks: list[dict[str, Any]]) -> AsyncIterator[ChatResponse]:
+        elapsed = 0.0
+        for recorded in chunks:
+            await self._sleep(recorded["offset"] - elapsed)
+            elapsed = recorded["offset"]
+            yield ChatResponse.model_validate(recorded["chunk"])
+
+    def _next(self, kind: str, request: dict[str, Any]) -> dict[str, Any]:
+        key = interaction_key(kind, request)
+        recorded = self._interactions.get(key)
+
+        if not recorded:
+            raise RuntimeError(f"Cassette {self.path} has no recorded {kind} call for this request")
+
+        cursor = self._cursors.get(key, 0)
+        self._cursors[key] = cursor + 1
+        return recorded[cursor % len(recorded)]
+
+    async def _sleep(self, seconds: float) -> None:
+        delay = seconds * self.time_scale
+        if delay > 0:
+            await asyncio.sleep(delay)
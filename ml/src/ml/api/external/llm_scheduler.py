@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import ClassVar
+
+from ml.configs import get_llm_max_concurrency, get_llm_max_queue
+from ml.utils.metrics import LLM_QUEUE_DEPTH, LLM_QUEUE_WAIT
+
+# slot hold time assumed before the first call finished, only feeds Retry-After
+_INITIAL_HOLD_SECONDS = 2.0
+_HOLD_SMOOTHING = 0.2
+
+
+class CallPriority(IntEnum):
+    """Order in which queued reasoning model calls get a free slot, lower goes first"""
+
+    # classifiers and answer streams, a user is waiting on them right now
+    INTERACTIVE = 0
+    PLANNER = 1
+    # web chunk relevance scoring, many small calls behind one research step
+    RELEVANCE = 2
+
+
+class ModelQueueSaturatedError(RuntimeError):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Reasoning model queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class LLMScheduler:
+    """
+    Admission control in front of the reasoning model
+
+    At most max_concurrency calls run at once, the rest wait in a priority queue
+    and are served by priority, then in arrival order. The queue itself is not
+    bounded: a request that is already running always gets its calls answered.
+    New requests are turned away by check_admission once max_queue calls wait.
+    """
+
+    _instance: ClassVar[LLMScheduler | None] = None
+
+    def __init__(self, max_concurrency: int | None = None, max_queue: int | None = None) -> None:
+        self.max_concurrency = (
+            get_llm_max_concurrency() if max_concurrency is None else max_concurrency
+        )
+        self.max_queue = get_llm_max_queue() if max_queue is None else max_queue
+
+        if self.max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+        if self.max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+
+        self._active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._arrivals = itertools.count()
+        self._hold_seconds = _INITIAL_HOLD_SECONDS
+
+    @classmethod
+    def instance(cls) -> LLMScheduler:
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def reset_instance(cls) -> None:
+        cls._instance = None
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def check_admission(self) -> None:
+        """Raises ModelQueueSaturatedError when a new request should not be started"""
+        if self.queue_depth >= self.max_queue and self._active >= self.max_concurrency:
+            raise ModelQueueSaturatedError(self.retry_after())
+
+    def retry_after(self) -> int:
+        """Whole seconds until the current queue is expected to drain"""
+        rounds = (self.queue_depth + 1) / self.max_concurrency
+        return max(1, math.ceil(rounds * self._hold_seconds))
+
+    @asynccontextmanager
+    async def slot(self, priority: CallPriority) -> AsyncIterator[None]:
+        await self._acquire(priority)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            held = time.perf_counter() - started
+            self._hold_seconds += _HOLD_SMOOTHING * (held - self._hold_seconds)
+            self._release()
+
+    async def _acquire(self, priority: CallPriority) -> None:
+        label = priority.name.lower()
+
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            LLM_QUEUE_WAIT.labels(priority=label).observe(0.0)
+            return
+
+        waiter: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        entry = (int(priority), next(self._arrivals), waiter)
+        heapq.heappush(self._waiters, entry)
+        LLM_QUEUE_DEPTH.labels(priority=label).inc()
+        queued_at = time.perf_counter()
+
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # the slot was handed over right before the cancellation, pass it on
+                self._release()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                LLM_QUEUE_DEPTH.labels(priority=label).dec()
+            raise
+
+        LLM_QUEUE_WAIT.labels(priority=label).observe(time.perf_counter() - queued_at)
+
+    def _release(self) -> None:
+        while self._waiters:
+            priority, _, waiter = heapq.heappop(self._waiters)
+            LLM_QUEUE_DEPTH.labels(priority=CallPriority(priority).name.lower()).dec()
+            if not waiter.done():
+                # the slot goes straight to the waiter, _active stays the same
+                waiter.set_result(None)
+                return
+
+        self._active -= 1
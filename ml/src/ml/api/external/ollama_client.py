@@ -2,22 +2,53 @@ from __future__ import annotations
 
 import logging
 from collections.abc import AsyncIterator
+from contextlib import aclosing
 from typing import Any, ClassVar, TypeVar, cast
 
+import numpy as np
 from ollama import AsyncClient
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from pydantic import BaseModel
 
+from ml.api.external.classification_cache import ClassificationCache
+from ml.api.external.embedding_batcher import EmbeddingBatcher
+from ml.api.external.embedding_cache import EmbeddingCache
+from ml.api.external.generation_profile import (
+    GenerationProfile,
+    context_bucket,
+    estimate_prompt_tokens,
+    json_schema,
+    schema_output_tokens,
+)
+from ml.api.external.http_pool import ModelHTTPPool
+from ml.api.external.llm_scheduler import CallPriority, LLMScheduler
+from ml.api.external.ollama_pool import OllamaBackendPool
+from ml.api.external.prompt_prefix import PromptPrefixTracker
 from ml.configs import (
+    OLLAMA_API_MODES,
     EmbeddingClientSettings,
     LLMMode,
+    ModelTier,
     ReasoningClientSettings,
+    get_cassette_path,
+    get_embedding_batch_size,
+    get_embedding_batch_window,
     get_llm_mode,
     get_provider_api_key,
     get_provider_base_url,
+    get_replay_time_scale,
+)
+from ml.domain.models import ChatHistory, UsageRecord
+from ml.utils import (
+    PartialJSONObject,
+    apply_openrouter_provider,
+    current_chat_id,
+    current_node_name,
+    observe_llm_call,
+    observe_llm_stream,
+    record_usage,
 )
-from ml.domain.models import ChatHistory
-from ml.utils import apply_openrouter_provider
+from ml.utils.metrics import LLM_PROMPT_EVAL_RATE
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -25,59 +56,175 @@ logger: logging.Logger = logging.getLogger(__name__)
 
 
 class ReasoningModelClient:
-    _instance: ClassVar[ReasoningModelClient | None] = None
+    """
+    Reasoning model client, one instance per model tier
 
-    def __init__(self, settings: ReasoningClientSettings | None = None) -> None:
-        self.mode: LLMMode = get_llm_mode()
-        provider_base_url: str | None = None
-        provider_api_key: str | None = None
+    Nodes ask for the tier they need: classifiers run on a small model, the
+    final answer on the large one. Every tier has its own model and options,
+    tiers without a configured model use OLLAMA_REASONING_MODEL.
+    """
 
-        if self.mode is not LLMMode.OLLAMA:
-            provider_base_url = get_provider_base_url(self.mode)
-            provider_api_key = get_provider_api_key(self.mode)
+    _instances: ClassVar[dict[ModelTier, ReasoningModelClient]] = {}
+    # largest num_ctx sent per model, shared by the tiers that use the same model
+    _context_sizes: ClassVar[dict[str, int]] = {}
 
-        self.settings: ReasoningClientSettings = self._resolve_settings(settings, provider_base_url)
+    def __init__(
+        self,
+        settings: ReasoningClientSettings | None = None,
+        tier: ModelTier = ModelTier.ANSWER,
+    ) -> None:
+        self.mode: LLMMode = get_llm_mode()
+        self.tier: ModelTier = tier
+        provider_base_url, provider_api_key = _provider_connection(self.mode)
+
+        self.settings: ReasoningClientSettings = self._resolve_settings(
+            settings, provider_base_url, tier
+        )
 
         logger.debug(
-            "initiated Reasoning client with mode=%s and settings: \n%s",
+            "initiated Reasoning client for tier=%s with mode=%s and settings: \n%s",
+            tier.value,
             self.mode.value,
             self.settings.model_dump_json(indent=2),
         )
 
-        if self.mode is LLMMode.OLLAMA:
-            self.client: Any = AsyncClient(host=self.settings.base_url)
-        else:
-            self.client = AsyncOpenAI(base_url=provider_base_url, api_key=provider_api_key)
+        self.client: Any = _build_client(
+            self.mode, self.settings.backend_urls, provider_base_url, provider_api_key
+        )
+        self.scheduler: LLMScheduler = LLMScheduler.instance()
 
     @classmethod
     def instance(
         cls,
+        tier: ModelTier = ModelTier.ANSWER,
         settings: ReasoningClientSettings | None = None,
     ) -> ReasoningModelClient:
-        if cls._instance is None:
-            cls._instance = cls(settings)
-        return cls._instance
+        if tier not in cls._instances:
+            cls._instances[tier] = cls(settings, tier)
+        return cls._instances[tier]
 
     @classmethod
     def reset_instance(cls) -> None:
-        cls._instance = None
+        cls._instances.clear()
+        cls._context_sizes.clear()
 
-    async def call(self, messages: ChatHistory, **kwargs: Any) -> str:
+    async def call(
+        self,
+        messages: ChatHistory,
+        *,
+        priority: CallPriority = CallPriority.INTERACTIVE,
+        **kwargs: Any,
+    ) -> str:
         """Async non-streaming call."""
+        async with self.scheduler.slot(priority):
+            return await self._call(messages, **kwargs)
+
+    async def stream(
+        self,
+        messages: ChatHistory,
+        *,
+        priority: CallPriority = CallPriority.INTERACTIVE,
+        **kwargs: Any,
+    ) -> AsyncIterator[dict[str, Any]]:
+        """
+        Async streaming call.
+
+        Yields raw chunks from AsyncClient.chat(stream=True),
+        suitable for SSE / websockets. The model slot is held until the stream ends.
+        """
+        async with (
+            self.scheduler.slot(priority),
+            aclosing(self._stream(messages, **kwargs)) as chunks,
+        ):
+            async for chunk in chunks:
+                yield chunk
+
+    async def call_structured(
+        self,
+        messages: ChatHistory,
+        output_schema: type[T],
+        *,
+        priority: CallPriority = CallPriority.INTERACTIVE,
+        cached: bool = False,
+        profile: GenerationProfile | None = None,
+        **kwargs: Any,
+    ) -> T:
+        """
+        Async call that asks the model to return JSON matching output_schema.
+
+        With cached=True an answer given before to the same prompt is returned
+        without calling the model; meant for classifiers that see only the user text.
+        The output limit comes from the schema and thinking is off for the
+        classifier tier, profile overrides both for one node.
+        """
+        profile = self._structured_profile(output_schema).override(profile)
+
+        if not cached:
+            async with self.scheduler.slot(priority):
+                return await self._call_structured(messages, output_schema, profile, **kwargs)
+
+        cache = ClassificationCache.instance()
+        key = ClassificationCache.key(self.settings.model, messages, output_schema, kwargs)
+
+        hit = cache.get(key, output_schema.__name__)
+        if hit is not None:
+            return output_schema.model_validate_json(hit)
+
+        async with self.scheduler.slot(priority):
+            result = await self._call_structured(messages, output_schema, profile, **kwargs)
+
+        cache.put(key, result.model_dump_json())
+        return result
+
+    async def stream_structured(
+        self,
+        messages: ChatHistory,
+        output_schema: type[BaseModel],
+        *,
+        priority: CallPriority = CallPriority.INTERACTIVE,
+        profile: GenerationProfile | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[PartialJSONObject]:
+        """
+        Streaming call_structured, yields the partially read answer after every chunk
+
+        Fields of output_schema become readable one by one while the model is
+        still generating. A caller that has what it needs stops iterating,
+        which closes the stream and ends the generation; after the last chunk
+        output_schema.model_validate(answer.fields) gives the full result.
+        """
+        profile = self._structured_profile(output_schema).override(profile)
+        answer = PartialJSONObject()
+
+        async with (
+            self.scheduler.slot(priority),
+            aclosing(self._stream_structured(messages, output_schema, profile, **kwargs)) as chunks,
+        ):
+            async for chunk in chunks:
+                content = _chunk_content(chunk)
+                if content:
+                    answer.feed(content)
+                    yield answer
+
+    @observe_llm_call("call")
+    async def _call(self, messages: ChatHistory, **kwargs: Any) -> str:
         logger.debug(
             "Calling Reasoner with messages as payload: %s",
             messages.model_dump_json(indent=2),
         )
 
-        if self.mode is LLMMode.OLLAMA:
+        if self.mode in OLLAMA_API_MODES:
             try:
+                chat_messages = messages.model_dump_chat()
+                shared = self._shared_prefix(chat_messages)
                 response: dict[str, Any] = await self.client.chat(
                     model=self.settings.model,
-                    messages=messages.model_dump_chat(),
-                    options=self.settings.options.model_dump() | kwargs,
+                    messages=chat_messages,
+                    options=self._ollama_options(messages, None, GenerationProfile(), kwargs),
                     keep_alive=self.settings.keep_alive,
                     stream=False,
                 )
+                self._record_ollama_usage("call", response, shared)
                 content: str | None = response["message"]["content"]
 
                 if content is None:
@@ -107,6 +254,7 @@ class ReasoningModelClient:
         apply_openrouter_provider(response_kwargs, self.mode)
 
         response = await self.client.chat.completions.create(**response_kwargs)
+        self._record_openai_usage("call", response.usage)
 
         content = response.choices[0].message.content
 
@@ -115,31 +263,78 @@ class ReasoningModelClient:
 
         return content
 
-    async def stream(
+    @observe_llm_stream("stream")
+    async def _stream(
         self,
         messages: ChatHistory,
         **kwargs: Any,
     ) -> AsyncIterator[dict[str, Any]]:
-        """
-        Async streaming call.
+        async with aclosing(
+            self._chat_stream("stream", messages, None, GenerationProfile(), kwargs)
+        ) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    @observe_llm_stream("stream_structured")
+    async def _stream_structured(
+        self,
+        messages: ChatHistory,
+        output_schema: type[BaseModel],
+        profile: GenerationProfile,
+        **kwargs: Any,
+    ) -> AsyncIterator[Any]:
+        async with aclosing(
+            self._chat_stream("stream_structured", messages, output_schema, profile, kwargs)
+        ) as chunks:
+            async for chunk in chunks:
+                yield chunk
+
+    async def _chat_stream(
+        self,
+        method: str,
+        messages: ChatHistory,
+        output_schema: type[BaseModel] | None,
+        profile: GenerationProfile,
+        kwargs: dict[str, Any],
+    ) -> AsyncIterator[Any]:
+        if self.mode in OLLAMA_API_MODES:
+            chat_messages = messages.model_dump_chat()
+            shared = self._shared_prefix(chat_messages)
+            request: dict[str, Any] = {}
+            if output_schema is not None:
+                request["format"] = json_schema(output_schema)
+            if profile.think is not None:
+                request["think"] = profile.think
 
-        Yields raw chunks from AsyncClient.chat(stream=True),
-        suitable for SSE / websockets.
-        """
-        if self.mode is LLMMode.OLLAMA:
             stream = await self.client.chat(
                 model=self.settings.model,
-                messages=messages.model_dump_chat(),
-                options=self.settings.options.model_dump() | kwargs,
+                messages=chat_messages,
+                options=self._ollama_options(messages, output_schema, profile, kwargs),
                 keep_alive=self.settings.keep_alive,
                 stream=True,
+                **request,
             )
 
-            async for chunk in stream:
-                yield chunk
+            generated = 0
+            reported = False
+            try:
+                async for chunk in stream:
+                    if _field(chunk, "done"):
+                        # only the closing chunk carries the counters
+                        self._record_ollama_usage(method, chunk, shared)
+                        reported = True
+                    else:
+                        generated += 1
+                    yield chunk
+            finally:
+                await _close_stream(stream)
+                if not reported:
+                    self._record_unreported_usage(method, messages, generated)
             return
 
-        max_tokens = _limit_tokens(self.settings.options.num_predict)
+        max_tokens = _limit_tokens(
+            self.settings.options.num_predict if profile.num_predict is None else profile.num_predict
+        )
 
         response_kwargs: dict[str, Any] = {
             "model": self.settings.model,
@@ -147,8 +342,13 @@ class ReasoningModelClient:
             "temperature": self.settings.options.temperature,
             "top_p": self.settings.options.top_p,
             "stream": True,
+            # the usage arrives as one extra chunk with no choices after the last delta
+            "stream_options": {"include_usage": True},
         }
 
+        if output_schema is not None:
+            response_kwargs["response_format"] = self._response_format(output_schema)
+
         if max_tokens is not None:
             response_kwargs["max_tokens"] = max_tokens
 
@@ -158,52 +358,66 @@ class ReasoningModelClient:
 
         stream = await self.client.chat.completions.create(**response_kwargs)
 
-        async for chunk in stream:
-            yield chunk.model_dump()
-
-    async def call_structured(
+        generated = 0
+        reported = False
+        try:
+            async for chunk in stream:
+                chunk_payload = chunk.model_dump()
+                if chunk_payload.get("usage") is not None:
+                    self._record_openai_usage(method, chunk_payload["usage"])
+                    reported = True
+                elif chunk_payload.get("choices"):
+                    generated += 1
+                yield chunk_payload
+        finally:
+            await _close_stream(stream)
+            if not reported:
+                self._record_unreported_usage(method, messages, generated)
+
+    @observe_llm_call("call_structured")
+    async def _call_structured(
         self,
         messages: ChatHistory,
         output_schema: type[T],
+        profile: GenerationProfile | None = None,
         **kwargs: Any,
     ) -> T:
-        """
-        Async call that asks the model to return JSON matching output_schema.
-        """
-        if self.mode is LLMMode.OLLAMA:
+        profile = profile or GenerationProfile()
+
+        if self.mode in OLLAMA_API_MODES:
+            chat_messages = messages.model_dump_chat()
+            shared = self._shared_prefix(chat_messages)
+            request: dict[str, Any] = {}
+            if profile.think is not None:
+                request["think"] = profile.think
+
             response: dict[str, Any] = await self.client.chat(
                 model=self.settings.model,
-                messages=messages.model_dump_chat(),
-                format=output_schema.model_json_schema(),
-                options=self.settings.options.model_dump() | kwargs,
+                messages=chat_messages,
+                format=json_schema(output_schema),
+                options=self._ollama_options(messages, output_schema, profile, kwargs),
                 keep_alive=self.settings.keep_alive,
+                **request,
             )
+            self._record_ollama_usage("call_structured", response, shared)
 
             raw: str | None = response["message"]["content"]
 
             if raw is None:
                 raise RuntimeError("Got None from chat completion with structured output")
         else:
-            max_tokens = _limit_tokens(self.settings.options.num_predict)
-
-            response_format: dict[str, Any] = {"type": "json_object"}
-
-            if self.mode is LLMMode.OPENROUTER:
-                response_format = {
-                    "type": "json_schema",
-                    "json_schema": {
-                        "name": output_schema.__name__,
-                        "schema": output_schema.model_json_schema(),
-                        "strict": True,
-                    },
-                }
+            max_tokens = _limit_tokens(
+                self.settings.options.num_predict
+                if profile.num_predict is None
+                else profile.num_predict
+            )
 
             response_kwargs: dict[str, Any] = {
                 "model": self.settings.model,
                 "messages": messages.model_dump_chat(),
                 "temperature": self.settings.options.temperature,
                 "top_p": self.settings.options.top_p,
-                "response_format": response_format,
+                "response_format": self._response_format(output_schema),
                 "stream": False,
             }
 
@@ -215,6 +429,7 @@ class ReasoningModelClient:
             apply_openrouter_provider(response_kwargs, self.mode)
 
             response = await self.client.chat.completions.create(**response_kwargs)
+            self._record_openai_usage("call_structured", response.usage)
 
             raw = response.choices[0].message.content
 
@@ -227,15 +442,140 @@ class ReasoningModelClient:
             logger.exception("FAILED TO PARSE STRUCTURED OUTPUT")
             raise ValueError("Structured response did not match the expected schema") from exc
 
+    def _response_format(self, output_schema: type[BaseModel]) -> dict[str, Any]:
+        if self.mode is not LLMMode.OPENROUTER:
+            return {"type": "json_object"}
+
+        return {
+            "type": "json_schema",
+            "json_schema": {
+                "name": output_schema.__name__,
+                "schema": json_schema(output_schema),
+                "strict": True,
+            },
+        }
+
+    def _structured_profile(self, output_schema: type[BaseModel]) -> GenerationProfile:
+        return GenerationProfile(
+            num_predict=schema_output_tokens(output_schema),
+            # a label needs no reasoning, and thinking tokens would count against num_predict
+            think=False if self.tier is ModelTier.CLASSIFIER else None,
+        )
+
+    def _ollama_options(
+        self,
+        messages: ChatHistory,
+        output_schema: type[BaseModel] | None,
+        profile: GenerationProfile,
+        kwargs: dict[str, Any],
+    ) -> dict[str, Any]:
+        options = self.settings.options.model_dump() | profile.options() | kwargs
+
+        if "num_ctx" in kwargs or profile.num_ctx is not None:
+            return options
+
+        if output_schema is not None and profile.num_predict is not None:
+            # only an answer bounded by its schema fits a context sized from the prompt
+            bucket = context_bucket(messages, profile.num_predict, self.settings.options.num_ctx)
+            options["num_ctx"] = self._grow_context(bucket)
+        else:
+            # free text keeps the tier window, which later structured calls then reuse
+            options["num_ctx"] = self._grow_context(options["num_ctx"])
+
+        return options
+
+    def _grow_context(self, num_ctx: int) -> int:
+        # Ollama reloads the model for every new num_ctx, so a model only moves up the buckets
+        sizes = ReasoningModelClient._context_sizes
+        sizes[self.settings.model] = max(num_ctx, sizes.get(self.settings.model, 0))
+        return sizes[self.settings.model]
+
+    def _shared_prefix(self, chat_messages: list[dict[str, str]]) -> float:
+        return PromptPrefixTracker.instance().shared_share(
+            self.settings.model, current_chat_id(), chat_messages
+        )
+
+    def _record_ollama_usage(self, method: str, response: Any, shared: float = 0.0) -> None:
+        prompt_tokens = _field(response, "prompt_eval_count") or 0
+        prompt_eval_duration = _ns_to_seconds(_field(response, "prompt_eval_duration"))
+
+        if prompt_tokens and prompt_eval_duration > 0:
+            # a reused prefix is skipped by the backend, so the same prompt evaluates faster
+            LLM_PROMPT_EVAL_RATE.labels(prefix="reused" if shared else "new").observe(
+                prompt_tokens / prompt_eval_duration
+            )
+
+        record_usage(
+            UsageRecord(
+                node=current_node_name(),
+                method=method,
+                model=self.settings.model,
+                prompt_tokens=prompt_tokens,
+                # Ollama does not report cache hits, they are read off the prompt eval time
+                cached_prompt_tokens=PromptPrefixTracker.instance().cached_tokens(
+                    self.settings.model, shared, prompt_tokens, prompt_eval_duration
+                ),
+                completion_tokens=_field(response, "eval_count") or 0,
+                prompt_eval_duration=prompt_eval_duration,
+                eval_duration=_ns_to_seconds(_field(response, "eval_duration")),
+                load_duration=_ns_to_seconds(_field(response, "load_duration")),
+                total_duration=_ns_to_seconds(_field(response, "total_duration")),
+            )
+        )
+
+    def _record_openai_usage(self, method: str, usage: Any) -> None:
+        if usage is None:
+            return
+
+        record_usage(
+            UsageRecord(
+                node=current_node_name(),
+                method=method,
+                model=self.settings.model,
+                prompt_tokens=_field(usage, "prompt_tokens") or 0,
+                completion_tokens=_field(usage, "completion_tokens") or 0,
+                cached_prompt_tokens=_field(
+                    _field(usage, "prompt_tokens_details"), "cached_tokens"
+                )
+                or 0,
+            )
+        )
+
+    def _record_unreported_usage(
+        self, method: str, messages: ChatHistory, generated_chunks: int
+    ) -> None:
+        """
+        Counts a stream closed before the backend sent its usage
+
+        A planner that stops reading once it has the tool drops the closing
+        chunk with the counters; the prompt was evaluated all the same and
+        every streamed chunk is about one generated token.
+        """
+        if generated_chunks == 0:
+            # nothing was generated, the call may have failed before the prompt was read
+            return
+
+        record_usage(
+            UsageRecord(
+                node=current_node_name(),
+                method=method,
+                model=self.settings.model,
+                prompt_tokens=estimate_prompt_tokens(messages),
+                completion_tokens=generated_chunks,
+            )
+        )
+
     @staticmethod
     def _resolve_settings(
-        settings: ReasoningClientSettings | None, provider_base_url: str | None
+        settings: ReasoningClientSettings | None,
+        provider_base_url: str | None,
+        tier: ModelTier = ModelTier.ANSWER,
     ) -> ReasoningClientSettings:
         if settings is None:
             if provider_base_url is None:
-                return ReasoningClientSettings()
+                return ReasoningClientSettings.for_tier(tier)
 
-            return ReasoningClientSettings(base_url=provider_base_url)
+            return ReasoningClientSettings.for_tier(tier, base_url=provider_base_url)
 
         if provider_base_url is None or settings.base_url:
             return settings
@@ -248,12 +588,7 @@ class EmbeddingModelClient:
 
     def __init__(self, settings: EmbeddingClientSettings | None = None) -> None:
         self.mode: LLMMode = get_llm_mode()
-        provider_base_url: str | None = None
-        provider_api_key: str | None = None
-
-        if self.mode is not LLMMode.OLLAMA:
-            provider_base_url = get_provider_base_url(self.mode)
-            provider_api_key = get_provider_api_key(self.mode)
+        provider_base_url, provider_api_key = _provider_connection(self.mode)
 
         self.settings: EmbeddingClientSettings = self._resolve_settings(settings, provider_base_url)
         logger.debug(
@@ -263,10 +598,13 @@ class EmbeddingModelClient:
         )
 
         # Async Ollama client (same pattern as ReasoningModelClient)
-        if self.mode is LLMMode.OLLAMA:
-            self.client: Any = AsyncClient(host=self.settings.base_url)
-        else:
-            self.client = AsyncOpenAI(base_url=provider_base_url, api_key=provider_api_key)
+        self.client: Any = _build_client(
+            self.mode, self.settings.backend_urls, provider_base_url, provider_api_key
+        )
+        self.cache = EmbeddingCache.instance()
+        self.batcher = EmbeddingBatcher(
+            self._embed_and_store, get_embedding_batch_size(), get_embedding_batch_window()
+        )
 
     @classmethod
     def instance(
@@ -281,22 +619,88 @@ class EmbeddingModelClient:
     def reset_instance(cls) -> None:
         cls._instance = None
 
-    async def call(self, content: str, **kwargs: Any) -> list[float]:
+    async def call(self, content: str, *, cached: bool = True, **kwargs: Any) -> list[float]:
         """
         Async call for generating a single embedding vector.
 
         Returns a single embedding vector (list[float]) for the given content.
+        Vectors come from the embedding cache when possible, a miss joins the
+        next micro-batch. Calls with extra options bypass both since the options
+        may change the vector.
+        """
+        if kwargs or not cached:
+            matrix = await self._embed_many([content], **kwargs)
+            return cast(list[float], matrix[0].tolist())
+
+        if self.cache.enabled:
+            vector = self.cache.get(self.settings.model, content)
+            if vector is not None:
+                return cast(list[float], vector.tolist())
+
+        vector = await self.batcher.submit(content)
+        return cast(list[float], vector.tolist())
+
+    async def call_many(
+        self, contents: list[str], *, cached: bool = True, **kwargs: Any
+    ) -> np.ndarray:
         """
+        Embeds a list of texts, returns a C-contiguous float32 matrix with one row per text
+
+        Every distinct text that is not cached is embedded once, in requests of
+        at most batch_size texts.
+        """
+        use_cache = cached and not kwargs and self.cache.enabled
+        unique = list(dict.fromkeys(contents))
+        rows: dict[str, np.ndarray] = {}
+
+        if use_cache:
+            for content in unique:
+                vector = self.cache.get(self.settings.model, content)
+                if vector is not None:
+                    rows[content] = vector
+
+        missing = [content for content in unique if content not in rows]
+        for start in range(0, len(missing), self.batcher.max_batch_size):
+            chunk = missing[start : start + self.batcher.max_batch_size]
+            if use_cache:
+                matrix = await self._embed_and_store(chunk)
+            else:
+                matrix = await self._embed_many(chunk, **kwargs)
+            rows.update(zip(chunk, matrix, strict=True))
+
+        if not contents:
+            return np.empty((0, 0), dtype=np.float32)
+
+        return np.stack([rows[content] for content in contents]).astype(np.float32, copy=False)
+
+    async def _embed_and_store(self, contents: list[str]) -> np.ndarray:
+        """Embeds the distinct texts of contents once and stores them in the cache"""
+        unique = list(dict.fromkeys(contents))
+        matrix = await self._embed_many(unique)
+
+        if self.cache.enabled:
+            await self.cache.put_many(self.settings.model, unique, matrix)
+
+        if len(unique) == len(contents):
+            return matrix
+
+        positions = {content: row for row, content in enumerate(unique)}
+        return matrix[[positions[content] for content in contents]]
+
+    async def _embed_many(self, contents: list[str], **kwargs: Any) -> np.ndarray:
         logger.debug(
-            "Calling Embedder with content length=%d",
-            len(content),
+            "Calling Embedder with %d texts of total length=%d",
+            len(contents),
+            sum(len(content) for content in contents),
         )
+        # a single text is sent as a plain string, as recorded cassettes expect
+        embed_input: str | list[str] = contents[0] if len(contents) == 1 else contents
 
         try:
-            if self.mode is LLMMode.OLLAMA:
+            if self.mode in OLLAMA_API_MODES:
                 response: dict[str, Any] = await self.client.embed(
                     model=self.settings.model,
-                    input=content,
+                    input=embed_input,
                     options=self.settings.options.model_dump() | kwargs,
                     keep_alive=self.settings.keep_alive,
                 )
@@ -304,21 +708,21 @@ class EmbeddingModelClient:
             else:
                 response = await self.client.embeddings.create(
                     model=self.settings.model,
-                    input=content,
+                    input=embed_input,
                     **kwargs,
                 )
-                embeddings = cast(list[float], response.data[0].embedding)
+                ordered = sorted(response.data, key=lambda item: item.index)
+                embeddings = [cast(list[float], item.embedding) for item in ordered]
         except Exception:
             logger.exception("Error while calling embedding provider (async)")
             raise
 
-        if not embeddings:
-            raise RuntimeError("Got empty embeddings from embedding model")
-
-        if self.mode is LLMMode.OLLAMA:
-            return embeddings[0]
+        if len(embeddings) != len(contents):
+            raise RuntimeError(
+                f"Got {len(embeddings)} embeddings for {len(contents)} texts from embedding model"
+            )
 
-        return cast(list[float], embeddings)
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
 
     @staticmethod
     def _resolve_settings(
@@ -336,8 +740,91 @@ class EmbeddingModelClient:
         return settings.model_copy(update={"base_url": provider_base_url})
 
 
+def _provider_connection(mode: LLMMode) -> tuple[str | None, str | None]:
+    """Base url and api key of the remote provider, (None, None) when Ollama is called"""
+    if mode is LLMMode.REPLAY:
+        # nothing is called, the url only keeps settings from probing for a local Ollama
+        return f"file://{get_cassette_path()}", None
+
+    if mode in OLLAMA_API_MODES:
+        return None, None
+
+    return get_provider_base_url(mode), get_provider_api_key(mode)
+
+
+def _build_client(
+    mode: LLMMode, ollama_urls: list[str], provider_base_url: str | None, api_key: str | None
+) -> Any:
+    # every client keeps its own httpx.AsyncClient, the connections behind them are shared
+    transport = ModelHTTPPool.instance().transport
+
+    def _ollama(url: str) -> AsyncClient:
+        return AsyncClient(host=url, transport=transport)
+
+    def _ollama_nodes() -> Any:
+        if len(ollama_urls) == 1:
+            return _ollama(ollama_urls[0])
+        return OllamaBackendPool.instance(ollama_urls, _ollama)
+
+    if mode is LLMMode.OLLAMA:
+        return _ollama_nodes()
+
+    if mode not in OLLAMA_API_MODES:
+        return AsyncOpenAI(
+            base_url=provider_base_url,
+            api_key=api_key,
+            http_client=DefaultAsyncHttpxClient(transport=transport),
+        )
+
+    # cassettes are a development tool, plain deployments never import them
+    from ml.api.external.llm_cassette import CassetteRecorder, CassetteReplayer
+
+    if mode is LLMMode.RECORD:
+        return CassetteRecorder(_ollama_nodes(), get_cassette_path())
+
+    return CassetteReplayer(get_cassette_path(), get_replay_time_scale())
+
+
+async def _close_stream(stream: Any) -> None:
+    """
+    Drops the HTTP response of an abandoned stream
+
+    Closing the connection is what makes the server stop generating, a stream
+    that is merely no longer iterated keeps the model busy until it finishes.
+    """
+    if hasattr(stream, "aclose"):
+        # ollama streams and cassette replays are async generators
+        await stream.aclose()
+    elif hasattr(stream, "close"):
+        # openai AsyncStream
+        await stream.close()
+
+
+def _chunk_content(chunk: Any) -> str | None:
+    # ollama chunks carry a message, openai chunks are dumped dicts with choices
+    message = _field(chunk, "message")
+    if message is not None:
+        return _field(message, "content")
+
+    choices = _field(chunk, "choices") or []
+    return choices[0]["delta"].get("content") if choices else None
+
+
 def _limit_tokens(num_predict: int) -> int | None:
     if num_predict == -1:
         return None
 
     return num_predict
+
+
+def _field(value: Any, name: str) -> Any:
+    # ollama responses are models, openai usage is dumped to a dict for streams
+    if isinstance(value, dict):
+        return value.get(name)
+    return getattr(value, name, None)
+
+
+def _ns_to_seconds(value: int | None) -> float:
+    if value is None:
+        return 0.0
+    return value / 1_000_000_000
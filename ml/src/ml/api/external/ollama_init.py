@@ -1,12 +1,12 @@
-import asyncio
 import logging
 import os
-from collections.abc import Iterator
+from collections.abc import AsyncIterator
 
 import ollama
-from ollama import ListResponse
+from ollama import AsyncClient, ListResponse
 
-from ml.configs import MODEL_ENV_VARS
+from ml.api.external.http_pool import ModelHTTPPool
+from ml.configs import MODEL_ENV_VARS, get_ollama_base_urls, get_tier_models
 from ml.utils import format_progress
 
 logger: logging.Logger = logging.getLogger(__name__)
@@ -15,10 +15,21 @@ logger: logging.Logger = logging.getLogger(__name__)
 async def fetch_available_models() -> list[str]:
     """
     getting list of all available model names
+
+    With several Ollama nodes a model counts as available once every node has it.
     """
-    response: ListResponse = await asyncio.to_thread(ollama.list)
+    model_names: list[str] | None = None
+
+    for client in _init_clients():
+        response: ListResponse = await client.list()
+        node_models = [model.model for model in response.models if model.model is not None]
+        model_names = (
+            node_models
+            if model_names is None
+            else [model for model in model_names if model in node_models]
+        )
 
-    model_names: list[str] = [model.model for model in response.models if model.model is not None]
+    model_names = model_names or []
 
     if model_names:
         logger.info("Available Ollama models: %s", ", ".join(model_names))
@@ -42,6 +53,11 @@ async def get_models_from_env() -> list[str]:
     else:
         requested_model_names.append(chat_model_name)
 
+    # classifier and planner tiers may run on their own models
+    for model_name in get_tier_models().values():
+        if model_name not in requested_model_names:
+            requested_model_names.append(model_name)
+
     embedding_model_name: str | None = os.getenv(MODEL_ENV_VARS["embedding"])
     if not embedding_model_name:
         msg = f"{MODEL_ENV_VARS['embedding']} environment varaible is not setted up"
@@ -67,17 +83,17 @@ async def download_missing_models(available_models: list[str], requested_models:
 
     logger.info("Downloading missing models: %s", ", ".join(to_download))
 
-    def _pull_model(model_name: str) -> None:
+    async def _pull_model(client: AsyncClient, model_name: str) -> None:
         logger.info("Starting download for %s", model_name)
 
-        download_stream: Iterator[ollama.ProgressResponse] = ollama.pull(
+        download_stream: AsyncIterator[ollama.ProgressResponse] = await client.pull(
             model=model_name,
             stream=True,
         )
 
         last_step_percent: int | None = None  # last logged multiple of 5; None = nothing logged yet
 
-        for progress in download_stream:
+        async for progress in download_stream:
             completed = progress.completed
             total = progress.total
 
@@ -107,7 +123,20 @@ async def download_missing_models(available_models: list[str], requested_models:
 
         logger.info("Finished download for %s", model_name)
 
-    for model in to_download:
-        await asyncio.to_thread(_pull_model, model)
+    # a node that already has the model only verifies its manifest
+    for client in _init_clients():
+        for model in to_download:
+            await _pull_model(client, model)
 
     logger.info("All required models are downloaded")
+
+
+def _init_clients() -> list[AsyncClient]:
+    transport = ModelHTTPPool.instance().transport
+    backends = get_ollama_base_urls()
+
+    if not backends:
+        # same OLLAMA_HOST lookup as the ollama module functions, over the shared pool
+        return [AsyncClient(transport=transport)]
+
+    return [AsyncClient(host=url, transport=transport) for url in backends]
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from typing import Any, ClassVar
+
+import httpx
+
+from ml.configs import get_backend_health_interval, get_sticky_chats
+from ml.utils import LRUCache, current_chat_id
+from ml.utils.metrics import (
+    OLLAMA_BACKEND_FAILOVERS,
+    OLLAMA_BACKEND_HEALTHY,
+    OLLAMA_BACKEND_OUTSTANDING,
+)
+
+logger = logging.getLogger(__name__)
+
+# the ollama client turns a refused connection into a plain ConnectionError
+_CONNECTION_ERRORS = (ConnectionError, httpx.ConnectError, httpx.ConnectTimeout)
+_PROBE_TIMEOUT_SECONDS = 2.0
+
+
+@dataclass(eq=False)
+class OllamaBackend:
+    url: str
+    client: Any
+    outstanding: int = 0
+    healthy: bool = True
+    loaded_models: frozenset[str] = field(default_factory=frozenset)
+    last_pick: int = -1
+
+
+class OllamaBackendPool:
+    """
+    Routes Ollama chat/embed calls over several nodes
+
+    Calls of one chat stay on the node that served the chat first, where its
+    prompt prefix is still cached. Other calls go to the healthy node with the
+    fewest outstanding requests, ties prefer a node that already holds the model
+    and then the one picked longest ago. A node that refuses the connection is
+    taken out of rotation and the call moves to the next one; a background task
+    probes every node each health_interval seconds and brings recovered ones back.
+
+    Offers the chat/embed part of ollama.AsyncClient, so the model clients and
+    the cassette recorder use it in place of a single client. instance() gives
+    every client of the same node list one pool, so the sticky chats and the
+    outstanding counts see the calls of all model tiers and the embedder.
+    """
+
+    _instances: ClassVar[dict[tuple[str, ...], OllamaBackendPool]] = {}
+
+    def __init__(
+        self,
+        urls: list[str],
+        client_factory: Callable[[str], Any],
+        health_interval: float | None = None,
+        sticky_chats: int | None = None,
+    ) -> None:
+        if not urls:
+            raise ValueError("at least one Ollama url is required")
+
+        self.backends = [OllamaBackend(url, client_factory(url)) for url in dict.fromkeys(urls)]
+        self.health_interval = (
+            get_backend_health_interval() if health_interval is None else health_interval
+        )
+        self._sticky: LRUCache[int, OllamaBackend] = LRUCache(
+            get_sticky_chats() if sticky_chats is None else sticky_chats
+        )
+        self._picks = itertools.count()
+        self._health_task: asyncio.Task[None] | None = None
+
+        for backend in self.backends:
+            OLLAMA_BACKEND_HEALTHY.labels(backend=backend.url).set(1)
+
+    @classmethod
+    def instance(cls, urls: list[str], client_factory: Callable[[str], Any]) -> OllamaBackendPool:
+        key = tuple(dict.fromkeys(urls))
+        if key not in cls._instances:
+            cls._instances[key] = cls(list(key), client_factory)
+        return cls._instances[key]
+
+    @classmethod
+    def reset_instance(cls) -> None:
+        cls._instances.clear()
+
+    @classmethod
+    async def close_instances(cls) -> None:
+        """Stops the health checks of every shared pool, before their transport is closed"""
+        pools = list(cls._instances.values())
+        cls._instances.clear()
+        await asyncio.gather(*(pool.aclose() for pool in pools))
+
+    async def chat(self, **kwargs: Any) -> Any:
+        if kwargs.get("stream", False):
+            return self._stream_chat(kwargs)
+        return await self._request("chat", kwargs)
+
+    async def embed(self, **kwargs: Any) -> Any:
+        return await self._request("embed", kwargs)
+
+    async def check_health(self) -> None:
+        await asyncio.gather(*(self._probe(backend) for backend in self.backends))
+
+    async def aclose(self) -> None:
+        if self._health_task is not None and not self._health_task.done():
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+        self._health_task = None
+
+    async def _request(self, method: str, kwargs: dict[str, Any]) -> Any:
+        self._ensure_health_checks()
+        chat_id = current_chat_id()
+        tried: set[str] = set()
+
+        while True:
+            backend = self._pick(kwargs.get("model"), chat_id, tried)
+            self._begin(backend)
+            try:
+                return await getattr(backend.client, method)(**kwargs)
+            except _CONNECTION_ERRORS:
+                self._fail(backend, tried)
+                if len(tried) == len(self.backends):
+                    raise
+            finally:
+                self._end(backend)
+
+    async def _stream_chat(self, kwargs: dict[str, Any]) -> AsyncIterator[Any]:
+        self._ensure_health_checks()
+        chat_id = current_chat_id()
+        tried: set[str] = set()
+
+        while True:
+            backend = self._pick(kwargs.get("model"), chat_id, tried)
+            self._begin(backend)
+            stream: Any = None
+            try:
+                # the connection is only opened by the first chunk, later errors are not retried
+                try:
+                    stream = await backend.client.chat(**kwargs)
+                    first = await anext(aiter(stream))
+                except StopAsyncIteration:
+                    return
+                except _CONNECTION_ERRORS:
+                    self._fail(backend, tried)
+                    if len(tried) == len(self.backends):
+                        raise
+                    continue
+
+                yield first
+                async for chunk in stream:
+                    yield chunk
+                return
+            finally:
+                if stream is not None and hasattr(stream, "aclose"):
+                    await stream.aclose()
+                self._end(backend)
+
+    def _pick(self, model: str | None, chat_id: int | None, tried: set[str]) -> OllamaBackend:
+        candidates = [backend for backend in self.backends if backend.url not in tried]
+
+        pinned = None if chat_id is None else self._sticky.get(chat_id)
+        if pinned is not None and pinned.healthy and pinned in candidates:
+            chosen = pinned
+        else:
+            # with every node down the calls still try them, one may be back before its probe
+            healthy = [backend for backend in candidates if backend.healthy] or candidates
+            chosen = min(
+                healthy,
+                key=lambda backend: (
+                    backend.outstanding,
+                    model not in backend.loaded_models,
+                    backend.last_pick,
+                ),
+            )
+
+        chosen.last_pick = next(self._picks)
+        if chat_id is not None:
+            self._sticky.put(chat_id, chosen)
+        return chosen
+
+    def _begin(self, backend: OllamaBackend) -> None:
+        backend.outstanding += 1
+        OLLAMA_BACKEND_OUTSTANDING.labels(backend=backend.url).inc()
+
+    def _end(self, backend: OllamaBackend) -> None:
+        backend.outstanding -= 1
+        OLLAMA_BACKEND_OUTSTANDING.labels(backend=backend.url).dec()
+
+    def _fail(self, backend: OllamaBackend, tried: set[str]) -> None:
+        tried.add(backend.url)
+        self._set_health(backend, healthy=False)
+        if len(tried) < len(self.backends):
+            logger.warning("Ollama node %s refused the connection, failing over", backend.url)
+            OLLAMA_BACKEND_FAILOVERS.labels(backend=backend.url).inc()
+
+    def _ensure_health_checks(self) -> None:
+        if len(self.backends) > 1 and (self._health_task is None or self._health_task.done()):
+            self._health_task = asyncio.create_task(self._check_health_forever())
+
+    async def _check_health_forever(self) -> None:
+        while True:
+            await self.check_health()
+            await asyncio.sleep(self.health_interval)
+
+    async def _probe(self, backend: OllamaBackend) -> None:
+        try:
+            # /api/ps answers without touching a model and lists the loaded ones
+            response = await asyncio.wait_for(backend.client.ps(), _PROBE_TIMEOUT_SECONDS)
+        except Exception:
+            self._set_health(backend, healthy=False)
+            return
+
+        backend.loaded_models = frozenset(
+            model.model for model in response.models if getattr(model, "model", None)
+        )
+        self._set_health(backend, healthy=True)
+
+    def _set_health(self, backend: OllamaBackend, *, healthy: bool) -> None:
+        if backend.healthy != healthy:
+            if healthy:
+                logger.info("Ollama node %s is back in rotation", backend.url)
+            else:
+                logger.warning("Ollama node %s is out of rotation", backend.url)
+
+        backend.healthy = healthy
+        OLLAMA_BACKEND_HEALTHY.labels(backend=backend.url).set(1 if healthy else 0)
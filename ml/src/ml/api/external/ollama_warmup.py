@@ -1,7 +1,9 @@
 import logging
 
+from ml.api.external.http_pool import ModelHTTPPool
 from ml.api.external.ollama_client import EmbeddingModelClient, ReasoningModelClient
-from ml.configs import LLMMode, get_llm_mode
+from ml.api.external.ollama_pool import OllamaBackendPool
+from ml.configs import LLMMode, ModelTier, get_llm_mode
 from ml.domain.models import ChatHistory
 
 logger = logging.getLogger(__name__)
@@ -10,8 +12,9 @@ logger = logging.getLogger(__name__)
 async def init_warmup_clients():
     mode = get_llm_mode()
 
-    logger.debug("Initiating ReasoningModelClient for mode=%s", mode.value)
-    ReasoningModelClient.instance()
+    for tier in ModelTier:
+        logger.debug("Initiating ReasoningModelClient for tier=%s mode=%s", tier.value, mode.value)
+        ReasoningModelClient.instance(tier)
 
     logger.debug("Initiating EmbeddingModelClient for mode=%s", mode.value)
     EmbeddingModelClient.instance()
@@ -19,25 +22,36 @@ async def init_warmup_clients():
 
 async def _embedding_warmup() -> None:
     client = EmbeddingModelClient.instance()
-    await client.call(content="a")
+    # a cached vector would skip the call and leave the model unloaded
+    await client.call(content="a", cached=False)
 
 
 async def _reasoning_warmup() -> None:
-    client = ReasoningModelClient.instance()
     prompt: ChatHistory = ChatHistory()
     prompt.add_or_change_system(
         content="This is just model warmup call, don't think and reply as fast as possible"
     )
     prompt.add_user(content="Hello, say 'hello' to me as well and nothing else")
-    # calling with additional max output tokens = 1 for speed
-    await client.call(messages=prompt, num_predict=1)
+
+    warmed: set[tuple[str, int]] = set()
+    for tier in ModelTier:
+        client = ReasoningModelClient.instance(tier)
+        # tiers sharing a model and context size share the loaded runner as well
+        runner = (client.settings.model, client.settings.options.num_ctx)
+        if runner in warmed:
+            continue
+        warmed.add(runner)
+
+        logger.info("Warming up %s model %s", tier.value, client.settings.model)
+        # calling with additional max output tokens = 1 for speed
+        await client.call(messages=prompt, num_predict=1)
 
 
 async def clients_warmup() -> None:
     mode = get_llm_mode()
 
-    if mode is not LLMMode.OLLAMA:
-        logger.info("Skipping local client warmup for remote mode=%s", mode.value)
+    if mode not in (LLMMode.OLLAMA, LLMMode.RECORD):
+        logger.info("Skipping local client warmup for mode=%s", mode.value)
         return
 
     logger.info("Started embedding client warmup for mode=%s", mode.value)
@@ -53,3 +67,9 @@ async def close_clients() -> None:
 
     logger.debug("Closing embedding warmup client")
     EmbeddingModelClient.reset_instance()
+
+    logger.debug("Closing Ollama node pools")
+    await OllamaBackendPool.close_instances()
+
+    logger.debug("Closing shared model connection pool")
+    await ModelHTTPPool.close_instance()
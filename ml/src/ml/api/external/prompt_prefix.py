@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import os
+from typing import ClassVar
+
+from ml.utils import LRUCache
+
+_DEFAULT_TRACKED_PROMPTS = 256
+# short prompts are dominated by the per-call overhead and say little about the rate
+_MIN_BASELINE_PROMPT_TOKENS = 256
+_BASELINE_WEIGHT = 0.2
+
+
+class PromptPrefixTracker:
+    """
+    Estimates how much of a prompt Ollama can serve from its prompt cache
+
+    Ollama keeps the evaluated tokens of the last prompt of a slot and only
+    evaluates what follows the longest shared prefix. The tracker remembers the
+    last prompt sent for every chat and model and reports the share of a new
+    prompt that is byte-identical to it from the start. With calls of a chat
+    pinned to one node that share is what the node may skip; other chats using
+    the slot in between can still evict it, so cached_tokens derives what was
+    really skipped from the prompt eval time Ollama reports.
+    """
+
+    _instance: ClassVar[PromptPrefixTracker | None] = None
+
+    def __init__(self, maxsize: int = _DEFAULT_TRACKED_PROMPTS) -> None:
+        self._prompts: LRUCache[tuple[str, int], str] = LRUCache(maxsize)
+        # prompt tokens per second of every model when nothing is reused
+        self._rates: dict[str, float] = {}
+
+    @classmethod
+    def instance(cls) -> PromptPrefixTracker:
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def reset_instance(cls) -> None:
+        cls._instance = None
+
+    def shared_share(self, model: str, chat_id: int | None, messages: list[dict[str, str]]) -> float:
+        """Share of the prompt equal to the previous prompt of the chat, 0.0 outside of a chat"""
+        if chat_id is None:
+            return 0.0
+
+        rendered = "".join(f"{message['role']}\n{message['content']}\n" for message in messages)
+        previous = self._prompts.get((model, chat_id))
+        self._prompts.put((model, chat_id), rendered)
+
+        if previous is None or not rendered:
+            return 0.0
+
+        return len(os.path.commonprefix([previous, rendered])) / len(rendered)
+
+    def cached_tokens(
+        self, model: str, shared: float, prompt_tokens: int, prompt_eval_seconds: float
+    ) -> int:
+        """
+        Prompt tokens the backend did not evaluate, derived from the prompt eval time
+
+        Calls without a shared prefix keep the model's rate of evaluating a fresh
+        prompt. A call with one is credited with the tokens that rate could not
+        have evaluated in its prompt_eval_duration; 0 until the rate is known.
+        """
+        if prompt_tokens <= 0 or prompt_eval_seconds <= 0:
+            return 0
+
+        rate = self._rates.get(model)
+        if shared == 0.0:
+            if prompt_tokens >= _MIN_BASELINE_PROMPT_TOKENS:
+                observed = prompt_tokens / prompt_eval_seconds
+                self._rates[model] = (
+                    observed if rate is None else rate + _BASELINE_WEIGHT * (observed - rate)
+                )
+            return 0
+
+        if rate is None:
+            return 0
+
+        evaluated = min(float(prompt_tokens), rate * prompt_eval_seconds)
+        return round(prompt_tokens - evaluated)
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 from typing import ClassVar
 
 from websockets.asyncio.client import ClientConnection, connect
@@ -34,7 +35,7 @@ def _normalize_backend_url(raw_backend_url: str) -> str:
 
 
 def get_backend_url() -> str:
-    return _normalize_backend_url(GRAPH_LOG_SERVER_URL)
+    return _normalize_backend_url(os.getenv("GRAPH_LOG_SERVER_URL", GRAPH_LOG_SERVER_URL))
 
 
 class GraphLogWebSocketClient:
@@ -1,23 +1,74 @@
+import asyncio
 import json
 import logging
-from collections.abc import AsyncIterator
-from typing import Union
+from collections.abc import AsyncIterator, Awaitable, Callable, Coroutine
+from typing import Any, Union
 
-from fastapi import APIRouter, HTTPException, Request, status
+import anyio
+from fastapi import APIRouter, Header, HTTPException, Request, status
 from fastapi.responses import JSONResponse, StreamingResponse
 from ollama._types import ChatResponse
+from starlette.types import Receive, Scope, Send
 
 from ml.api.schemas import MessagePayload
+from ml.api.schemas.message_payload import Tag
 from ml.api.external import GraphLogWebSocketClient
-from ml.domain.workflow.router import workflow, workflow_collected
+from ml.api.external.llm_scheduler import LLMScheduler, ModelQueueSaturatedError
+from ml.domain.models import WorkflowEvent, WorkflowEventType
+from ml.domain.workflow.router import workflow_collected, workflow_events
+from ml.utils.metrics import REQUESTS_CANCELLED, REQUESTS_IN_FLIGHT, REQUESTS_REJECTED
 
 router = APIRouter(tags=["workflow"])
 
 logger = logging.getLogger(__name__)
 
+# how often /message checks whether its client is still waiting for the answer
+DISCONNECT_POLL_INTERVAL_SECONDS = 0.5
+
+# nginx' code for a request the client closed before the response was sent
+CLIENT_CLOSED_REQUEST = 499
+
+
+class _ClosingStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that closes its body iterator when the client goes away
+
+    Starlette only cancels the task that sends the stream, the generator itself is
+    left suspended, so the workflow behind it would keep running to the end.
+    on_close releases what the request acquired before the response; it runs
+    even when the body was never started, which the generator can not see.
+    """
+
+    def __init__(
+        self,
+        content: AsyncIterator[Union[str, bytes]],
+        *,
+        on_close: Callable[[], Awaitable[None]] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(content, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            body_iterator = self.body_iterator
+            with anyio.CancelScope(shield=True):
+                if hasattr(body_iterator, "aclose"):
+                    await body_iterator.aclose()
+                if self.on_close is not None:
+                    await self.on_close()
+
 
 @router.post("/message_stream")
-async def message_stream(request: Request, payload: MessagePayload) -> StreamingResponse:
+async def message_stream(
+    request: Request,
+    payload: MessagePayload,
+    x_deadline_seconds: float | None = Header(default=None, gt=0),
+) -> StreamingResponse:
+    payload = _with_deadline(payload, x_deadline_seconds)
+
     model_ready = request.app.state.model_ready
     if not model_ready.is_set():
         raise HTTPException(
@@ -25,6 +76,8 @@ async def message_stream(request: Request, payload: MessagePayload) -> Streaming
             detail="Models are still initialising",
         )
 
+    _admit("/message_stream")
+
     graph_log_client = request.app.state.graph_log_client
     if not isinstance(graph_log_client, GraphLogWebSocketClient):
         raise HTTPException(
@@ -44,61 +97,57 @@ async def message_stream(request: Request, payload: MessagePayload) -> Streaming
 
     logger.info("Invoking workflow for /message_stream request")
 
-    stream, tag, written_file_url = await workflow(payload)
+    in_flight = REQUESTS_IN_FLIGHT.labels(endpoint="/message_stream")
+    in_flight.inc()
 
-    if written_file_url is not None and not isinstance(written_file_url, str):
-        raise TypeError("Workflow written_file_url must be a string or None")
+    events = workflow_events(payload)
 
     async def event_generator() -> AsyncIterator[Union[str, bytes]]:
         try:
-            async for chunk in stream:
-                if isinstance(chunk, ChatResponse):
-                    chunk_payload = chunk.model_dump_json()
-                    yield f"data: {chunk_payload}\n\n"
-                    continue
-
-                if isinstance(chunk, dict):
-                    chunk_payload = json.dumps(chunk, ensure_ascii=False)
-                    yield f"data: {chunk_payload}\n\n"
-                    continue
-
-                if isinstance(chunk, str):
-                    yield f"data: {chunk}\n\n"
-                    continue
-
-                if isinstance(chunk, bytes):
-                    yield b"data: " + chunk + b"\n\n"
-                    continue
-
-                msg = (
-                    "Workflow output stream yielded unsupported type. "
-                    f"Expected str, bytes, dict or ChatResponse, got {type(chunk)}"
-                )
-                logger.error(msg)
-                raise TypeError(msg)
-
-            final_file_url = None if written_file_url == "" else written_file_url
-
-            final_chunk_payload = json.dumps({"file_url": final_file_url}, ensure_ascii=False)
-            yield f"data: {final_chunk_payload}\n\n"
-        finally:
-            await graph_log_client.close(payload.chat_id)
+            # the head and the first byte go out before the pipeline is admitted
+            yield ": stream opened\n\n"
+
+            async for event in events:
+                yield _format_event(event)
+        except (asyncio.CancelledError, GeneratorExit):
+            logger.info("Client of chat_id=%s disconnected, cancelling workflow", payload.chat_id)
+            REQUESTS_CANCELLED.labels(endpoint="/message_stream").inc()
+            raise
 
-    return StreamingResponse(
+    async def close_stream() -> None:
+        in_flight.dec()
+        # closing the workflow stream cancels the running node with its model
+        # call and tool tasks
+        await events.aclose()
+        await graph_log_client.close(payload.chat_id)
+
+    headers = {
+        "Cache-Control": "no-cache",
+        "Connection": "keep-alive",
+        "Access-Control-Allow-Origin": "*",
+        "Access-Control-Allow-Headers": "Content-Type",
+    }
+    if payload.tag != Tag.Empty:
+        # a tag chosen by the user is known before the pipeline runs, the
+        # classified one arrives later as a tag event
+        headers["Tag"] = payload.tag.value
+
+    return _ClosingStreamingResponse(
         event_generator(),
+        on_close=close_stream,
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Headers": "Content-Type",
-            "Tag": tag.value,
-        },
+        headers=headers,
     )
 
 
 @router.post("/message")
-async def message(request: Request, payload: MessagePayload) -> JSONResponse:
+async def message(
+    request: Request,
+    payload: MessagePayload,
+    x_deadline_seconds: float | None = Header(default=None, gt=0),
+) -> JSONResponse:
+    payload = _with_deadline(payload, x_deadline_seconds)
+
     model_ready = request.app.state.model_ready
     if not model_ready.is_set():
         raise HTTPException(
@@ -106,6 +155,8 @@ async def message(request: Request, payload: MessagePayload) -> JSONResponse:
             detail="Models are still initialising",
         )
 
+    _admit("/message")
+
     graph_log_client = request.app.state.graph_log_client
     if not isinstance(graph_log_client, GraphLogWebSocketClient):
         raise HTTPException(
@@ -126,8 +177,112 @@ async def message(request: Request, payload: MessagePayload) -> JSONResponse:
     logger.info("Invoking workflow for /message request")
 
     try:
-        collected_response, tag = await workflow_collected(payload)
+        with REQUESTS_IN_FLIGHT.labels(endpoint="/message").track_inprogress():
+            collected = await _cancel_on_disconnect(request, workflow_collected(payload))
     finally:
         await graph_log_client.close(payload.chat_id)
 
+    if collected is None:
+        logger.info("Client of chat_id=%s disconnected, workflow cancelled", payload.chat_id)
+        REQUESTS_CANCELLED.labels(endpoint="/message").inc()
+        return JSONResponse(
+            status_code=CLIENT_CLOSED_REQUEST,
+            content={"detail": "Client closed the request"},
+        )
+
+    collected_response, tag = collected
     return JSONResponse(content={"content": collected_response, "tag": tag.value})
+
+
+def _admit(endpoint: str) -> None:
+    """Turns the request away with 503 while the reasoning model queue is full"""
+    try:
+        LLMScheduler.instance().check_admission()
+    except ModelQueueSaturatedError as exc:
+        logger.warning("Rejecting %s request: %s", endpoint, exc)
+        REQUESTS_REJECTED.labels(endpoint=endpoint).inc()
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Model queue is full",
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+
+
+async def _cancel_on_disconnect(
+    request: Request, workflow: Coroutine[Any, Any, tuple[str, Tag]]
+) -> tuple[str, Tag] | None:
+    """Runs the workflow until it finishes, or cancels it and returns None once the client leaves"""
+    task = asyncio.ensure_future(workflow)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL_SECONDS)
+            if done:
+                return task.result()
+
+            if await request.is_disconnected():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                return None
+    finally:
+        if not task.done():
+            task.cancel()
+            with anyio.CancelScope(shield=True):
+                await asyncio.gather(task, return_exceptions=True)
+
+
+def _with_deadline(payload: MessagePayload, header_deadline: float | None) -> MessagePayload:
+    # a deadline in the payload is more specific than the one in the header
+    if payload.deadline_seconds is not None or header_deadline is None:
+        return payload
+
+    return payload.model_copy(update={"deadline_seconds": header_deadline})
+
+
+def _format_event(event: WorkflowEvent) -> Union[str, bytes]:
+    if event.type == WorkflowEventType.Progress:
+        progress_payload = json.dumps({"event": "progress", "node": event.node}, ensure_ascii=False)
+        return f"data: {progress_payload}\n\n"
+
+    if event.type == WorkflowEventType.Answer:
+        return _format_answer_chunk(event.chunk)
+
+    if event.type == WorkflowEventType.Done:
+        written_file_url = event.file_url
+        if written_file_url is not None and not isinstance(written_file_url, str):
+            raise TypeError("Workflow written_file_url must be a string or None")
+
+        final_file_url = None if written_file_url == "" else written_file_url
+
+        final_chunk_payload = json.dumps(
+            {"file_url": final_file_url, "usage": event.usage}, ensure_ascii=False
+        )
+        return f"data: {final_chunk_payload}\n\n"
+
+    if event.type == WorkflowEventType.Tag and event.tag is not None:
+        tag_payload = json.dumps({"event": "tag", "tag": event.tag.value}, ensure_ascii=False)
+        return f"data: {tag_payload}\n\n"
+
+    return ""
+
+
+def _format_answer_chunk(chunk: object) -> Union[str, bytes]:
+    if isinstance(chunk, ChatResponse):
+        chunk_payload = chunk.model_dump_json()
+        return f"data: {chunk_payload}\n\n"
+
+    if isinstance(chunk, dict):
+        chunk_payload = json.dumps(chunk, ensure_ascii=False)
+        return f"data: {chunk_payload}\n\n"
+
+    if isinstance(chunk, str):
+        return f"data: {chunk}\n\n"
+
+    if isinstance(chunk, bytes):
+        return b"data: " + chunk + b"\n\n"
+
+    msg = (
+        "Workflow output stream yielded unsupported type. "
+        f"Expected str, bytes, dict or ChatResponse, got {type(chunk)}"
+    )
+    logger.error(msg)
+    raise TypeError(msg)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from ml.domain.models import ChatHistory, ModelMode, Tag, UserProfile
 
@@ -11,3 +11,5 @@ class MessagePayload(BaseModel):
     file_url: str | None
     is_voice: bool
     profile: UserProfile
+    # time budget of the request, the X-Deadline-Seconds header or the server default otherwise
+    deadline_seconds: float | None = Field(default=None, gt=0)
@@ -1,9 +1,62 @@
+from ml.configs.backend_settings import (
+    get_backend_health_interval,
+    get_ollama_base_urls,
+    get_sticky_chats,
+)
 from ml.configs.ollama_client_settings import (
     MODEL_ENV_VARS,
     EmbeddingClientSettings,
     ReasoningClientSettings,
 )
-from ml.configs.llm_mode import LLMMode, get_llm_mode, get_provider_api_key, get_provider_base_url
+from ml.configs.cache_settings import (
+    get_classifier_cache_path,
+    get_classifier_cache_size,
+    get_classifier_cache_ttl,
+    get_embedding_cache_dir,
+    get_embedding_cache_disk_bytes,
+    get_embedding_cache_size,
+)
+from ml.configs.deadline_settings import (
+    FINAL_ANSWER_RESERVE_SECONDS,
+    get_default_request_budget,
+    get_final_answer_reserve,
+)
+from ml.configs.http_settings import (
+    get_http2_enabled,
+    get_http_keepalive_expiry,
+    get_http_max_connections,
+    get_http_max_keepalive_connections,
+)
+from ml.configs.llm_mode import (
+    OLLAMA_API_MODES,
+    LLMMode,
+    get_cassette_path,
+    get_llm_mode,
+    get_provider_api_key,
+    get_provider_base_url,
+    get_replay_time_scale,
+)
+from ml.configs.research_settings import get_max_parallel_tool_calls
+from ml.configs.scheduler_settings import (
+    get_embedding_batch_size,
+    get_embedding_batch_window,
+    get_llm_max_concurrency,
+    get_llm_max_queue,
+    get_pipeline_max_concurrency,
+    get_pipeline_user_quota,
+)
+from ml.configs.tier_settings import (
+    TIER_MODEL_ENV_VARS,
+    ModelTier,
+    get_tier_model,
+    get_tier_models,
+    get_tier_num_ctx,
+)
+from ml.configs.thinking_settings import (
+    MAX_PLANNING_ROUNDS,
+    ThinkingStrategy,
+    get_thinking_strategy,
+)
 
 __all__ = [
     "ReasoningClientSettings",
@@ -13,4 +66,38 @@ __all__ = [
     "get_llm_mode",
     "get_provider_base_url",
     "get_provider_api_key",
+    "OLLAMA_API_MODES",
+    "get_cassette_path",
+    "get_replay_time_scale",
+    "get_max_parallel_tool_calls",
+    "get_llm_max_concurrency",
+    "get_llm_max_queue",
+    "get_pipeline_max_concurrency",
+    "get_pipeline_user_quota",
+    "get_embedding_batch_size",
+    "get_embedding_batch_window",
+    "MAX_PLANNING_ROUNDS",
+    "ThinkingStrategy",
+    "get_thinking_strategy",
+    "FINAL_ANSWER_RESERVE_SECONDS",
+    "get_default_request_budget",
+    "get_final_answer_reserve",
+    "get_classifier_cache_size",
+    "get_classifier_cache_ttl",
+    "get_classifier_cache_path",
+    "get_embedding_cache_size",
+    "get_embedding_cache_dir",
+    "get_embedding_cache_disk_bytes",
+    "get_http_max_connections",
+    "get_http_max_keepalive_connections",
+    "get_http_keepalive_expiry",
+    "get_http2_enabled",
+    "get_ollama_base_urls",
+    "get_backend_health_interval",
+    "get_sticky_chats",
+    "ModelTier",
+    "TIER_MODEL_ENV_VARS",
+    "get_tier_model",
+    "get_tier_models",
+    "get_tier_num_ctx",
 ]
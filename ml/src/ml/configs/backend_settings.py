@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import os
+
+_DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS = 10.0
+_DEFAULT_STICKY_CHATS = 4096
+
+
+def get_ollama_base_urls() -> list[str]:
+    """Ollama nodes the model clients balance between, empty for a single autodetected node"""
+    value = os.getenv("OLLAMA_BASE_URLS")
+
+    if not value:
+        return []
+
+    return [url.strip().rstrip("/") for url in value.split(",") if url.strip()]
+
+
+def get_backend_health_interval() -> float:
+    """Seconds between two health checks of every Ollama node"""
+    value = os.getenv("OLLAMA_HEALTH_CHECK_INTERVAL_SECONDS")
+
+    if value is None:
+        return _DEFAULT_HEALTH_CHECK_INTERVAL_SECONDS
+
+    try:
+        interval = float(value)
+    except ValueError as exc:
+        raise ValueError("OLLAMA_HEALTH_CHECK_INTERVAL_SECONDS must be a number") from exc
+
+    if interval <= 0:
+        raise ValueError("OLLAMA_HEALTH_CHECK_INTERVAL_SECONDS must be positive")
+
+    return interval
+
+
+def get_sticky_chats() -> int:
+    """Chats whose Ollama node is remembered, the least recently active ones are forgotten"""
+    value = os.getenv("OLLAMA_STICKY_CHATS")
+
+    if value is None:
+        return _DEFAULT_STICKY_CHATS
+
+    try:
+        size = int(value)
+    except ValueError as exc:
+        raise ValueError("OLLAMA_STICKY_CHATS must be an integer") from exc
+
+    if size < 0:
+        raise ValueError("OLLAMA_STICKY_CHATS must not be negative")
+
+    return size
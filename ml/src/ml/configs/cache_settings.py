@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+_DEFAULT_CLASSIFIER_CACHE_SIZE = 2048
+_DEFAULT_CLASSIFIER_CACHE_TTL_SECONDS = 24 * 60 * 60
+_DEFAULT_EMBEDDING_CACHE_SIZE = 4096
+_DEFAULT_EMBEDDING_CACHE_DISK_MB = 256
+
+
+def get_classifier_cache_size() -> int:
+    """Classifier answers kept in memory, 0 turns the cache off"""
+    value = os.getenv("CLASSIFIER_CACHE_SIZE")
+
+    if value is None:
+        return _DEFAULT_CLASSIFIER_CACHE_SIZE
+
+    try:
+        size = int(value)
+    except ValueError as exc:
+        raise ValueError("CLASSIFIER_CACHE_SIZE must be an integer") from exc
+
+    if size < 0:
+        raise ValueError("CLASSIFIER_CACHE_SIZE must not be negative")
+
+    return size
+
+
+def get_classifier_cache_ttl() -> float:
+    """Seconds a cached classifier answer stays valid"""
+    value = os.getenv("CLASSIFIER_CACHE_TTL_SECONDS")
+
+    if value is None:
+        return _DEFAULT_CLASSIFIER_CACHE_TTL_SECONDS
+
+    try:
+        ttl = float(value)
+    except ValueError as exc:
+        raise ValueError("CLASSIFIER_CACHE_TTL_SECONDS must be a number") from exc
+
+    if ttl <= 0:
+        raise ValueError("CLASSIFIER_CACHE_TTL_SECONDS must be positive")
+
+    return ttl
+
+
+def get_classifier_cache_path() -> Path | None:
+    """JSONL file the classifier cache is persisted to, None keeps it in memory only"""
+    value = os.getenv("CLASSIFIER_CACHE_PATH")
+
+    if not value:
+        return None
+
+    return Path(value)
+
+
+def get_embedding_cache_size() -> int:
+    """Embeddings kept in memory, 0 keeps only the on-disk tier"""
+    value = os.getenv("EMBEDDING_CACHE_SIZE")
+
+    if value is None:
+        return _DEFAULT_EMBEDDING_CACHE_SIZE
+
+    try:
+        size = int(value)
+    except ValueError as exc:
+        raise ValueError("EMBEDDING_CACHE_SIZE must be an integer") from exc
+
+    if size < 0:
+        raise ValueError("EMBEDDING_CACHE_SIZE must not be negative")
+
+    return size
+
+
+def get_embedding_cache_dir() -> Path | None:
+    """Directory of the on-disk embedding store, None keeps embeddings in memory only"""
+    value = os.getenv("EMBEDDING_CACHE_DIR")
+
+    if not value:
+        return None
+
+    return Path(value)
+
+
+def get_embedding_cache_disk_bytes() -> int:
+    """Size of the vectors file of one model, older embeddings are overwritten once it is full"""
+    value = os.getenv("EMBEDDING_CACHE_DISK_MB")
+
+    if value is None:
+        return _DEFAULT_EMBEDDING_CACHE_DISK_MB * 1024 * 1024
+
+    try:
+        megabytes = float(value)
+    except ValueError as exc:
+        raise ValueError("EMBEDDING_CACHE_DISK_MB must be a number") from exc
+
+    if megabytes <= 0:
+        raise ValueError("EMBEDDING_CACHE_DISK_MB must be positive")
+
+    return int(megabytes * 1024 * 1024)
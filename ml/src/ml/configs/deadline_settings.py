@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import os
+
+_DEFAULT_REQUEST_BUDGET_SECONDS = 180.0
+
+# kept free for the final answer: once less than this is left, no new research is started
+FINAL_ANSWER_RESERVE_SECONDS = 20.0
+# a short budget keeps most of its time for research instead of reserving all of it
+_FINAL_ANSWER_RESERVE_SHARE = 0.25
+
+
+def get_default_request_budget() -> float:
+    """Seconds a request may take when neither the payload nor the header sets a deadline"""
+    value = os.getenv("REQUEST_BUDGET_SECONDS")
+
+    if value is None:
+        return _DEFAULT_REQUEST_BUDGET_SECONDS
+
+    try:
+        budget = float(value)
+    except ValueError as exc:
+        raise ValueError("REQUEST_BUDGET_SECONDS must be a number") from exc
+
+    if budget <= 0:
+        raise ValueError("REQUEST_BUDGET_SECONDS must be positive")
+
+    return budget
+
+
+def get_final_answer_reserve(budget_seconds: float) -> float:
+    """Seconds of the request budget kept for the final answer"""
+    return min(FINAL_ANSWER_RESERVE_SECONDS, budget_seconds * _FINAL_ANSWER_RESERVE_SHARE)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+
+_DEFAULT_HTTP_MAX_CONNECTIONS = 64
+_DEFAULT_HTTP_MAX_KEEPALIVE_CONNECTIONS = 32
+_DEFAULT_HTTP_KEEPALIVE_EXPIRY_SECONDS = 60.0
+
+_TRUE_VALUES = frozenset({"1", "true", "yes", "on"})
+_FALSE_VALUES = frozenset({"0", "false", "no", "off"})
+
+
+def get_http_max_connections() -> int:
+    """Connections to model backends open at once, requests above it wait for a free one"""
+    value = os.getenv("HTTP_MAX_CONNECTIONS")
+
+    if value is None:
+        return _DEFAULT_HTTP_MAX_CONNECTIONS
+
+    try:
+        limit = int(value)
+    except ValueError as exc:
+        raise ValueError("HTTP_MAX_CONNECTIONS must be an integer") from exc
+
+    if limit < 1:
+        raise ValueError("HTTP_MAX_CONNECTIONS must be at least 1")
+
+    return limit
+
+
+def get_http_max_keepalive_connections() -> int:
+    """Idle connections kept open for the next model call"""
+    value = os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS")
+
+    if value is None:
+        return _DEFAULT_HTTP_MAX_KEEPALIVE_CONNECTIONS
+
+    try:
+        limit = int(value)
+    except ValueError as exc:
+        raise ValueError("HTTP_MAX_KEEPALIVE_CONNECTIONS must be an integer") from exc
+
+    if limit < 0:
+        raise ValueError("HTTP_MAX_KEEPALIVE_CONNECTIONS must not be negative")
+
+    return limit
+
+
+def get_http_keepalive_expiry() -> float:
+    """Seconds an idle connection is kept before it is closed"""
+    value = os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS")
+
+    if value is None:
+        return _DEFAULT_HTTP_KEEPALIVE_EXPIRY_SECONDS
+
+    try:
+        expiry = float(value)
+    except ValueError as exc:
+        raise ValueError("HTTP_KEEPALIVE_EXPIRY_SECONDS must be a number") from exc
+
+    if expiry < 0:
+        raise ValueError("HTTP_KEEPALIVE_EXPIRY_SECONDS must not be negative")
+
+    return expiry
+
+
+def get_http2_enabled() -> bool:
+    """Whether HTTP/2 is offered to model backends, needs the h2 package"""
+    value = os.getenv("HTTP2_ENABLED")
+
+    if value is None:
+        return False
+
+    normalized = value.strip().lower()
+    if normalized in _TRUE_VALUES:
+        return True
+    if normalized in _FALSE_VALUES:
+        return False
+
+    raise ValueError("HTTP2_ENABLED must be true or false")
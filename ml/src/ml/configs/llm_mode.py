@@ -8,6 +8,14 @@ class LLMMode(str, Enum):
     OLLAMA = "ollama"
     HUGGINGFACE = "huggingface"
     OPENROUTER = "openrouter"
+    # live Ollama, every model call is also written to the cassette
+    RECORD = "record"
+    # no model at all, answers are served from the cassette
+    REPLAY = "replay"
+
+
+# modes that talk the Ollama chat/embed API, directly or through a cassette
+OLLAMA_API_MODES = frozenset({LLMMode.OLLAMA, LLMMode.RECORD, LLMMode.REPLAY})
 
 
 class _ProviderEnvKeys:
@@ -37,7 +45,8 @@ def get_llm_mode() -> LLMMode:
         return LLMMode(value)
     except ValueError as exc:
         raise ValueError(
-            "LLM_MODE must be one of: 'ollama', 'huggingface', or 'openrouter'"
+            "LLM_MODE must be one of: 'ollama', 'huggingface', 'openrouter', "
+            "'record' or 'replay'"
         ) from exc
 
 
@@ -61,6 +70,33 @@ def get_provider_api_key(mode: LLMMode) -> str:
     return value
 
 
+def get_cassette_path() -> str:
+    value = os.getenv("LLM_CASSETTE_PATH")
+
+    if not value:
+        raise RuntimeError("Environment variable LLM_CASSETTE_PATH is required for record/replay")
+
+    return value
+
+
+def get_replay_time_scale() -> float:
+    """Multiplier of the recorded model timings, 1 replays them as is and 0 without delays"""
+    value = os.getenv("LLM_REPLAY_TIME_SCALE")
+
+    if value is None:
+        return 1.0
+
+    try:
+        scale = float(value)
+    except ValueError as exc:
+        raise ValueError("LLM_REPLAY_TIME_SCALE must be a number") from exc
+
+    if scale < 0:
+        raise ValueError("LLM_REPLAY_TIME_SCALE must not be negative")
+
+    return scale
+
+
 def _resolve_provider_env_name(mode: LLMMode, key: str) -> str:
     provider_env = _PROVIDER_ENV.get(mode)
 
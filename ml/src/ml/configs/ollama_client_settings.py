@@ -1,9 +1,15 @@
+from __future__ import annotations
+
 import logging
 import os
+from typing import Any
 
 import httpx
 from pydantic import BaseModel, ConfigDict, Field, field_validator
 
+from ml.configs.backend_settings import get_ollama_base_urls
+from ml.configs.tier_settings import ModelTier, get_tier_model, get_tier_num_ctx
+
 logger = logging.getLogger(__name__)
 
 _DEFAULT_BASE_URLS = ["http://ollama:11434", "http://localhost:11434"]
@@ -23,6 +29,11 @@ class ClientSettings(BaseModel):
 
     base_url: str = Field(default="", description="Ollama URL to call")
 
+    base_urls: list[str] = Field(
+        default_factory=list,
+        description="All Ollama nodes to balance between, only base_url is called when empty",
+    )
+
     keep_alive: int | str = Field(
         default=-1,  # default doesn't allo it to unload
         description=("How long till ollama unloads a model from GPU"),
@@ -34,6 +45,10 @@ class ClientSettings(BaseModel):
         if value:
             return value
 
+        backends = get_ollama_base_urls()
+        if backends:
+            return backends[0]
+
         logger.debug("Automatically defining base_url")
         for url in _DEFAULT_BASE_URLS:
             try:
@@ -53,6 +68,18 @@ class ClientSettings(BaseModel):
             f"Tested urls: {_DEFAULT_BASE_URLS}"
         )
 
+    @field_validator("base_urls", mode="before")
+    @classmethod
+    def define_base_urls(cls, value: list[str] | None) -> list[str]:
+        if value:
+            return value
+
+        return get_ollama_base_urls()
+
+    @property
+    def backend_urls(self) -> list[str]:
+        return self.base_urls or [self.base_url]
+
 
 class ReasoningModelOptions(BaseModel):
     temperature: float = Field(default=0.1, ge=0.0, le=2.0, description="Default temperature")
@@ -90,6 +117,19 @@ class ReasoningClientSettings(ClientSettings):
 
         return value
 
+    @classmethod
+    def for_tier(cls, tier: ModelTier, **kwargs: Any) -> ReasoningClientSettings:
+        """Settings of one model tier, the model falls back to OLLAMA_REASONING_MODEL"""
+        options = ReasoningModelOptions(
+            temperature=_TIER_TEMPERATURES.get(tier, ReasoningModelOptions().temperature),
+            num_ctx=get_tier_num_ctx(tier),
+        )
+        return cls(model=get_tier_model(tier) or "", options=options, **kwargs)
+
+
+# classifiers pick a label, sampling only makes their answers unstable
+_TIER_TEMPERATURES = {ModelTier.CLASSIFIER: 0.0}
+
 
 class EmbeddingModelOptions(BaseModel):
     num_ctx: int = Field(default=32768, description="Default max context window size")
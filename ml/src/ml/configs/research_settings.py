@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+import os
+
+_DEFAULT_MAX_PARALLEL_TOOL_CALLS = 3
+
+
+def get_max_parallel_tool_calls() -> int:
+    """Upper bound of tool calls one research step of a request may run concurrently"""
+    value = os.getenv("RESEARCH_MAX_PARALLEL_TOOL_CALLS")
+
+    if value is None:
+        return _DEFAULT_MAX_PARALLEL_TOOL_CALLS
+
+    try:
+        limit = int(value)
+    except ValueError as exc:
+        raise ValueError("RESEARCH_MAX_PARALLEL_TOOL_CALLS must be an integer") from exc
+
+    if limit < 1:
+        raise ValueError("RESEARCH_MAX_PARALLEL_TOOL_CALLS must be at least 1")
+
+    return limit
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+
+from ml.configs.backend_settings import get_ollama_base_urls
+
+# Ollama serves 4 requests of one loaded model in parallel unless OLLAMA_NUM_PARALLEL says otherwise
+_DEFAULT_LLM_MAX_CONCURRENCY = 4
+_DEFAULT_LLM_MAX_QUEUE = 32
+_DEFAULT_PIPELINE_MAX_CONCURRENCY = 8
+_DEFAULT_PIPELINE_USER_QUOTA = 2
+_DEFAULT_EMBEDDING_BATCH_SIZE = 32
+_DEFAULT_EMBEDDING_BATCH_WINDOW_MS = 5.0
+
+
+def get_llm_max_concurrency() -> int:
+    """
+    Reasoning model calls sent at once across all backends
+
+    LLM_MAX_CONCURRENCY is given per backend and should match the parallel
+    slots of one Ollama node; every node of OLLAMA_BASE_URLS adds its slots,
+    and the pool spreads the calls over the nodes. Without OLLAMA_BASE_URLS
+    the single autodetected node or the remote provider is one backend.
+    """
+    value = os.getenv("LLM_MAX_CONCURRENCY")
+
+    if value is None:
+        limit = _DEFAULT_LLM_MAX_CONCURRENCY
+    else:
+        try:
+            limit = int(value)
+        except ValueError as exc:
+            raise ValueError("LLM_MAX_CONCURRENCY must be an integer") from exc
+
+        if limit < 1:
+            raise ValueError("LLM_MAX_CONCURRENCY must be at least 1")
+
+    return limit * max(1, len(get_ollama_base_urls()))
+
+
+def get_llm_max_queue() -> int:
+    """Queued reasoning model calls above which new requests are turned away with 503"""
+    value = os.getenv("LLM_MAX_QUEUE")
+
+    if value is None:
+        return _DEFAULT_LLM_MAX_QUEUE
+
+    try:
+        limit = int(value)
+    except ValueError as exc:
+        raise ValueError("LLM_MAX_QUEUE must be an integer") from exc
+
+    if limit < 0:
+        raise ValueError("LLM_MAX_QUEUE must not be negative")
+
+    return limit
+
+
+def get_pipeline_max_concurrency() -> int:
+    """Pipelines of all users that may run at once, the rest wait for their fair turn"""
+    value = os.getenv("PIPELINE_MAX_CONCURRENCY")
+
+    if value is None:
+        return _DEFAULT_PIPELINE_MAX_CONCURRENCY
+
+    try:
+        limit = int(value)
+    except ValueError as exc:
+        raise ValueError("PIPELINE_MAX_CONCURRENCY must be an integer") from exc
+
+    if limit < 1:
+        raise ValueError("PIPELINE_MAX_CONCURRENCY must be at least 1")
+
+    return limit
+
+
+def get_pipeline_user_quota() -> int:
+    """Pipelines one user may run at once, further requests of the user wait"""
+    value = os.getenv("PIPELINE_USER_QUOTA")
+
+    if value is None:
+        return _DEFAULT_PIPELINE_USER_QUOTA
+
+    try:
+        limit = int(value)
+    except ValueError as exc:
+        raise ValueError("PIPELINE_USER_QUOTA must be an integer") from exc
+
+    if limit < 1:
+        raise ValueError("PIPELINE_USER_QUOTA must be at least 1")
+
+    return limit
+
+
+def get_embedding_batch_size() -> int:
+    """Texts sent to the embedding model in one request"""
+    value = os.getenv("EMBEDDING_BATCH_SIZE")
+
+    if value is None:
+        return _DEFAULT_EMBEDDING_BATCH_SIZE
+
+    try:
+        size = int(value)
+    except ValueError as exc:
+        raise ValueError("EMBEDDING_BATCH_SIZE must be an integer") from exc
+
+    if size < 1:
+        raise ValueError("EMBEDDING_BATCH_SIZE must be at least 1")
+
+    return size
+
+
+def get_embedding_batch_window() -> float:
+    """Seconds a single embedding call waits for others to share its request"""
+    value = os.getenv("EMBEDDING_BATCH_WINDOW_MS")
+
+    if value is None:
+        return _DEFAULT_EMBEDDING_BATCH_WINDOW_MS / 1000
+
+    try:
+        window = float(value)
+    except ValueError as exc:
+        raise ValueError("EMBEDDING_BATCH_WINDOW_MS must be a number") from exc
+
+    if window < 0:
+        raise ValueError("EMBEDDING_BATCH_WINDOW_MS must not be negative")
+
+    return window / 1000
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import os
+from enum import Enum
+
+# planner calls one plan-and-execute request may spend, the first plan included
+MAX_PLANNING_ROUNDS = 3
+
+
+class ThinkingStrategy(str, Enum):
+    # planner picks one tool per round trip
+    STEP = "step"
+    # planner emits the whole plan once, executor runs it and re-plans only on failure
+    PLAN_EXECUTE = "plan_execute"
+
+
+def get_thinking_strategy() -> ThinkingStrategy:
+    value = os.getenv("THINKING_STRATEGY")
+
+    if value is None:
+        return ThinkingStrategy.STEP
+
+    try:
+        return ThinkingStrategy(value)
+    except ValueError as exc:
+        raise ValueError("THINKING_STRATEGY must be one of: 'step' or 'plan_execute'") from exc
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import os
+from enum import Enum
+
+
+class ModelTier(str, Enum):
+    """
+    Reasoning model sizes a node can ask for
+
+    classifier — short yes/no and label answers, a 1–3B model is enough
+    planner — tool choice and research steps
+    answer — the text the user reads
+    """
+
+    CLASSIFIER = "classifier"
+    PLANNER = "planner"
+    ANSWER = "answer"
+
+
+TIER_MODEL_ENV_VARS = {
+    ModelTier.CLASSIFIER: "OLLAMA_CLASSIFIER_MODEL",
+    ModelTier.PLANNER: "OLLAMA_PLANNER_MODEL",
+    ModelTier.ANSWER: "OLLAMA_REASONING_MODEL",
+}
+
+_TIER_NUM_CTX_ENV_VARS = {
+    ModelTier.CLASSIFIER: "OLLAMA_CLASSIFIER_NUM_CTX",
+    ModelTier.PLANNER: "OLLAMA_PLANNER_NUM_CTX",
+    ModelTier.ANSWER: "OLLAMA_ANSWER_NUM_CTX",
+}
+
+_DEFAULT_TIER_NUM_CTX = {
+    ModelTier.CLASSIFIER: 8192,
+    ModelTier.PLANNER: 32768,
+    ModelTier.ANSWER: 32768,
+}
+
+
+def get_tier_model(tier: ModelTier) -> str | None:
+    """Model of the tier, a tier without its own model uses OLLAMA_REASONING_MODEL"""
+    return os.getenv(TIER_MODEL_ENV_VARS[tier]) or os.getenv(
+        TIER_MODEL_ENV_VARS[ModelTier.ANSWER]
+    )
+
+
+def get_tier_models() -> dict[ModelTier, str]:
+    """Models of every tier that has one configured"""
+    return {tier: model for tier in ModelTier if (model := get_tier_model(tier))}
+
+
+def get_tier_num_ctx(tier: ModelTier) -> int:
+    """Context window of the tier, classifiers see only short prompts"""
+    key = _TIER_NUM_CTX_ENV_VARS[tier]
+    value = os.getenv(key)
+
+    if value is None:
+        if tier is not ModelTier.ANSWER and not os.getenv(TIER_MODEL_ENV_VARS[tier]):
+            # Ollama reloads a model for every new num_ctx, a shared model keeps one size
+            return get_tier_num_ctx(ModelTier.ANSWER)
+        return _DEFAULT_TIER_NUM_CTX[tier]
+
+    try:
+        num_ctx = int(value)
+    except ValueError as exc:
+        raise ValueError(f"{key} must be an integer") from exc
+
+    if num_ctx < 1:
+        raise ValueError(f"{key} must be at least 1")
+
+    return num_ctx
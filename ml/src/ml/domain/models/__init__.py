@@ -2,8 +2,10 @@ from ml.domain.models.chat_history import ChatHistory, Message, Role
 from ml.domain.models.graph_state import GraphState
 from ml.domain.models.graph_log import GraphLogMessage, PicsTags
 from ml.domain.models.payload_data import MetaData, ModelMode, Tag, UserProfile
-from ml.domain.models.research import PlannedToolCall
+from ml.domain.models.research import PlannedToolCall, PlanStep
 from ml.domain.models.tools_data import Evidence, ToolCall, ToolResult
+from ml.domain.models.usage import UsageLedger, UsageRecord
+from ml.domain.models.workflow_event import WorkflowEvent, WorkflowEventType
 
 __all__ = [
     "ChatHistory",
@@ -17,7 +19,12 @@ __all__ = [
     "PicsTags",
     "GraphLogMessage",
     "PlannedToolCall",
+    "PlanStep",
     "Evidence",
     "ToolCall",
     "ToolResult",
+    "UsageLedger",
+    "UsageRecord",
+    "WorkflowEvent",
+    "WorkflowEventType",
 ]
@@ -1,19 +1,18 @@
 
 from __future__ import annotations
 
-from typing import Any, AsyncIterator, List, Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, Field
 
 from ml.domain.models.chat_history import ChatHistory
 from ml.domain.models.payload_data import MetaData, ModelMode, UserProfile
-from ml.domain.models.research import PlannedToolCall
+from ml.domain.models.research import PlannedToolCall, PlanStep
 from ml.domain.models.tools_data import Evidence, ToolCall, ToolResult
+from ml.domain.models.usage import UsageLedger
 
 
 class GraphState(BaseModel):
-    model_config = ConfigDict(arbitrary_types_allowed=True)
-
     # general data
     chat_id: int
     chat: ChatHistory
@@ -21,6 +20,10 @@ class GraphState(BaseModel):
     meta: MetaData
     file_url: str | None
     written_file_url: str | None = None
+    # time.monotonic() value the answer is due by, None means no limit
+    deadline: float | None = None
+    # seconds before the deadline kept for the final answer, None is the default reserve
+    deadline_reserve: float | None = None
 
     # validational fields
     model_mode: ModelMode
@@ -28,12 +31,22 @@ class GraphState(BaseModel):
 
     # results
     final_prompt: Optional[ChatHistory]
-    output_stream: Optional[AsyncIterator[dict[str, Any]]]
+
+    # model calls of this request, appended by the reasoning client
+    usage: UsageLedger = Field(default_factory=UsageLedger)
 
     # thinking related
     planned_tool_call: Optional[PlannedToolCall] = None
     pending_tool_call: Optional[ToolCall] = None
+    # independent calls of one research step, executed concurrently
+    pending_tool_calls: List[ToolCall] = Field(default_factory=list)
+    max_parallel_tool_calls: int = Field(default=1, ge=1)
     last_tool_result: Optional[ToolResult] = None
     last_executed_tool: Optional[str] = None
     evidence_list: List[Evidence] = Field(default_factory=list)
     tool_call_history: List[ToolCall] = Field(default_factory=list)
+
+    # plan-and-execute thinking
+    execution_plan: List[PlanStep] = Field(default_factory=list)
+    needs_replan: bool = False
+    planning_rounds: int = 0
@@ -2,10 +2,17 @@ from __future__ import annotations
 
 from typing import Any
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class PlannedToolCall(BaseModel):
     thought: str
     chosen_tool: str
     tool_args: dict[str, Any]
+
+
+class PlanStep(BaseModel):
+    id: int
+    tool: str
+    tool_args: dict[str, Any] = Field(default_factory=dict)
+    depends_on: list[int] = Field(default_factory=list)
@@ -10,6 +10,13 @@ class ToolResult(BaseModel):
     data: Any
     error: str | None = None
 
+    def has_evidence(self) -> bool:
+        if not self.success or not self.data:
+            return False
+        if isinstance(self.data, dict) and "results" in self.data:
+            return bool(self.data["results"])
+        return True
+
 
 class ToolCall(BaseModel):
     name: str
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class UsageRecord(BaseModel):
+    """Token counts and timings reported by the model for one call"""
+
+    node: str
+    method: str
+    model: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    # prompt tokens served from the backend prompt cache, for Ollama read off the eval time
+    cached_prompt_tokens: int = 0
+    # seconds, only Ollama reports these
+    prompt_eval_duration: float = 0.0
+    eval_duration: float = 0.0
+    load_duration: float = 0.0
+    total_duration: float = 0.0
+
+    @property
+    def is_cold_load(self) -> bool:
+        # a warm model answers load in a few milliseconds
+        return self.load_duration >= 1.0
+
+
+class UsageLedger(BaseModel):
+    """Every model call made while serving one request"""
+
+    records: list[UsageRecord] = Field(default_factory=list)
+
+    def add(self, record: UsageRecord) -> None:
+        self.records.append(record)
+
+    def summary(self) -> dict[str, Any]:
+        prompt_tokens = sum(record.prompt_tokens for record in self.records)
+        completion_tokens = sum(record.completion_tokens for record in self.records)
+
+        by_node: dict[str, dict[str, int]] = {}
+        for record in self.records:
+            node_usage = by_node.setdefault(
+                record.node, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0}
+            )
+            node_usage["calls"] += 1
+            node_usage["prompt_tokens"] += record.prompt_tokens
+            node_usage["completion_tokens"] += record.completion_tokens
+
+        return {
+            "calls": len(self.records),
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cached_prompt_tokens": sum(record.cached_prompt_tokens for record in self.records),
+            "prompt_eval_seconds": round(sum(r.prompt_eval_duration for r in self.records), 3),
+            "eval_seconds": round(sum(r.eval_duration for r in self.records), 3),
+            "load_seconds": round(sum(r.load_duration for r in self.records), 3),
+            "cold_loads": sum(1 for record in self.records if record.is_cold_load),
+            "by_node": by_node,
+        }
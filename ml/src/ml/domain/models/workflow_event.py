@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+from enum import Enum
+from typing import Any
+
+from pydantic import BaseModel
+
+from ml.domain.models.payload_data import Tag
+
+
+class WorkflowEventType(str, Enum):
+    Progress = "progress"
+    Tag = "tag"
+    Answer = "answer"
+    Done = "done"
+
+
+class WorkflowEvent(BaseModel):
+    """
+    Single item of a streamed workflow run
+
+    progress: graph node finished (node)
+    tag: request tag is resolved (tag)
+    answer: raw answer chunk from the reasoning model (chunk)
+    done: run is finished (file_url, usage summary of the model calls)
+    """
+
+    type: WorkflowEventType
+    node: str | None = None
+    tag: Tag | None = None
+    chunk: Any = None
+    file_url: str | None = None
+    usage: dict[str, Any] | None = None
@@ -1,3 +1,3 @@
-from ml.domain.workflow.router import workflow, workflow_collected
+from ml.domain.workflow.router import workflow_collected, workflow_events
 
-__all__ = ["workflow_collected", "workflow"]
+__all__ = ["workflow_collected", "workflow_events"]
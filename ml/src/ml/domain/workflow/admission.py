@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+from ml.configs import get_pipeline_max_concurrency, get_pipeline_user_quota
+from ml.domain.models import ModelMode
+from ml.utils.metrics import PIPELINE_QUEUE_WAIT, PIPELINES_QUEUED
+
+logger = logging.getLogger(__name__)
+
+# share of model time a pipeline is expected to take, a research run makes
+# several planning rounds and dozens of relevance calls
+MODE_COSTS: dict[ModelMode, float] = {
+    ModelMode.Fast: 1.0,
+    ModelMode.Auto: 2.0,
+    ModelMode.Thiking: 2.0,
+    ModelMode.Research: 4.0,
+}
+
+
+@dataclass(order=True)
+class _Waiter:
+    start_tag: float
+    arrival: int
+    user_id: int = field(compare=False)
+    chat_id: int = field(compare=False)
+    # start stamp among the user's own requests, where every chat is one flow
+    chat_tag: float = field(compare=False)
+    cost: float = field(compare=False)
+    future: asyncio.Future[None] = field(compare=False)
+
+
+class FairAdmission:
+    """
+    Weighted fair queueing of pipeline runs across users
+
+    Every user is one flow. A request is stamped with a virtual start time of
+    max(now, end of the user's previous request) and a virtual length of its
+    mode cost, and waiting requests start in the order of their start stamps
+    (start-time fair queueing). A user with many queued research runs is thereby
+    interleaved with everyone else instead of being served first come first
+    served, and no user runs more than user_quota pipelines at once.
+
+    The turns of one user are shared the same way between the user's chats:
+    a turn goes to the waiting request with the lowest stamp among the user's
+    chats, so a chat with a long queue does not hold back the user's other chats.
+    """
+
+    _instance: ClassVar[FairAdmission | None] = None
+
+    def __init__(self, max_running: int | None = None, user_quota: int | None = None) -> None:
+        self.max_running = get_pipeline_max_concurrency() if max_running is None else max_running
+        self.user_quota = get_pipeline_user_quota() if user_quota is None else user_quota
+
+        if self.max_running < 1:
+            raise ValueError("max_running must be at least 1")
+        if self.user_quota < 1:
+            raise ValueError("user_quota must be at least 1")
+
+        self._virtual_time = 0.0
+        self._user_finish: dict[int, float] = {}
+        self._chat_finish: dict[tuple[int, int], float] = {}
+        self._user_chat_time: dict[int, float] = {}
+        self._running: dict[int, int] = {}
+        self._waiters: list[_Waiter] = []
+        self._arrivals = itertools.count()
+
+    @classmethod
+    def instance(cls) -> FairAdmission:
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def reset_instance(cls) -> None:
+        cls._instance = None
+
+    @property
+    def running(self) -> int:
+        return sum(self._running.values())
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @asynccontextmanager
+    async def turn(self, user_id: int, chat_id: int, mode: ModelMode) -> AsyncIterator[None]:
+        await self._acquire(user_id, chat_id, mode)
+        try:
+            yield
+        finally:
+            self._release(user_id)
+
+    async def _acquire(self, user_id: int, chat_id: int, mode: ModelMode) -> None:
+        cost = MODE_COSTS[mode]
+        start_tag = max(self._virtual_time, self._user_finish.get(user_id, 0.0))
+        self._user_finish[user_id] = start_tag + cost
+
+        chat_tag = max(
+            self._user_chat_time.get(user_id, 0.0), self._chat_finish.get((user_id, chat_id), 0.0)
+        )
+        self._chat_finish[(user_id, chat_id)] = chat_tag + cost
+
+        waiter = _Waiter(
+            start_tag=start_tag,
+            arrival=next(self._arrivals),
+            user_id=user_id,
+            chat_id=chat_id,
+            chat_tag=chat_tag,
+            cost=cost,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._waiters.append(waiter)
+        self._dispatch()
+
+        if waiter.future.done():
+            PIPELINE_QUEUE_WAIT.labels(mode=mode.value).observe(0.0)
+            return
+
+        logger.info(
+            "Pipeline of user_id=%s chat_id=%s queued behind %s running pipelines",
+            user_id,
+            chat_id,
+            self.running,
+        )
+        PIPELINES_QUEUED.inc()
+        queued_at = time.perf_counter()
+
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # the turn was granted right before the cancellation, pass it on
+                self._release(user_id)
+            elif waiter in self._waiters:
+                self._withdraw(waiter)
+            raise
+        finally:
+            PIPELINES_QUEUED.dec()
+
+        PIPELINE_QUEUE_WAIT.labels(mode=mode.value).observe(time.perf_counter() - queued_at)
+
+    def _release(self, user_id: int) -> None:
+        self._running[user_id] -= 1
+        if self._running[user_id] == 0:
+            del self._running[user_id]
+
+        self._dispatch()
+        self._forget_idle_users()
+
+    def _withdraw(self, waiter: _Waiter) -> None:
+        """Removes a waiter that never ran and gives its share back to the user"""
+        self._waiters.remove(waiter)
+
+        # requests of the user and of the chat queued after it were stamped behind its share
+        for later in self._waiters:
+            if later.user_id != waiter.user_id:
+                continue
+            if later.start_tag > waiter.start_tag:
+                later.start_tag -= waiter.cost
+            if later.chat_id == waiter.chat_id and later.chat_tag > waiter.chat_tag:
+                later.chat_tag -= waiter.cost
+
+        finish = self._user_finish.get(waiter.user_id)
+        if finish is not None:
+            self._user_finish[waiter.user_id] = max(waiter.start_tag, finish - waiter.cost)
+
+        chat_key = (waiter.user_id, waiter.chat_id)
+        chat_finish = self._chat_finish.get(chat_key)
+        if chat_finish is not None:
+            self._chat_finish[chat_key] = max(waiter.chat_tag, chat_finish - waiter.cost)
+
+        self._forget_idle_users()
+
+    def _dispatch(self) -> None:
+        while self._waiters and self.running < self.max_running:
+            eligible = [
+                waiter
+                for waiter in self._waiters
+                if not waiter.future.done()
+                and self._running.get(waiter.user_id, 0) < self.user_quota
+            ]
+            if not eligible:
+                return
+
+            leader = min(eligible)
+            # the user's turn goes to the chat furthest behind within the user's share
+            waiter = min(
+                (candidate for candidate in eligible if candidate.user_id == leader.user_id),
+                key=lambda candidate: (candidate.chat_tag, candidate.arrival),
+            )
+            if waiter is not leader:
+                waiter.start_tag, leader.start_tag = leader.start_tag, waiter.start_tag
+
+            self._waiters.remove(waiter)
+            self._running[waiter.user_id] = self._running.get(waiter.user_id, 0) + 1
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            self._user_chat_time[waiter.user_id] = max(
+                self._user_chat_time.get(waiter.user_id, 0.0), waiter.chat_tag
+            )
+            waiter.future.set_result(None)
+
+    def _forget_idle_users(self) -> None:
+        # a stamp in the past is replaced by the virtual time anyway
+        busy = set(self._running) | {waiter.user_id for waiter in self._waiters}
+        for user_id, finish in list(self._user_finish.items()):
+            if user_id not in busy and finish <= self._virtual_time:
+                del self._user_finish[user_id]
+
+        # the order of a user's chats only matters while the user has requests
+        for user_id, chat_id in list(self._chat_finish):
+            if user_id not in busy:
+                del self._chat_finish[(user_id, chat_id)]
+        for user_id in list(self._user_chat_time):
+            if user_id not in busy:
+                del self._user_chat_time[user_id]
@@ -1,5 +1,6 @@
 import logging
 
+from ml.configs import MAX_PLANNING_ROUNDS
 from ml.domain.models import GraphState, ModelMode
 from ml.domain.workflow.agent.tools.final_answer.tool import FinalAnswerTool
 
@@ -33,3 +34,10 @@ def research_decision(state: GraphState) -> str:
         return "finalize"
 
     return "tool_call"
+
+
+def thinking_plan_decision(state: GraphState) -> str:
+    if state.needs_replan and state.planning_rounds < MAX_PLANNING_ROUNDS:
+        return "replan"
+
+    return "finalize"
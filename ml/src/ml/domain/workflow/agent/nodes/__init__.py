@@ -3,12 +3,15 @@ from .file_ingestion.node import ingest_file
 from .final_node.node import final_stream
 from .flash_memories.node import flash_memories
 from .mode_definition.node import define_mode
+from .preflight_classification.node import classify_preflight
 from .research_answer.node import research_answer
 from .research_observer.node import research_observer
 from .research_reason.node import research_reason
 from .research_tool_call.node import research_tool_call
 from .tag_validation.node import validate_tag
+from .thinking_executor.node import thinking_executor
 from .thinking_finalizer.node import thinking_finalize
+from .thinking_full_planner.node import thinking_full_planner
 from .thinking_planner.node import thinking_planner
 from .voice_validation.node import validate_voice
 
@@ -17,6 +20,7 @@ __all__ = [
     "validate_tag",
     "ingest_file",
     "define_mode",
+    "classify_preflight",
     "flash_memories",
     "fast_answer",
     "final_stream",
@@ -26,4 +30,6 @@ __all__ = [
     "research_observer",
     "thinking_planner",
     "thinking_finalize",
+    "thinking_full_planner",
+    "thinking_executor",
 ]
@@ -1,7 +1,12 @@
 import logging
 
 from ml.domain.models import GraphState
-from ml.utils import get_system_prompt
+from ml.utils import (
+    PromptLayout,
+    format_evidence_section,
+    get_static_system_prompt,
+    get_user_system_prompt,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -9,10 +14,12 @@ logger = logging.getLogger(__name__)
 def fast_answer(state: GraphState) -> GraphState:
     logger.info("Entering fast_answer node")
 
-    system_prompt: str = get_system_prompt(state.user, evidence=state.evidence_list)
+    layout = PromptLayout(
+        static=get_static_system_prompt(),
+        user=get_user_system_prompt(state.user),
+        request=[format_evidence_section(state.evidence_list)],
+    )
 
-    state.chat.add_or_change_system(system_prompt)
-
-    state.final_prompt = state.chat
+    state.final_prompt = layout.build(state.chat)
 
     return state
@@ -1,4 +1,5 @@
 import logging
+from typing import Any
 
 from ml.api.external import send_graph_log
 from ml.domain.models import Evidence, GraphState, ToolResult
@@ -8,20 +9,21 @@ from ml.domain.workflow.agent.tools.file_reader.tool import FileReaderTool
 logger = logging.getLogger(__name__)
 
 
-async def ingest_file(state: GraphState) -> GraphState:
+async def ingest_file(state: GraphState) -> dict[str, Any]:
     logger.info("Entering ingest_file node")
 
+    # runs in parallel pre-flight stage, so only the owned keys are returned as an update
     file_url = state.file_url
     if file_url is None:
         logger.info("No file URL provided; skipping file ingestion")
-        return state
+        return {}
 
     if not isinstance(file_url, str):
         raise TypeError("GraphState.file_url must be a string when provided")
 
     if file_url == "":
         logger.info("Empty file URL provided; skipping file ingestion")
-        return state
+        return {}
 
     tool = FileReaderTool()
     answer_id = state.chat.last_user_message_id()
@@ -39,8 +41,9 @@ async def ingest_file(state: GraphState) -> GraphState:
         result = ToolResult(success=False, data=failure_message, error=str(exc))
 
     observation = Evidence(tool_name=tool.name, summary=str(result.data), source=result)
-    state.evidence_list.append(observation)
-    state.last_tool_result = result
-    state.last_executed_tool = tool.name
 
-    return state
+    return {
+        "evidence_list": [*state.evidence_list, observation],
+        "last_tool_result": result,
+        "last_executed_tool": tool.name,
+    }
@@ -1,9 +1,13 @@
 import logging
 from collections.abc import AsyncIterator
 
+from langgraph.config import get_stream_writer
+
 from ml.api.external import send_graph_log
 from ml.api.external.ollama_client import ReasoningModelClient
-from ml.domain.models import ChatHistory, GraphState, PicsTags
+from ml.configs import ModelTier
+from ml.domain.models import ChatHistory, GraphState, PicsTags, WorkflowEvent, WorkflowEventType
+from ml.utils import StreamRateMeter
 
 logger = logging.getLogger(__name__)
 
@@ -11,7 +15,7 @@ logger = logging.getLogger(__name__)
 async def final_stream(state: GraphState) -> GraphState:
     logger.info("Entering final_stream node")
 
-    client = ReasoningModelClient.instance()
+    client = ReasoningModelClient.instance(ModelTier.ANSWER)
 
     answer_id = state.chat.last_user_message_id()
 
@@ -28,12 +32,18 @@ async def final_stream(state: GraphState) -> GraphState:
         raise TypeError("Final prompt must be an instance of ChatHistory")
 
     logger.debug("final_prompt: %s", prompt.model_dump_json(indent=2))
+    rate_meter = StreamRateMeter()
     result = client.stream(messages=prompt)
     if not isinstance(result, AsyncIterator):
         msg = "Reasoning client stream did not return an AsyncIterator"
         logger.error(msg)
         raise TypeError(msg)
 
-    state.output_stream = result
+    # answer tokens leave the graph through the custom stream channel
+    writer = get_stream_writer()
+    async for chunk in result:
+        rate_meter.chunk()
+        writer(WorkflowEvent(type=WorkflowEventType.Answer, chunk=chunk))
+    rate_meter.finish()
 
     return state
@@ -1,6 +1,8 @@
 import logging
+from typing import Any
 
 from ml.api.external.ollama_client import ReasoningModelClient
+from ml.configs import ModelTier
 from ml.domain.models import ChatHistory, GraphState, ModelMode
 
 from .prompt import get_mode_definition_prompt
@@ -10,16 +12,19 @@ from .schema import ModeDecisionResponse
 logger = logging.getLogger(__name__)
 
 
-async def define_mode(state: GraphState) -> GraphState:
+async def define_mode(state: GraphState) -> dict[str, Any]:
     logger.info("Entering define_mode node")
 
+    # runs in parallel pre-flight stage, so only the owned key is returned as an update
     if state.model_mode == ModelMode.Auto:
         prompt: ChatHistory = await get_mode_definition_prompt(state.chat.last_message())
 
-        client = ReasoningModelClient.instance()
+        client = ReasoningModelClient.instance(ModelTier.CLASSIFIER)
 
-        response = await client.call_structured(messages=prompt, output_schema=ModeDecisionResponse)
+        response = await client.call_structured(
+            messages=prompt, output_schema=ModeDecisionResponse, cached=True
+        )
 
-        state.model_mode = ModelMode(response.mode.value)
+        return {"model_mode": ModelMode(response.mode.value)}
 
-    return state
+    return {}
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from ml.api.external import send_graph_log
+from ml.api.external.ollama_client import ReasoningModelClient
+from ml.configs import ModelTier
+from ml.domain.models import GraphState, ModelMode, PicsTags, Tag
+from ml.domain.workflow.agent.nodes.mode_definition.node import define_mode
+from ml.domain.workflow.agent.nodes.tag_validation.node import validate_tag
+from ml.domain.workflow.agent.nodes.voice_validation.node import validate_voice
+
+from .prompt import get_preflight_classification_prompt
+from .schema import PreflightClassification
+
+logger = logging.getLogger(__name__)
+
+PreflightNode = Callable[[GraphState], Awaitable[dict[str, Any]]]
+
+
+async def classify_preflight(state: GraphState) -> dict[str, Any]:
+    """
+    Makes voice, tag and mode decisions with a single structured call.
+
+    A single pending decision is delegated to its own node, there is nothing to fuse.
+    If the fused answer fails validation, the individual nodes run concurrently instead
+    """
+    logger.info("Entering classify_preflight node")
+
+    needs_voice = state.meta.is_voice
+    needs_tag = state.meta.tag == Tag.Empty
+    needs_mode = state.model_mode == ModelMode.Auto
+
+    pending_nodes: list[PreflightNode] = []
+    if needs_voice:
+        pending_nodes.append(validate_voice)
+    if needs_tag:
+        pending_nodes.append(validate_tag)
+    if needs_mode:
+        pending_nodes.append(define_mode)
+
+    if len(pending_nodes) < 2:
+        return await _run_individually(state, pending_nodes)
+
+    prompt = get_preflight_classification_prompt(state.chat.last_message())
+    client = ReasoningModelClient.instance(ModelTier.CLASSIFIER)
+
+    try:
+        response: PreflightClassification = await client.call_structured(
+            messages=prompt, output_schema=PreflightClassification, cached=True
+        )
+    except ValueError:
+        logger.warning("Fused pre-flight classification failed validation, using individual nodes")
+        return await _run_individually(state, pending_nodes)
+
+    if needs_tag and response.tag == Tag.Empty:
+        logger.warning("Fused pre-flight classification returned empty tag, using individual nodes")
+        return await _run_individually(state, pending_nodes)
+
+    # the individual nodes log the same steps, so they are only logged once the fused call held
+    answer_id = state.chat.last_user_message_id()
+
+    if needs_voice:
+        await send_graph_log(
+            chat_id=state.chat_id,
+            tag=PicsTags.Mic,
+            message="Распознаю голосовой запрос",
+            answer_id=answer_id,
+        )
+    if needs_tag:
+        await send_graph_log(
+            chat_id=state.chat_id, tag=PicsTags.Think, message="Определяю Tag", answer_id=answer_id
+        )
+
+    updates: dict[str, Any] = {}
+    if needs_voice:
+        updates["voice_is_valid"] = response.voice_is_valid
+    if needs_tag:
+        updates["meta"] = state.meta.model_copy(update={"tag": response.tag})
+    if needs_mode:
+        updates["model_mode"] = ModelMode(response.mode.value)
+
+    logger.info("Pre-flight classification: %s", response.model_dump_json())
+    return updates
+
+
+async def _run_individually(state: GraphState, nodes: list[PreflightNode]) -> dict[str, Any]:
+    updates: dict[str, Any] = {}
+    for node_updates in await asyncio.gather(*(node(state) for node in nodes)):
+        updates.update(node_updates)
+    return updates
@@ -0,0 +1,33 @@
+from ml.domain.models import ChatHistory, Message, Tag
+
+
+def get_preflight_classification_prompt(message: Message) -> ChatHistory:
+    tags_str: str = ", ".join(tag.value for tag in Tag if tag is not Tag.Empty)
+    system_prompt: str = (
+        "Ты классифицируешь запрос пользователя перед ответом ассистента.\n"
+        "Отвечай ТОЛЬКО одним JSON-объектом с полями voice_is_valid, tag, mode, "
+        'например {"voice_is_valid":true,"tag":"general","mode":"thinking"}.\n'
+        "\n"
+        "voice_is_valid: запрос может быть расшифровкой голосового сообщения. "
+        "Ставь false, только если адекватно обработать текст НЕВОЗМОЖНО. "
+        "Если слова распознаны, но вместе имеют мало смысла, ставь true.\n"
+        "\n"
+        f"tag: ровно один из: {tags_str}.\n"
+        f"`{Tag.Finance.value}`: финансовые советы или исследование в области финансов.\n"
+        f"`{Tag.Law.value}`: юридические советы, в том числе юридические аспекты финансов.\n"
+        f"`{Tag.Marketing.value}`: маркетинг, продвижение или реклама.\n"
+        f"`{Tag.Management.value}`: назначить встречу или отправить сообщение по почте.\n"
+        f"`{Tag.General.value}`: всё остальное, включая работу с файлами.\n"
+        "\n"
+        "mode: стратегия ответа, fast или thinking. "
+        "Thinking — основной режим для рассуждений, планов и рекомендаций, выбирай его "
+        "по умолчанию. Fast — только когда ответ уже есть в истории и нужно лишь уточнение, "
+        "либо запрос очень простой и не требует поиска информации в интернете.\n"
+        "Не добавляй пояснений."
+    )
+
+    prompt = ChatHistory()
+    prompt.add_or_change_system(system_prompt)
+    prompt.add_user(message)
+
+    return prompt
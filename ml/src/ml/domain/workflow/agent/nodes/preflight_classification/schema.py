@@ -0,0 +1,10 @@
+from pydantic import BaseModel
+
+from ml.domain.models import Tag
+from ml.domain.workflow.agent.nodes.mode_definition.schema import ModeDecisionChoice
+
+
+class PreflightClassification(BaseModel):
+    voice_is_valid: bool
+    tag: Tag
+    mode: ModeDecisionChoice
@@ -8,18 +8,28 @@ logger = logging.getLogger(__name__)
 def research_observer(state: GraphState) -> GraphState:
     logger.info("Entering research_observer node")
 
-    tool_call = state.pending_tool_call
-    if tool_call is None:
+    tool_calls = list(state.pending_tool_calls)
+    if not tool_calls and state.pending_tool_call is not None:
+        tool_calls = [state.pending_tool_call]
+    if not tool_calls:
         raise RuntimeError("No tool call available to observe")
 
-    result = state.last_tool_result
-    if result is None:
-        raise RuntimeError("Missing tool result for observation step")
+    if len(tool_calls) == 1 and tool_calls[0].result is None:
+        tool_calls[0].result = state.last_tool_result
 
-    observation = Evidence(tool_name=tool_call.tool_name, summary=str(result.data), source=result)
-    state.evidence_list.append(observation)
+    # evidence keeps the planned order, not the completion order
+    for tool_call in tool_calls:
+        result = tool_call.result
+        if result is None:
+            raise RuntimeError("Missing tool result for observation step")
+
+        observation = Evidence(
+            tool_name=tool_call.tool_name, summary=str(result.data), source=result
+        )
+        state.evidence_list.append(observation)
 
     state.pending_tool_call = None
+    state.pending_tool_calls = []
     state.last_tool_result = None
 
     return state
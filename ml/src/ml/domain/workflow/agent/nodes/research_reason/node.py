@@ -1,14 +1,19 @@
 import logging
+from contextlib import aclosing
 
 from ml.api.external import send_graph_log
+from ml.api.external.llm_scheduler import CallPriority
 from ml.api.external.ollama_client import ReasoningModelClient
-from ml.domain.models import GraphState, PlannedToolCall, ToolCall
+from ml.configs import ModelTier
+from ml.domain.models import ChatHistory, GraphState, PlannedToolCall, ToolCall
 from ml.domain.models.graph_log import PicsTags
 from ml.domain.workflow.agent.tools import BaseTool
+from ml.domain.workflow.agent.tools.final_answer.tool import FinalAnswerTool
 from ml.domain.workflow.agent.tools.tool_registry import get_tool_registry
+from ml.utils import PartialJSONObject, SentenceStream, budget_is_low
 
 from .prompt import get_research_reason_prompt
-from .schema import ResearchPlan
+from .schema import ResearchPlan, ResearchToolCall
 
 
 logger = logging.getLogger(__name__)
@@ -23,29 +28,122 @@ async def research_reason(state: GraphState) -> GraphState:
         chat_id=state.chat_id, tag=PicsTags.Think, message="Думаю", answer_id=answer_id
     )
 
-    client = ReasoningModelClient.instance()
-    available_tools: dict[str, BaseTool] = get_tool_registry()
+    result: ResearchPlan
+    if budget_is_low(state.deadline, state.deadline_reserve):
+        logger.info("Request budget is running out, answering with the evidence collected so far")
+        result = ResearchPlan(
+            thought="Время на ответ заканчивается, отвечаю по собранным данным.",
+            tool_calls=[ResearchToolCall(chosen_tool=FinalAnswerTool().name)],
+        )
+    else:
+        available_tools: dict[str, BaseTool] = get_tool_registry()
 
-    prompt = get_research_reason_prompt(
-        chat=state.chat,
-        profile=state.user,
-        available_tools=available_tools,
-        evidence_list=state.evidence_list,
-    )
+        prompt = get_research_reason_prompt(
+            chat=state.chat,
+            profile=state.user,
+            available_tools=available_tools,
+            evidence_list=state.evidence_list,
+            max_parallel_tool_calls=state.max_parallel_tool_calls,
+        )
+
+        result = await _stream_plan(
+            prompt,
+            chat_id=state.chat_id,
+            answer_id=answer_id,
+            max_parallel_tool_calls=state.max_parallel_tool_calls,
+        )
+
+    planned_calls = _limit_fan_out(result.tool_calls, state.max_parallel_tool_calls)
 
-    result: ResearchPlan = await client.call_structured(messages=prompt, output_schema=ResearchPlan)
+    tool_calls: list[ToolCall] = []
+    for planned_call in planned_calls:
+        tool_arguments = dict(planned_call.tool_args)
+        if planned_call.chosen_tool == "web_search":
+            tool_arguments.update({"chat_id": state.chat_id, "answer_id": answer_id})
 
-    tool_arguments = dict(result.tool_args)
-    if result.chosen_tool == "web_search":
-        tool_arguments.update({"chat_id": state.chat_id, "answer_id": answer_id})
+        tool_calls.append(ToolCall(name=planned_call.chosen_tool, arguments=tool_arguments))
 
+    first_call = tool_calls[0]
     state.planned_tool_call = PlannedToolCall(
         thought=result.thought,
-        chosen_tool=result.chosen_tool,
-        tool_args=tool_arguments,
+        chosen_tool=first_call.name,
+        tool_args=first_call.arguments,
     )
-    state.pending_tool_call = ToolCall(name=result.chosen_tool, arguments=tool_arguments)
-    state.tool_call_history.append(state.pending_tool_call)
+    state.pending_tool_call = first_call
+    state.pending_tool_calls = tool_calls
+    state.tool_call_history.extend(tool_calls)
     state.last_executed_tool = None
 
     return state
+
+
+async def _stream_plan(
+    prompt: ChatHistory, *, chat_id: int, answer_id: int, max_parallel_tool_calls: int
+) -> ResearchPlan:
+    """
+    Streams the plan, logging the thought sentence by sentence
+
+    Tool calls are read one by one; once enough of them are complete to fill
+    the step, the rest of the generation would be cut by _limit_fan_out
+    anyway and is dropped with the stream.
+    """
+    client = ReasoningModelClient.instance(ModelTier.PLANNER)
+    final_answer_name = FinalAnswerTool().name
+    thought = SentenceStream()
+    answer: PartialJSONObject | None = None
+
+    async with aclosing(
+        client.stream_structured(
+            messages=prompt, output_schema=ResearchPlan, priority=CallPriority.PLANNER
+        )
+    ) as answers:
+        async for answer in answers:
+            if sentences := thought.push(answer.text.get("thought", "")):
+                await send_graph_log(
+                    chat_id=chat_id, tag=PicsTags.Think, message=sentences, answer_id=answer_id
+                )
+
+            research_calls = [
+                call
+                for call in answer.items.get("tool_calls", [])
+                if isinstance(call, dict) and call.get("chosen_tool") != final_answer_name
+            ]
+            if answer.has("tool_calls") or len(research_calls) >= max_parallel_tool_calls:
+                break
+
+    if answer is None:
+        raise ValueError("Research planner stream ended without an answer")
+
+    if rest := thought.rest(answer.text.get("thought", "")):
+        await send_graph_log(chat_id=chat_id, tag=PicsTags.Think, message=rest, answer_id=answer_id)
+
+    return ResearchPlan.model_validate(
+        {
+            "thought": answer.text.get("thought", ""),
+            "tool_calls": answer.items.get("tool_calls", []),
+            **answer.fields,
+        }
+    )
+
+
+def _limit_fan_out(
+    planned_calls: list[ResearchToolCall], max_parallel_tool_calls: int
+) -> list[ResearchToolCall]:
+    final_answer_name = FinalAnswerTool().name
+
+    # final answer ends the loop, so it only runs once nothing else is left to collect
+    research_calls = [call for call in planned_calls if call.chosen_tool != final_answer_name]
+    if not research_calls:
+        return planned_calls[:1]
+
+    if len(research_calls) < len(planned_calls):
+        logger.info("Postponing final_answer until the batched tool calls are observed")
+
+    if len(research_calls) > max_parallel_tool_calls:
+        logger.warning(
+            "Research step planned %s tool calls, running the first %s",
+            len(research_calls),
+            max_parallel_tool_calls,
+        )
+
+    return research_calls[:max_parallel_tool_calls]
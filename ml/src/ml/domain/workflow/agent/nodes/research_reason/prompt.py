@@ -1,7 +1,12 @@
 from ml.domain.models import ChatHistory, UserProfile
 from ml.domain.models.tools_data import Evidence
 from ml.domain.workflow.agent.tools import BaseTool
-from ml.utils import format_research_observations, get_system_prompt
+from ml.utils import (
+    PromptLayout,
+    format_research_observations,
+    get_static_system_prompt,
+    get_user_system_prompt,
+)
 
 
 def _format_available_tools(available_tools: dict[str, BaseTool]) -> str:
@@ -20,9 +25,8 @@ def get_research_reason_prompt(
     profile: UserProfile,
     available_tools: dict[str, BaseTool],
     evidence_list: list[Evidence],
+    max_parallel_tool_calls: int = 1,
 ) -> ChatHistory:
-    system_sections: list[str] = [get_system_prompt(profile)]
-
     available_tools_text = _format_available_tools(available_tools)
 
     evidence_block = (
@@ -32,22 +36,25 @@ def get_research_reason_prompt(
     reasoning_instructions = (
         "Ты управляешь исследовательским циклом с инструментами.\n"
         "Используй доступные инструменты, чтобы получить факты и затем сформировать финальный ответ.\n"
-        "Выбери один инструмент, который нужно вызвать следующим.\n"
-        "Всегда возвращай JSON со следующими полями: thought, chosen_tool, tool_args.\n"
-        "Если готов отвечать пользователю, выбирай инструмент final_answer.\n"
+        "Выбери инструменты, которые нужно вызвать следующими.\n"
+        f"За один шаг можно вызвать до {max_parallel_tool_calls} независимых инструментов"
+        " — они выполняются одновременно, поэтому аргументы одного вызова"
+        " не могут зависеть от результата другого.\n"
+        "Всегда возвращай JSON со следующими полями: thought, tool_calls.\n"
+        "Каждый элемент tool_calls содержит поля chosen_tool и tool_args.\n"
+        "Если готов отвечать пользователю, выбирай единственный инструмент final_answer.\n"
         f"Доступные инструменты:\n{available_tools_text}\n"
-        f"Текущие наблюдения:\n{evidence_block}\n"
         "Если пользователь просит подготовить файл, обязательно выбери инструмент создания файла"
         " прежде чем переходить к final_answer.\n"
         "Не считай примеры из истории диалога готовыми файлами — пропускай создание файла"
         " только если файл действительно уже записан в текущем диалоге"
     )
 
-    system_sections.append(reasoning_instructions)
-
-    system_message = "\n\n".join(system_sections)
-
-    prompt = ChatHistory(messages=list(chat.messages))
-    prompt.add_or_change_system(system_message)
+    layout = PromptLayout(
+        static=get_static_system_prompt(),
+        user=get_user_system_prompt(profile),
+        task=reasoning_instructions,
+        request=[f"Текущие наблюдения:\n{evidence_block}"],
+    )
 
-    return prompt
+    return layout.build(chat)
@@ -5,7 +5,13 @@ from typing import Any
 from pydantic import BaseModel, Field
 
 
-class ResearchPlan(BaseModel):
-    thought: str = Field(description="Brief reasoning before choosing tool")
-    chosen_tool: str = Field(description="Name of the tool to call next")
+class ResearchToolCall(BaseModel):
+    chosen_tool: str = Field(description="Name of the tool to call")
     tool_args: dict[str, Any] = Field(default_factory=dict, description="Arguments for the tool")
+
+
+class ResearchPlan(BaseModel):
+    thought: str = Field(description="Brief reasoning before choosing tools")
+    tool_calls: list[ResearchToolCall] = Field(
+        min_length=1, description="Independent tool calls to run concurrently in this step"
+    )
@@ -1,8 +1,10 @@
+import asyncio
 import logging
 
 from ml.api.external import send_graph_log
-from ml.domain.models import GraphState, ToolResult
+from ml.domain.models import GraphState, ToolCall, ToolResult
 from ml.domain.models.graph_log import PicsTags
+from ml.domain.workflow.agent.tools import BaseTool
 from ml.domain.workflow.agent.tools.final_answer.tool import FinalAnswerTool
 from ml.domain.workflow.agent.tools.tool_registry import get_tool
 
@@ -18,14 +20,66 @@ TOOL_RU_NAMES: dict[str, str] = {
 async def research_tool_call(state: GraphState) -> GraphState:
     logger.info("Entering research_tool_call node")
 
-    planned_call = state.pending_tool_call
-    if planned_call is None:
+    planned_calls = list(state.pending_tool_calls)
+    if not planned_calls and state.pending_tool_call is not None:
+        planned_calls = [state.pending_tool_call]
+    if not planned_calls:
         raise RuntimeError("No planned tool call found")
 
-    tool = get_tool(planned_call.tool_name)
-    if tool is None:
-        raise RuntimeError(f"Tool '{planned_call.tool_name}' is not registered")
+    tools: list[BaseTool] = []
+    for planned_call in planned_calls:
+        tool = get_tool(planned_call.tool_name)
+        if tool is None:
+            raise RuntimeError(f"Tool '{planned_call.tool_name}' is not registered")
+        tools.append(tool)
+
+    # calls of one step are independent, so they run concurrently and keep the planned order
+    results: list[ToolResult] = await asyncio.gather(
+        *(
+            _execute_tool_call(state, planned_call, tool)
+            for planned_call, tool in zip(planned_calls, tools)
+        )
+    )
+
+    final_answer_name = FinalAnswerTool().name
+
+    for planned_call, tool, result in zip(planned_calls, tools, results):
+        planned_call.result = result
+
+        if tool.name == "file_writer" and result.success:
+            data = result.data
+            if not isinstance(data, dict):
+                raise TypeError("file_writer tool must return a dictionary in result data")
+            if "file_url" not in data:
+                raise ValueError("file_writer tool result missing 'file_url'")
+
+            file_url = data["file_url"]
+            if not isinstance(file_url, str):
+                raise TypeError("file_writer tool result 'file_url' must be a string")
+
+            state.written_file_url = file_url
+
+        if tool.name == final_answer_name:
+            if not isinstance(result.data, dict):
+                raise ValueError("Final answer tool result must contain final prompt data")
+            if "final_prompt" not in result.data:
+                raise ValueError("Final answer tool result missing final prompt")
+            final_prompt = result.data["final_prompt"]
+            if not isinstance(final_prompt, type(state.chat)):
+                raise ValueError("Final prompt missing or invalid in final answer tool result")
+            state.final_prompt = final_prompt
+            state.pending_tool_call = None
+            state.pending_tool_calls = []
+
+    state.last_tool_result = results[-1]
+    state.last_executed_tool = tools[-1].name
+
+    return state
+
 
+async def _execute_tool_call(
+    state: GraphState, planned_call: ToolCall, tool: BaseTool
+) -> ToolResult:
     answer_id = state.chat.last_user_message_id()
     execution_arguments = dict(planned_call.arguments)
     final_answer_name = FinalAnswerTool().name
@@ -38,6 +92,11 @@ async def research_tool_call(state: GraphState) -> GraphState:
             }
         )
     else:
+        if tool.name == "web_search":
+            # the search stops opening pages once the request budget runs low
+            execution_arguments["deadline"] = state.deadline
+            execution_arguments["deadline_reserve"] = state.deadline_reserve
+
         russian_tool_name = TOOL_RU_NAMES.get(tool.name)
         if russian_tool_name is None:
             raise KeyError(f"Русское название для инструмента '{tool.name}' не определено")
@@ -54,32 +113,5 @@ async def research_tool_call(state: GraphState) -> GraphState:
     except Exception as exc:
         logger.exception("Tool execution failed for %s", planned_call.tool_name)
         result = ToolResult(success=False, data={}, error=str(exc))
-    planned_call.result = result
-    state.last_tool_result = result
-    state.last_executed_tool = tool.name
-
-    if tool.name == "file_writer" and result.success:
-        data = result.data
-        if not isinstance(data, dict):
-            raise TypeError("file_writer tool must return a dictionary in result data")
-        if "file_url" not in data:
-            raise ValueError("file_writer tool result missing 'file_url'")
-
-        file_url = data["file_url"]
-        if not isinstance(file_url, str):
-            raise TypeError("file_writer tool result 'file_url' must be a string")
-
-        state.written_file_url = file_url
 
-    if tool.name == final_answer_name:
-        if not isinstance(result.data, dict):
-            raise ValueError("Final answer tool result must contain final prompt data")
-        if "final_prompt" not in result.data:
-            raise ValueError("Final answer tool result missing final prompt")
-        final_prompt = result.data["final_prompt"]
-        if not isinstance(final_prompt, type(state.chat)):
-            raise ValueError("Final prompt missing or invalid in final answer tool result")
-        state.final_prompt = final_prompt
-        state.pending_tool_call = None
-
-    return state
+    return result
@@ -1,7 +1,9 @@
 import logging
+from typing import Any
 
 from ml.api.external import send_graph_log
 from ml.api.external.ollama_client import ReasoningModelClient
+from ml.configs import ModelTier
 from ml.domain.models import ChatHistory, GraphState, PicsTags, Tag
 
 from .prompt import get_tag_validation_prompt
@@ -10,9 +12,10 @@ from .schema import DefinedTag
 logger = logging.getLogger(__name__)
 
 
-async def validate_tag(state: GraphState) -> GraphState:
+async def validate_tag(state: GraphState) -> dict[str, Any]:
     logger.info("Entering validate_tag node")
 
+    # runs in parallel pre-flight stage, so only the owned key is returned as an update
     if state.meta.tag == Tag.Empty:
         logger.info("Tag is considered as Empty, defining Tag")
 
@@ -24,11 +27,14 @@ async def validate_tag(state: GraphState) -> GraphState:
 
         prompt: ChatHistory = get_tag_validation_prompt(state.chat.last_message())
 
-        client = ReasoningModelClient.instance()
+        client = ReasoningModelClient.instance(ModelTier.CLASSIFIER)
 
-        result = await client.call_structured(messages=prompt, output_schema=DefinedTag)
+        result = await client.call_structured(
+            messages=prompt, output_schema=DefinedTag, cached=True
+        )
 
-        state.meta.tag = result.tag
+        logger.info("Tag: %s", result.tag)
+        return {"meta": state.meta.model_copy(update={"tag": result.tag})}
 
     logger.info("Tag: %s", state.meta.tag)
-    return state
+    return {}
@@ -0,0 +1,80 @@
+import logging
+
+from ml.domain.models import GraphState, PlanStep, ToolCall
+from ml.domain.workflow.agent.nodes.research_observer.node import research_observer
+from ml.domain.workflow.agent.nodes.research_tool_call.node import research_tool_call
+from ml.utils import budget_is_low
+
+logger = logging.getLogger(__name__)
+
+
+async def thinking_executor(state: GraphState) -> GraphState:
+    logger.info("Entering thinking_executor node")
+
+    answer_id = state.chat.last_user_message_id()
+
+    remaining: list[PlanStep] = list(state.execution_plan)
+    completed_ids: set[int] = set()
+    failed_ids: set[int] = set()
+
+    while remaining:
+        if budget_is_low(state.deadline, state.deadline_reserve):
+            logger.info(
+                "Request budget is running out, skipping plan steps %s",
+                [step.id for step in remaining],
+            )
+            # the answer is written from the evidence collected so far
+            state.execution_plan = []
+            state.needs_replan = False
+            return state
+
+        # a step is ready once everything it depends on is done
+        ready = [
+            step for step in remaining if all(dep in completed_ids for dep in step.depends_on)
+        ]
+
+        if not ready:
+            skipped = [step.id for step in remaining]
+            logger.warning("Skipping plan steps %s: their dependencies did not succeed", skipped)
+            state.needs_replan = True
+            break
+
+        wave = ready[: state.max_parallel_tool_calls]
+        wave_ids = {step.id for step in wave}
+        remaining = [step for step in remaining if step.id not in wave_ids]
+
+        tool_calls = [_build_tool_call(step, state.chat_id, answer_id) for step in wave]
+        state.pending_tool_calls = tool_calls
+        state.tool_call_history.extend(tool_calls)
+
+        state = await research_tool_call(state)
+        state = research_observer(state)
+
+        for step, tool_call in zip(wave, tool_calls):
+            if tool_call.result is not None and tool_call.result.has_evidence():
+                completed_ids.add(step.id)
+            else:
+                failed_ids.add(step.id)
+
+    if failed_ids:
+        logger.info("Plan steps %s returned no evidence, asking for a new plan", sorted(failed_ids))
+        state.needs_replan = True
+
+    state.execution_plan = []
+
+    return state
+
+
+def _build_tool_call(step: PlanStep, chat_id: int, answer_id: int) -> ToolCall:
+    tool_arguments = dict(step.tool_args)
+
+    if step.tool == "web_search":
+        if "query" not in tool_arguments:
+            raise KeyError("web_search tool requires 'query' argument")
+        tool_arguments = {
+            "query": tool_arguments["query"],
+            "chat_id": chat_id,
+            "answer_id": answer_id,
+        }
+
+    return ToolCall(name=step.tool, arguments=tool_arguments)
@@ -0,0 +1,105 @@
+import logging
+
+from ml.api.external import send_graph_log
+from ml.api.external.llm_scheduler import CallPriority
+from ml.api.external.ollama_client import ReasoningModelClient
+from ml.configs import MAX_PLANNING_ROUNDS, ModelTier
+from ml.domain.models import GraphState, PlanStep, ToolCall
+from ml.domain.models.graph_log import PicsTags
+from ml.domain.workflow.agent.tools import BaseTool
+from ml.domain.workflow.agent.tools.final_answer.tool import FinalAnswerTool
+from ml.domain.workflow.agent.tools.tool_registry import get_tool_registry
+from ml.utils import budget_is_low
+
+from .prompt import get_thinking_full_plan_prompt
+from .schema import ThinkingFullPlan, ThinkingPlanStep
+
+logger = logging.getLogger(__name__)
+
+_MAX_PLAN_STEPS = 5
+
+
+async def thinking_full_planner(state: GraphState) -> GraphState:
+    logger.info("Entering thinking_full_planner node")
+
+    answer_id = state.chat.last_user_message_id()
+
+    await send_graph_log(
+        chat_id=state.chat_id, tag=PicsTags.Think, message="Составляю план", answer_id=answer_id
+    )
+
+    available_tools: dict[str, BaseTool] = get_tool_registry()
+    if not available_tools:
+        raise RuntimeError("No tools are registered for thinking planner")
+
+    failed_calls: list[ToolCall] = [
+        call
+        for call in state.tool_call_history
+        if call.result is not None and not call.result.has_evidence()
+    ]
+
+    state.planning_rounds += 1
+
+    if budget_is_low(state.deadline, state.deadline_reserve):
+        logger.info("Request budget is running out, answering with the evidence collected so far")
+        state.execution_plan = []
+        state.needs_replan = False
+        return state
+
+    prompt = get_thinking_full_plan_prompt(
+        chat=state.chat,
+        profile=state.user,
+        available_tools=available_tools,
+        evidence_list=state.evidence_list,
+        failed_calls=failed_calls,
+        remaining_rounds=max(0, MAX_PLANNING_ROUNDS - state.planning_rounds),
+    )
+
+    client = ReasoningModelClient.instance(ModelTier.PLANNER)
+    plan: ThinkingFullPlan = await client.call_structured(
+        messages=prompt, output_schema=ThinkingFullPlan, priority=CallPriority.PLANNER
+    )
+
+    logger.info("Thinking plan: %s", plan.thought)
+
+    state.execution_plan = _validate_steps(plan.steps, available_tools)
+    state.needs_replan = plan.needs_results and bool(state.execution_plan)
+
+    return state
+
+
+def _validate_steps(
+    steps: list[ThinkingPlanStep], available_tools: dict[str, BaseTool]
+) -> list[PlanStep]:
+    final_answer_name = FinalAnswerTool().name
+
+    validated: list[PlanStep] = []
+    for step in steps:
+        if step.tool == final_answer_name:
+            # final answer is built by the finalizer once the plan is executed
+            continue
+        if step.tool not in available_tools:
+            logger.warning("Dropping plan step %s: tool '%s' is not registered", step.id, step.tool)
+            continue
+        if len(validated) == _MAX_PLAN_STEPS:
+            logger.warning("Plan exceeds %s steps, dropping the rest", _MAX_PLAN_STEPS)
+            break
+
+        validated.append(
+            PlanStep(
+                id=step.id,
+                tool=step.tool,
+                tool_args=dict(step.tool_args),
+                depends_on=list(step.depends_on),
+            )
+        )
+
+    known_ids = {step.id for step in validated}
+    for step in validated:
+        step.depends_on = [
+            dependency
+            for dependency in step.depends_on
+            if dependency in known_ids and dependency != step.id
+        ]
+
+    return validated
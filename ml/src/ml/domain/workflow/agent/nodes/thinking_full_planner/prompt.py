@@ -0,0 +1,85 @@
+from ml.domain.models import ChatHistory, ToolCall, UserProfile
+from ml.domain.models.tools_data import Evidence
+from ml.domain.workflow.agent.tools import BaseTool
+from ml.utils import (
+    PromptLayout,
+    format_research_observations,
+    get_static_system_prompt,
+    get_user_system_prompt,
+)
+
+
+def _format_available_tools(available_tools: dict[str, BaseTool]) -> str:
+    tool_lines: list[str] = []
+    for tool in available_tools.values():
+        tool_lines.append(
+            "- {name}: {description}. Schema: {schema}".format(
+                name=tool.name, description=tool.description, schema=tool.schema
+            )
+        )
+    return "\n".join(tool_lines)
+
+
+def _format_failed_calls(failed_calls: list[ToolCall]) -> str:
+    failure_lines: list[str] = []
+    for call in failed_calls:
+        error = call.result.error if call.result is not None else None
+        failure_lines.append(
+            "- {name} {args}: {error}".format(
+                name=call.name, args=call.arguments, error=error or "пустой результат"
+            )
+        )
+    return "\n".join(failure_lines)
+
+
+def get_thinking_full_plan_prompt(
+    chat: ChatHistory,
+    profile: UserProfile,
+    available_tools: dict[str, BaseTool],
+    evidence_list: list[Evidence],
+    failed_calls: list[ToolCall],
+    remaining_rounds: int,
+) -> ChatHistory:
+    evidence_block = (
+        "Наблюдений пока нет." if not evidence_list else format_research_observations(evidence_list)
+    )
+
+    planning_instructions = (
+        "Ты составляешь полный план действий одним ответом.\n"
+        "План — это список шагов, каждый шаг вызывает один инструмент.\n"
+        "Шаги без зависимостей выполняются одновременно; в depends_on укажи номера шагов,"
+        " которые должны завершиться раньше.\n"
+        "Аргументы шага задаются сейчас и не могут использовать результаты других шагов."
+        " Если следующему действию нужны результаты, не добавляй его, а выставь"
+        " needs_results = true — план будет дополнен после выполнения.\n"
+        "Не добавляй final_answer в шаги: итоговый ответ формируется после выполнения плана.\n"
+        "Если для ответа инструменты не нужны, верни пустой список steps.\n"
+        "Доступные инструменты:\n"
+        f"{_format_available_tools(available_tools)}\n"
+        "Всегда возвращай JSON с полями thought, steps, needs_results.\n"
+        "Каждый шаг содержит поля id, tool, tool_args, depends_on.\n"
+        "Если пользователь просит создать или заполнить файл, обязательно добавь шаг"
+        " создания файла.\n"
+        "Не считай примеры из истории диалога готовыми файлами — пропускай создание файла"
+        " только если файл реально уже записан в этом диалоге.\n"
+        "Учти текущие наблюдения — каждый пункт содержит источник (tool_name => результат)."
+    )
+
+    request_parts = [f"Текущие наблюдения:\n{evidence_block}"]
+
+    if failed_calls:
+        request_parts.append(
+            "Эти шаги прошлого плана не дали результата, измени их или обойдись без них:\n"
+            f"{_format_failed_calls(failed_calls)}"
+        )
+
+    request_parts.append(f"Осталось планирований до обязательного ответа: {remaining_rounds}.")
+
+    layout = PromptLayout(
+        static=get_static_system_prompt(),
+        user=get_user_system_prompt(profile),
+        task=planning_instructions,
+        request=request_parts,
+    )
+
+    return layout.build(chat)
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class ThinkingPlanStep(BaseModel):
+    id: int = Field(description="Номер шага, начиная с 1")
+    tool: str = Field(description="Имя инструмента для вызова")
+    tool_args: dict[str, Any] = Field(default_factory=dict, description="Аргументы инструмента")
+    depends_on: list[int] = Field(
+        default_factory=list, description="Номера шагов, которые должны завершиться раньше"
+    )
+
+
+class ThinkingFullPlan(BaseModel):
+    thought: str = Field(description="Краткое обоснование плана")
+    steps: list[ThinkingPlanStep] = Field(
+        default_factory=list, description="Шаги плана; пустой список, если можно отвечать сразу"
+    )
+    needs_results: bool = Field(
+        default=False,
+        description="Нужно ли ещё раз спланировать после получения результатов шагов",
+    )
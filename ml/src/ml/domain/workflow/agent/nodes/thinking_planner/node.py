@@ -1,13 +1,17 @@
 import logging
+from contextlib import aclosing
 from typing import Any
 
 from ml.api.external import send_graph_log
+from ml.api.external.llm_scheduler import CallPriority
 from ml.api.external.ollama_client import ReasoningModelClient
-from ml.domain.models import GraphState, PlannedToolCall, ToolCall
+from ml.configs import ModelTier
+from ml.domain.models import ChatHistory, GraphState, PlannedToolCall, ToolCall
 from ml.domain.models.graph_log import PicsTags
 from ml.domain.workflow.agent.tools import BaseTool
 from ml.domain.workflow.agent.tools.final_answer.tool import FinalAnswerTool
 from ml.domain.workflow.agent.tools.tool_registry import get_tool_registry
+from ml.utils import PartialJSONObject, SentenceStream, budget_is_low
 
 from .prompt import get_thinking_plan_prompt
 from .schema import ThinkingPlan
@@ -47,13 +51,16 @@ async def thinking_planner(state: GraphState) -> GraphState:
             "profile": state.user,
             "evidence": state.evidence_list,
         }
-    elif remaining_steps == 0:
+    elif remaining_steps == 0 or budget_is_low(state.deadline, state.deadline_reserve):
         final_tool_name = FinalAnswerTool().name
         final_tool = available_tools.get(final_tool_name)
         if final_tool is None:
             raise RuntimeError("Final answer tool is not registered")
         chosen_tool_name = final_tool.name
-        thought = "Достигнут лимит вызовов инструментов, формирую итоговый ответ."
+        if remaining_steps == 0:
+            thought = "Достигнут лимит вызовов инструментов, формирую итоговый ответ."
+        else:
+            thought = "Время на ответ заканчивается, формирую итоговый ответ."
         tool_arguments = {
             "chat": state.chat,
             "profile": state.user,
@@ -68,10 +75,7 @@ async def thinking_planner(state: GraphState) -> GraphState:
             remaining_steps=remaining_steps,
         )
 
-        client = ReasoningModelClient.instance()
-        plan: ThinkingPlan = await client.call_structured(
-            messages=prompt, output_schema=ThinkingPlan
-        )
+        plan = await _stream_plan(prompt, chat_id=state.chat_id, answer_id=answer_id)
 
         chosen_tool_name = plan.chosen_tool
         thought = plan.thought
@@ -104,3 +108,37 @@ async def thinking_planner(state: GraphState) -> GraphState:
     state.last_tool_result = None
 
     return state
+
+
+async def _stream_plan(prompt: ChatHistory, *, chat_id: int, answer_id: int) -> ThinkingPlan:
+    """
+    Streams the plan, logging the thought sentence by sentence
+
+    The tool is dispatched as soon as chosen_tool and tool_args are read,
+    whatever the model still had to generate is dropped with the stream.
+    """
+    client = ReasoningModelClient.instance(ModelTier.PLANNER)
+    thought = SentenceStream()
+    answer: PartialJSONObject | None = None
+
+    async with aclosing(
+        client.stream_structured(
+            messages=prompt, output_schema=ThinkingPlan, priority=CallPriority.PLANNER
+        )
+    ) as answers:
+        async for answer in answers:
+            if sentences := thought.push(answer.text.get("thought", "")):
+                await send_graph_log(
+                    chat_id=chat_id, tag=PicsTags.Think, message=sentences, answer_id=answer_id
+                )
+            if answer.has("chosen_tool", "tool_args"):
+                break
+
+    if answer is None:
+        raise ValueError("Planner stream ended without an answer")
+
+    if rest := thought.rest(answer.text.get("thought", "")):
+        await send_graph_log(chat_id=chat_id, tag=PicsTags.Think, message=rest, answer_id=answer_id)
+
+    # a thought the model had not finished before the tool is kept as it is
+    return ThinkingPlan.model_validate({"thought": answer.text.get("thought", ""), **answer.fields})
@@ -1,7 +1,12 @@
 from ml.domain.models import ChatHistory, UserProfile
 from ml.domain.models.tools_data import Evidence
 from ml.domain.workflow.agent.tools import BaseTool
-from ml.utils import format_research_observations, get_system_prompt
+from ml.utils import (
+    PromptLayout,
+    format_research_observations,
+    get_static_system_prompt,
+    get_user_system_prompt,
+)
 
 
 def _format_available_tools(available_tools: dict[str, BaseTool]) -> str:
@@ -22,8 +27,6 @@ def get_thinking_plan_prompt(
     evidence_list: list[Evidence],
     remaining_steps: int,
 ) -> ChatHistory:
-    system_prompt_parts: list[str] = [get_system_prompt(profile)]
-
     evidence_block = (
         "Наблюдений пока нет." if not evidence_list else format_research_observations(evidence_list)
     )
@@ -38,15 +41,17 @@ def get_thinking_plan_prompt(
         " создания файла до final_answer.\n"
         "Не считай примеры из истории диалога готовыми файлами — пропускай создание файла"
         " только если файл реально уже записан в этом диалоге.\n"
-        "Учти текущие наблюдения — каждый пункт содержит источник (tool_name => результат).\n"
-        f"Текущие наблюдения:\n{evidence_block}\n"
-        f"Осталось шагов до обязательного завершения: {remaining_steps}."
+        "Учти текущие наблюдения — каждый пункт содержит источник (tool_name => результат)."
     )
 
-    system_prompt_parts.append(planning_instructions)
-    system_message = "\n\n".join(system_prompt_parts)
-
-    prompt = ChatHistory(messages=list(chat.messages))
-    prompt.add_or_change_system(system_message)
+    layout = PromptLayout(
+        static=get_static_system_prompt(),
+        user=get_user_system_prompt(profile),
+        task=planning_instructions,
+        request=[
+            f"Текущие наблюдения:\n{evidence_block}",
+            f"Осталось шагов до обязательного завершения: {remaining_steps}.",
+        ],
+    )
 
-    return prompt
+    return layout.build(chat)
@@ -1,7 +1,9 @@
 import logging
+from typing import Any
 
 from ml.api.external import send_graph_log
 from ml.api.external.ollama_client import ReasoningModelClient
+from ml.configs import ModelTier
 from ml.domain.models import GraphState, PicsTags
 
 from .prompt import get_voice_validation_prompt
@@ -11,9 +13,10 @@ from .schema import VoiceValidationResponse
 logger = logging.getLogger(__name__)
 
 
-async def validate_voice(state: GraphState) -> GraphState:
+async def validate_voice(state: GraphState) -> dict[str, Any]:
     logger.info("Entering validate_voice node")
 
+    # runs in parallel pre-flight stage, so only the owned key is returned as an update
     if state.meta.is_voice:
         answer_id = state.chat.last_user_message_id()
 
@@ -25,13 +28,13 @@ async def validate_voice(state: GraphState) -> GraphState:
         )
 
         prompt = get_voice_validation_prompt(state.chat.last_message())
-        client = ReasoningModelClient.instance()
+        client = ReasoningModelClient.instance(ModelTier.CLASSIFIER)
 
         response: VoiceValidationResponse = await client.call_structured(
-            messages=prompt, output_schema=VoiceValidationResponse
+            messages=prompt, output_schema=VoiceValidationResponse, cached=True
         )
 
-        state.voice_is_valid = response.voice_is_valid
-
         # TODO: Add logic for returning mock message as a stream
-    return state
+        return {"voice_is_valid": response.voice_is_valid}
+
+    return {}
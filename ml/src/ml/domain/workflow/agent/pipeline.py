@@ -5,12 +5,17 @@
 # pyright: reportUnknownParameterType=false
 # pyright: reportMissingTypeArgument=false
 
-from langgraph.graph import END, StateGraph
-
-from ml.domain.models import GraphState
-from ml.domain.workflow.agent.conditionals import mode_decision, research_decision
+from langgraph.graph import END, START, StateGraph
+
+from ml.configs import ThinkingStrategy, get_thinking_strategy
+from ml.domain.models import GraphState, ModelMode
+from ml.domain.workflow.agent.conditionals import (
+    mode_decision,
+    research_decision,
+    thinking_plan_decision,
+)
 from ml.domain.workflow.agent.nodes import (
-    define_mode,
+    classify_preflight,
     fast_answer,
     ingest_file,
     final_stream,
@@ -18,78 +23,127 @@ from ml.domain.workflow.agent.nodes import (
     research_observer,
     research_reason,
     research_tool_call,
+    thinking_executor,
+    thinking_finalize,
+    thinking_full_planner,
     thinking_planner,
-    validate_tag,
-    validate_voice,
 )
 
+_BRANCH_ENTRYPOINTS: dict[ModelMode, str] = {
+    ModelMode.Fast: "Flash memories",
+    ModelMode.Thiking: "Thinking planner",
+    ModelMode.Research: "Research reason",
+}
+
+
+def create_pipeline(
+    mode: ModelMode | None = None, thinking_strategy: ThinkingStrategy | None = None
+) -> StateGraph:
+    """
+    Builds and compiles the agent graph.
+
+    Without a mode (or with ModelMode.Auto) the full graph with mode branching is built.
+    With a concrete mode only the branch of that mode is attached after the pre-flight stage.
+    The thinking branch layout follows thinking_strategy (THINKING_STRATEGY by default)
+    """
+    if mode is ModelMode.Auto:
+        mode = None
+
+    if thinking_strategy is None:
+        thinking_strategy = get_thinking_strategy()
 
-def create_pipeline() -> StateGraph:
     # Builder
     workflow: StateGraph = StateGraph(GraphState)
 
-    # general route
+    # general route: pre-flight nodes are independent reads of the request,
+    # so they run concurrently in one superstep and join before the mode branch.
+    # Voice, tag and mode decisions are fused into a single classifier call
     # TODO: Add conditional validation jump node
-    workflow.add_node("Voice validadtion", validate_voice)
-    workflow.add_node("Tag validadtion", validate_tag)
+    preflight_nodes: list[str] = ["Pre-flight classification", "File ingestion"]
+    workflow.add_node("Pre-flight classification", classify_preflight)
     workflow.add_node("File ingestion", ingest_file)
-    workflow.add_node("Mode definition", define_mode)
     workflow.add_node("Final node", final_stream)
 
-    workflow.add_edge("Voice validadtion", "Tag validadtion")
-    workflow.add_edge("Tag validadtion", "File ingestion")
-    workflow.add_edge("File ingestion", "Mode definition")
-    workflow.add_conditional_edges(
-        "Mode definition",
-        mode_decision,
-        {
-            "fast_pipeline": "Flash memories",
-            "thinking_pipeline": "Thinking planner",
-            "research_pipeline": "Research reason",
-        },
-    )
+    # entrypoint: fan-out
+    for node_name in preflight_nodes:
+        workflow.add_edge(START, node_name)
+
+    # join: branching waits for the whole pre-flight superstep to finish
+    if mode is None:
+        workflow.add_conditional_edges(
+            "Pre-flight classification",
+            mode_decision,
+            {
+                "fast_pipeline": _BRANCH_ENTRYPOINTS[ModelMode.Fast],
+                "thinking_pipeline": _BRANCH_ENTRYPOINTS[ModelMode.Thiking],
+                "research_pipeline": _BRANCH_ENTRYPOINTS[ModelMode.Research],
+            },
+        )
 
     # Fast
-    workflow.add_node("Flash memories", flash_memories)  # TODO: Implement memories
-    workflow.add_node("Fast answer", fast_answer)
-
-    workflow.add_edge("Flash memories", "Fast answer")
-    workflow.add_edge("Fast answer", "Final node")
+    if mode is None or mode is ModelMode.Fast:
+        workflow.add_node("Flash memories", flash_memories)  # TODO: Implement memories
+        workflow.add_node("Fast answer", fast_answer)
+
+        workflow.add_edge("Flash memories", "Fast answer")
+        workflow.add_edge("Fast answer", "Final node")
+
+    # Thinking, plan-and-execute variant: one plan, re-planned only when steps come back empty
+    if (mode is None or mode is ModelMode.Thiking) and (
+        thinking_strategy is ThinkingStrategy.PLAN_EXECUTE
+    ):
+        workflow.add_node("Thinking planner", thinking_full_planner)
+        workflow.add_node("Thinking executor", thinking_executor)
+        workflow.add_node("Thinking finalizer", thinking_finalize)
+
+        workflow.add_edge("Thinking planner", "Thinking executor")
+        workflow.add_conditional_edges(
+            "Thinking executor",
+            thinking_plan_decision,
+            {
+                "replan": "Thinking planner",
+                "finalize": "Thinking finalizer",
+            },
+        )
+        workflow.add_edge("Thinking finalizer", "Final node")
 
     # Thinking
-    workflow.add_node("Thinking planner", thinking_planner)
-    workflow.add_node("Thinking tool call", research_tool_call)
-    workflow.add_node("Thinking observer", research_observer)
-
-    workflow.add_edge("Thinking planner", "Thinking tool call")
-    workflow.add_conditional_edges(
-        "Thinking tool call",
-        research_decision,
-        {
-            "tool_call": "Thinking observer",
-            "finalize": "Final node",
-        },
-    )
-    workflow.add_edge("Thinking observer", "Thinking planner")
+    elif mode is None or mode is ModelMode.Thiking:
+        workflow.add_node("Thinking planner", thinking_planner)
+        workflow.add_node("Thinking tool call", research_tool_call)
+        workflow.add_node("Thinking observer", research_observer)
+
+        workflow.add_edge("Thinking planner", "Thinking tool call")
+        workflow.add_conditional_edges(
+            "Thinking tool call",
+            research_decision,
+            {
+                "tool_call": "Thinking observer",
+                "finalize": "Final node",
+            },
+        )
+        workflow.add_edge("Thinking observer", "Thinking planner")
 
     # Research
-    workflow.add_node("Research reason", research_reason)
-    workflow.add_node("Research tool call", research_tool_call)
-    workflow.add_node("Research observer", research_observer)
-
-    workflow.add_edge("Research reason", "Research tool call")
-    workflow.add_conditional_edges(
-        "Research tool call",
-        research_decision,
-        {
-            "tool_call": "Research observer",
-            "finalize": "Final node",
-        },
-    )
-    workflow.add_edge("Research observer", "Research reason")
-
-    # entrypoint
-    workflow.set_entry_point("Voice validadtion")
+    if mode is None or mode is ModelMode.Research:
+        workflow.add_node("Research reason", research_reason)
+        workflow.add_node("Research tool call", research_tool_call)
+        workflow.add_node("Research observer", research_observer)
+
+        workflow.add_edge("Research reason", "Research tool call")
+        workflow.add_conditional_edges(
+            "Research tool call",
+            research_decision,
+            {
+                "tool_call": "Research observer",
+                "finalize": "Final node",
+            },
+        )
+        workflow.add_edge("Research observer", "Research reason")
+
+    # join for a concrete mode (branch nodes must exist before a multi-source edge)
+    if mode is not None:
+        workflow.add_edge(preflight_nodes, _BRANCH_ENTRYPOINTS[mode])
 
     # exit point
     workflow.add_edge("Final node", END)
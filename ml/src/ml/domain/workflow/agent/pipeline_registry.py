@@ -0,0 +1,62 @@
+# pyright: reportMissingTypeStubs=false
+# pyright: reportMissingTypeArgument=false
+
+import logging
+
+from langgraph.graph import StateGraph
+
+from ml.domain.models import ModelMode
+from ml.domain.workflow.agent.pipeline import create_pipeline
+
+logger = logging.getLogger(__name__)
+
+_pipeline_registry: dict[ModelMode, StateGraph] = {}
+
+
+def get_pipeline_registry() -> dict[ModelMode, StateGraph]:
+    """Get the global registry of compiled pipelines."""
+    return _pipeline_registry
+
+
+def register_pipeline(mode: ModelMode, pipeline: StateGraph) -> None:
+    _pipeline_registry[mode] = pipeline
+
+
+def initialize_pipelines(*, mode_subgraphs: bool = True) -> None:
+    """
+    Compile pipelines once, so requests only have to invoke them.
+
+    The full graph is registered under ModelMode.Auto. When mode_subgraphs is set,
+    every concrete mode also gets its own graph without the mode definition branch
+    """
+    register_pipeline(ModelMode.Auto, create_pipeline())
+
+    if mode_subgraphs:
+        for mode in ModelMode:
+            if mode is ModelMode.Auto:
+                continue
+            register_pipeline(mode, create_pipeline(mode))
+
+    logger.info(
+        "Compiled pipelines for modes: %s",
+        ", ".join(mode.value for mode in _pipeline_registry),
+    )
+
+
+def get_pipeline(mode: ModelMode) -> StateGraph:
+    """
+    Get compiled pipeline for the requested mode.
+
+    Falls back to the full graph when no subgraph is registered for that mode
+    """
+    pipeline = _pipeline_registry.get(mode)
+    if pipeline is not None:
+        return pipeline
+
+    full_pipeline = _pipeline_registry.get(ModelMode.Auto)
+    if full_pipeline is None:
+        logger.warning("Pipeline registry is empty, compiling pipelines on demand")
+        initialize_pipelines()
+        full_pipeline = _pipeline_registry[ModelMode.Auto]
+
+    return _pipeline_registry.get(mode, full_pipeline)
@@ -1,12 +1,29 @@
+import functools
 from abc import ABC, abstractmethod
 from typing import Any
 
 from ml.domain.models.tools_data import ToolResult
+from ml.utils.metrics import TOOL_DURATION
 
 
 class BaseTool(ABC):
     """Base class for all tools."""
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+
+        # every concrete execute() is timed under the tool name
+        execute = cls.__dict__.get("execute")
+        if execute is None or getattr(execute, "__isabstractmethod__", False):
+            return
+
+        @functools.wraps(execute)
+        async def timed_execute(self: BaseTool, *args: Any, **tool_kwargs: Any) -> ToolResult:
+            with TOOL_DURATION.labels(tool=self.name).time():
+                return await execute(self, *args, **tool_kwargs)
+
+        cls.execute = timed_execute  # type: ignore[method-assign]
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -3,7 +3,12 @@ from typing import Any, Sequence
 from ml.domain.models import ChatHistory, UserProfile
 from ml.domain.models.tools_data import Evidence, ToolResult
 from ml.domain.workflow.agent.tools.base_tool import BaseTool
-from ml.utils import format_research_observations, get_system_prompt
+from ml.utils import (
+    PromptLayout,
+    format_research_observations,
+    get_static_system_prompt,
+    get_user_system_prompt,
+)
 
 
 class FinalAnswerTool(BaseTool):
@@ -37,23 +42,24 @@ class FinalAnswerTool(BaseTool):
         evidence: Sequence[Evidence],
         answer_hint: str | None = None,
     ) -> ToolResult:
-        final_chat = ChatHistory(messages=list(chat.messages))
-        system_prompt = get_system_prompt(profile)
-
         evidence_text = format_research_observations(evidence)
         evidence_prefix = (
             "Собранные наблюдения отсутствуют." if not evidence_text else "Собранные наблюдения:\n"
         )
 
-        assistant_message_parts = [f"{evidence_prefix}{evidence_text}"]
+        request_parts = [f"{evidence_prefix}{evidence_text}"]
 
         if answer_hint:
-            assistant_message_parts.append(
+            request_parts.append(
                 f"Рекомендуемый ответ или важные пункты, которые нужно раскрыть:\n{answer_hint}"
             )
 
-        combined_assistant_message = "\n\n".join(assistant_message_parts)
-        system_prompt += combined_assistant_message
+        # evidence goes after the dialogue, the system message stays the same for the whole chat
+        layout = PromptLayout(
+            static=get_static_system_prompt(),
+            user=get_user_system_prompt(profile),
+            request=request_parts,
+        )
 
-        final_chat.add_or_change_system(system_prompt)
+        final_chat = layout.build(chat)
         return ToolResult(success=True, data={"final_prompt": final_chat})
@@ -107,8 +107,8 @@ def html_to_text(html: str) -> str:
     return normalized
 
 
-async def extract_text_from_url(url: str) -> str:
-    html = await fetch_html(url)
+async def extract_text_from_url(url: str, *, timeout: float = 10.0) -> str:
+    html = await fetch_html(url, timeout=timeout)
     return html_to_text(html)
 
 
@@ -9,10 +9,13 @@ from urllib.parse import urlparse
 from ddgs import DDGS
 
 from ml.api.external import send_graph_log
+from ml.api.external.llm_scheduler import CallPriority
 from ml.api.external.ollama_client import ReasoningModelClient
+from ml.configs import FINAL_ANSWER_RESERVE_SECONDS, ModelTier
 from ml.domain.models.graph_log import PicsTags
 from ml.domain.models.tools_data import ToolResult
 from ml.domain.workflow.agent.tools.base_tool import BaseTool
+from ml.utils import budget_is_low, remaining_budget
 
 from .prompt import get_relevance_prompt
 from .schema import ChunkRelevance
@@ -20,6 +23,8 @@ from .text_extraction import extract_text_from_url, is_url_allowed, split_into_c
 
 logger = logging.getLogger(__name__)
 
+_PAGE_FETCH_TIMEOUT = 10.0
+
 
 @dataclass
 class SearchHit:
@@ -68,10 +73,25 @@ class WebSearchTool(BaseTool):
         if not isinstance(answer_id, int):
             raise ValueError("web_search tool requires 'answer_id' argument of type int")
 
+        deadline = kwargs.get("deadline")
+        if deadline is not None and not isinstance(deadline, float):
+            raise ValueError("web_search tool 'deadline' argument must be a float")
+
+        reserve = kwargs.get("deadline_reserve")
+        if reserve is not None and not isinstance(reserve, float):
+            raise ValueError("web_search tool 'deadline_reserve' argument must be a float")
+
         search_hits = await self._perform_search(query_argument)
 
         relevant_documents: list[dict[str, str]] = []
-        for hit in search_hits:
+        for position, hit in enumerate(search_hits):
+            if budget_is_low(deadline, reserve):
+                logger.info(
+                    "Request budget is running out, skipping the remaining %s search hits",
+                    len(search_hits) - position,
+                )
+                break
+
             domain = urlparse(hit.url).netloc
             if not domain:
                 raise ValueError("Search hit URL is missing a domain")
@@ -79,7 +99,7 @@ class WebSearchTool(BaseTool):
                 chat_id=chat_id, answer_id=answer_id, message=f"Изучаю {domain}"
             )
 
-            relevant_text = await self._gather_relevant_text(query_argument, hit)
+            relevant_text = await self._gather_relevant_text(query_argument, hit, deadline, reserve)
             if relevant_text:
                 relevant_documents.append(
                     {"url": hit.url, "title": hit.title, "content": relevant_text}
@@ -143,9 +163,22 @@ class WebSearchTool(BaseTool):
 
         return collected
 
-    async def _gather_relevant_text(self, query: str, hit: SearchHit) -> str:
+    async def _gather_relevant_text(
+        self,
+        query: str,
+        hit: SearchHit,
+        deadline: float | None = None,
+        reserve: float | None = None,
+    ) -> str:
+        timeout = _PAGE_FETCH_TIMEOUT
+        remaining = remaining_budget(deadline)
+        if remaining is not None:
+            # a slow page must not eat the time kept for the answer
+            kept = FINAL_ANSWER_RESERVE_SECONDS if reserve is None else reserve
+            timeout = max(1.0, min(timeout, remaining - kept))
+
         try:
-            document_text = await extract_text_from_url(hit.url)
+            document_text = await extract_text_from_url(hit.url, timeout=timeout)
         except Exception:
             logger.exception("Failed to extract text from URL: %s", hit.url)
             return ""
@@ -154,14 +187,26 @@ class WebSearchTool(BaseTool):
         if not chunks:
             return ""
 
-        relevant_chunks = await self._filter_relevant_chunks(query, chunks)
+        relevant_chunks = await self._filter_relevant_chunks(query, chunks, deadline, reserve)
         return "\n\n".join(relevant_chunks)
 
-    async def _filter_relevant_chunks(self, query: str, chunks: list[str]) -> list[str]:
-        return await self._evaluate_chunk_relevance(query, chunks)
-
-    async def _evaluate_chunk_relevance(self, query: str, chunks: list[str]) -> list[str]:
-        client = ReasoningModelClient.instance()
+    async def _filter_relevant_chunks(
+        self,
+        query: str,
+        chunks: list[str],
+        deadline: float | None = None,
+        reserve: float | None = None,
+    ) -> list[str]:
+        return await self._evaluate_chunk_relevance(query, chunks, deadline, reserve)
+
+    async def _evaluate_chunk_relevance(
+        self,
+        query: str,
+        chunks: list[str],
+        deadline: float | None = None,
+        reserve: float | None = None,
+    ) -> list[str]:
+        client = ReasoningModelClient.instance(ModelTier.CLASSIFIER)
         selected: list[str] = []
 
         remaining_chunk_budget = 5
@@ -170,9 +215,15 @@ class WebSearchTool(BaseTool):
             if remaining_chunk_budget == 0:
                 break
 
+            if budget_is_low(deadline, reserve):
+                logger.info(
+                    "Request budget is running out, keeping %s relevant chunks", len(selected)
+                )
+                break
+
             prompt = get_relevance_prompt(query=query, chunk=chunk)
             result: ChunkRelevance = await client.call_structured(
-                messages=prompt, output_schema=ChunkRelevance
+                messages=prompt, output_schema=ChunkRelevance, priority=CallPriority.RELEVANCE
             )
 
             remaining_chunk_budget -= 1
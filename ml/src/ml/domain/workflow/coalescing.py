@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Callable
+from contextlib import aclosing
+from typing import ClassVar
+
+from ml.domain.models import ModelMode, WorkflowEvent
+from ml.utils.metrics import REQUESTS_COALESCED
+
+logger = logging.getLogger(__name__)
+
+# chat_id, id of the last user message, requested mode
+CoalescingKey = tuple[int, int, ModelMode]
+
+
+class EventBroadcaster:
+    """
+    Runs one workflow event stream in the background and fans it out to subscribers
+
+    Every subscriber gets the whole stream from its first event, however late it
+    attached. The run is cancelled once its last subscriber has left.
+    """
+
+    def __init__(
+        self, source: AsyncIterator[WorkflowEvent], on_finish: Callable[[], None]
+    ) -> None:
+        self._events: list[WorkflowEvent] = []
+        self._error: BaseException | None = None
+        self._finished = False
+        self._changed = asyncio.Event()
+        self._subscribers = 0
+        self._on_finish = on_finish
+        self._task = asyncio.create_task(self._pump(source))
+
+    @property
+    def subscribers(self) -> int:
+        return self._subscribers
+
+    async def subscribe(self) -> AsyncIterator[WorkflowEvent]:
+        self._subscribers += 1
+        position = 0
+
+        try:
+            while True:
+                while position < len(self._events):
+                    yield self._events[position]
+                    position += 1
+
+                if self._finished:
+                    if self._error is not None:
+                        raise self._error
+                    return
+
+                await self._changed.wait()
+        finally:
+            self._subscribers -= 1
+            if self._subscribers == 0 and not self._task.done():
+                # nobody waits for the answer anymore, new requests must not join the dying run
+                self._on_finish()
+                self._task.cancel()
+                await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _pump(self, source: AsyncIterator[WorkflowEvent]) -> None:
+        try:
+            async with aclosing(source) as events:
+                async for event in events:
+                    self._events.append(event)
+                    self._notify()
+        except Exception as exc:
+            self._error = exc
+        finally:
+            self._finished = True
+            self._on_finish()
+            self._notify()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class RequestCoalescer:
+    """
+    Lets identical concurrent requests share one pipeline run
+
+    The first request of a key starts the run, every request arriving with the
+    same key while it is running attaches to its events instead of starting a
+    second generation. Finished runs are forgotten, a later retry runs again.
+    """
+
+    _instance: ClassVar[RequestCoalescer | None] = None
+
+    def __init__(self) -> None:
+        self._running: dict[CoalescingKey, EventBroadcaster] = {}
+
+    @classmethod
+    def instance(cls) -> RequestCoalescer:
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    @classmethod
+    def reset_instance(cls) -> None:
+        cls._instance = None
+
+    @property
+    def running(self) -> int:
+        return len(self._running)
+
+    def events(
+        self, key: CoalescingKey, start: Callable[[], AsyncIterator[WorkflowEvent]]
+    ) -> AsyncIterator[WorkflowEvent]:
+        broadcaster = self._running.get(key)
+
+        if broadcaster is None:
+            broadcaster = EventBroadcaster(start(), on_finish=lambda: self._forget(key, broadcaster))
+            self._running[key] = broadcaster
+        else:
+            chat_id, message_id, mode = key
+            logger.info(
+                "Attaching duplicate request chat_id=%s message_id=%s to the running pipeline",
+                chat_id,
+                message_id,
+            )
+            REQUESTS_COALESCED.labels(mode=mode.value).inc()
+
+        return broadcaster.subscribe()
+
+    def _forget(self, key: CoalescingKey, broadcaster: EventBroadcaster | None) -> None:
+        if self._running.get(key) is broadcaster:
+            del self._running[key]
@@ -1,19 +1,40 @@
 import logging
 from collections.abc import AsyncIterator
+from contextlib import aclosing
 from typing import Any
 
 from ollama._types import ChatResponse
 
 from ml.api.schemas import MessagePayload
 from ml.api.schemas.message_payload import Tag
-from ml.domain.models import GraphState, MetaData
-from ml.domain.workflow.agent.pipeline import create_pipeline
+from ml.configs import (
+    get_default_request_budget,
+    get_final_answer_reserve,
+    get_max_parallel_tool_calls,
+)
+from ml.domain.models import GraphState, MetaData, WorkflowEvent, WorkflowEventType
+from ml.domain.workflow.admission import FairAdmission
+from ml.domain.workflow.coalescing import CoalescingKey, RequestCoalescer
+from ml.domain.workflow.agent.pipeline_registry import get_pipeline
+from ml.utils import (
+    NodeMetricsCallback,
+    chat_config,
+    deadline_after,
+    export_usage,
+    usage_config,
+)
 
 logger = logging.getLogger(__name__)
 
+_PIPELINE_CONFIG: dict[str, Any] = {
+    "run_name": "main_pipeline",
+    "recursion_limit": 100,
+    "callbacks": [NodeMetricsCallback()],
+}
+
 
 async def workflow_collected(payload: MessagePayload) -> tuple[str, Tag]:
-    output_stream, tag, _ = await workflow(payload)
+    tag = payload.tag
 
     collected_chunks: list[str] = []
 
@@ -21,7 +42,16 @@ async def workflow_collected(payload: MessagePayload) -> tuple[str, Tag]:
         print(chunk_value, end="")
         collected_chunks.append(chunk_value)
 
-    async for chunk in output_stream:
+    async for event in workflow_events(payload):
+        if event.type == WorkflowEventType.Tag and event.tag is not None:
+            tag = event.tag
+            continue
+
+        if event.type != WorkflowEventType.Answer:
+            continue
+
+        chunk = event.chunk
+
         if isinstance(chunk, ChatResponse):
             message = chunk.message
 
@@ -93,26 +123,135 @@ async def workflow_collected(payload: MessagePayload) -> tuple[str, Tag]:
     return collected_response, tag
 
 
-async def workflow(payload: MessagePayload) -> tuple[AsyncIterator[dict[str, Any]], Tag, str | None]:
-    initial_state = GraphState(
+async def workflow_events(payload: MessagePayload) -> AsyncIterator[WorkflowEvent]:
+    """
+    Yields the events of the pipeline run answering payload.
+
+    Retries and double clicks arrive with the chat_id, last user message id and
+    mode of a run that is still going; they share its events instead of
+    starting a second generation.
+    """
+    key = _coalescing_key(payload)
+
+    if key is None:
+        events = _pipeline_events(payload)
+    else:
+        events = RequestCoalescer.instance().events(key, lambda: _pipeline_events(payload))
+
+    async with aclosing(events) as shared_events:
+        async for event in shared_events:
+            yield event
+
+
+async def _pipeline_events(payload: MessagePayload) -> AsyncIterator[WorkflowEvent]:
+    """
+    Runs the pipeline with LangGraph streaming and yields events as they happen.
+
+    Order: tag (as soon as it is known), progress for every finished node,
+    answer chunks from the final node as they are generated, done.
+    """
+    initial_state = _build_initial_state(payload)
+
+    compiled_pipeline = get_pipeline(payload.mode)
+
+    tag_resolved = payload.tag != Tag.Empty
+    if tag_resolved:
+        yield WorkflowEvent(type=WorkflowEventType.Tag, tag=payload.tag)
+
+    result_state: Any = None
+    supersteps = 0
+
+    # the reasoning client appends to the ledger it finds in the run config
+    # and keeps the calls of one chat on the same Ollama node
+    usage = initial_state.usage
+    config = {
+        **_PIPELINE_CONFIG,
+        "configurable": {**usage_config(usage), **chat_config(payload.chat_id)},
+    }
+
+    # a payload with a known tag already sent it, so its stream opens while the request waits
+    admission = FairAdmission.instance()
+    async with admission.turn(payload.profile.id, payload.chat_id, payload.mode):
+        async for stream_mode, data in compiled_pipeline.astream(
+            initial_state, config=config, stream_mode=["updates", "values", "custom"]
+        ):
+            if stream_mode == "custom":
+                if not isinstance(data, WorkflowEvent):
+                    raise TypeError(
+                        f"Workflow custom stream yielded unsupported type: {type(data)}"
+                    )
+
+                yield data
+                continue
+
+            if stream_mode == "values":
+                result_state = data
+                supersteps += 1
+
+                # first snapshot is the input, the second one has every pre-flight update
+                if not tag_resolved and supersteps > 1:
+                    tag_resolved = True
+                    yield WorkflowEvent(type=WorkflowEventType.Tag, tag=_state_tag(data))
+                continue
+
+            for node_name, update in data.items():
+                if not tag_resolved and isinstance(update, dict) and "meta" in update:
+                    tag_resolved = True
+                    yield WorkflowEvent(type=WorkflowEventType.Tag, tag=_state_tag(update))
+
+                yield WorkflowEvent(type=WorkflowEventType.Progress, node=node_name)
+
+    validated_state = _validate_result_state(result_state)
+
+    if not tag_resolved:
+        yield WorkflowEvent(type=WorkflowEventType.Tag, tag=validated_state.meta.tag)
+
+    export_usage(usage, validated_state.model_mode.value)
+
+    yield WorkflowEvent(
+        type=WorkflowEventType.Done,
+        file_url=validated_state.written_file_url,
+        usage=usage.summary(),
+    )
+
+
+def _coalescing_key(payload: MessagePayload) -> CoalescingKey | None:
+    try:
+        message_id = payload.messages.last_user_message_id()
+    except (RuntimeError, ValueError):
+        # without a message id two requests can not be told to be the same one
+        return None
+
+    return payload.chat_id, message_id, payload.mode
+
+
+def _build_initial_state(payload: MessagePayload) -> GraphState:
+    budget = payload.deadline_seconds or get_default_request_budget()
+
+    return GraphState(
         chat_id=payload.chat_id,
         chat=payload.messages,
         user=payload.profile,
         meta=MetaData(is_voice=payload.is_voice, tag=payload.tag),
         file_url=payload.file_url,
         written_file_url=None,
+        deadline=deadline_after(budget),
+        deadline_reserve=get_final_answer_reserve(budget),
         model_mode=payload.mode,
         voice_is_valid=None,
         final_prompt=None,
-        output_stream=None,
+        max_parallel_tool_calls=get_max_parallel_tool_calls(),
     )
 
-    compiled_pipeline = create_pipeline()
 
-    result_state = await compiled_pipeline.ainvoke(
-        initial_state, config={"run_name": "main_pipeline", "recursion_limit": 100}
-    )
+def _state_tag(state_values: dict[str, Any]) -> Tag:
+    meta = state_values["meta"]
+    if isinstance(meta, MetaData):
+        return meta.tag
+    return MetaData.model_validate(meta).tag
 
+
+def _validate_result_state(result_state: Any) -> GraphState:
     validated_state: GraphState
 
     if isinstance(result_state, GraphState):
@@ -125,12 +264,8 @@ async def workflow(payload: MessagePayload) -> tuple[AsyncIterator[dict[str, Any
             f"{type(result_state)}. Expected GraphState or dict."
         )
 
-    output_stream = validated_state.output_stream
-    if output_stream is None:
-        raise RuntimeError("Workflow execution completed without producing an output stream")
-
-    if not isinstance(output_stream, AsyncIterator):
-        raise TypeError("Workflow output_stream is not an AsyncIterator")
+    if validated_state.final_prompt is None:
+        raise RuntimeError("Workflow execution completed without reaching the final node")
 
     if not isinstance(validated_state.meta.tag, Tag):
         raise TypeError("Workflow state meta.tag is not a Tag enum value")
@@ -139,4 +274,4 @@ async def workflow(payload: MessagePayload) -> tuple[AsyncIterator[dict[str, Any
     if file_url is not None and not isinstance(file_url, str):
         raise TypeError("Workflow state written_file_url is not a string or None")
 
-    return output_stream, validated_state.meta.tag, file_url
+    return validated_state
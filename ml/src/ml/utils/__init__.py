@@ -1,15 +1,50 @@
+from .chat_context import chat_config, current_chat_id
+from .deadline import budget_is_low, deadline_after, remaining_budget
 from .download_formatters import format_bytes, format_progress
+from .lru import LRUCache
+from .metrics import (
+    NodeMetricsCallback,
+    StreamRateMeter,
+    current_node_name,
+    observe_llm_call,
+    observe_llm_stream,
+)
 from .openrouter import OPENROUTER_PROVIDER_BODY, apply_openrouter_provider
+from .partial_json import PartialJSONObject, SentenceStream
 from .pipeline_data_formatters import (
+    format_evidence_section,
     format_research_observations,
-    get_system_prompt,
+    get_static_system_prompt,
+    get_user_system_prompt,
 )
+from .prompt_layout import PromptLayout
+from .usage import current_usage_ledger, export_usage, record_usage, usage_config
 
 __all__ = [
     "format_bytes",
     "format_progress",
-    "get_system_prompt",
+    "get_static_system_prompt",
+    "get_user_system_prompt",
+    "format_evidence_section",
+    "PromptLayout",
     "format_research_observations",
     "OPENROUTER_PROVIDER_BODY",
     "apply_openrouter_provider",
+    "NodeMetricsCallback",
+    "StreamRateMeter",
+    "current_node_name",
+    "observe_llm_call",
+    "observe_llm_stream",
+    "usage_config",
+    "current_usage_ledger",
+    "record_usage",
+    "export_usage",
+    "chat_config",
+    "current_chat_id",
+    "deadline_after",
+    "remaining_budget",
+    "budget_is_low",
+    "LRUCache",
+    "PartialJSONObject",
+    "SentenceStream",
 ]
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from typing import Any
+
+from langgraph.config import get_config
+
+CHAT_ID_KEY = "chat_id"
+
+
+def chat_config(chat_id: int) -> dict[str, Any]:
+    """Configurable section that tells every model call of a run which chat it serves"""
+    return {CHAT_ID_KEY: chat_id}
+
+
+def current_chat_id() -> int | None:
+    """Chat of the running graph, None outside of a run"""
+    try:
+        config = get_config()
+    except RuntimeError:
+        return None
+
+    chat_id = (config.get("configurable") or {}).get(CHAT_ID_KEY)
+    return chat_id if isinstance(chat_id, int) else None
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import time
+
+from ml.configs.deadline_settings import FINAL_ANSWER_RESERVE_SECONDS
+
+
+def deadline_after(budget_seconds: float) -> float:
+    """Monotonic clock value by which the request has to be answered"""
+    return time.monotonic() + budget_seconds
+
+
+def remaining_budget(deadline: float | None) -> float | None:
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def budget_is_low(deadline: float | None, reserve: float | None = None) -> bool:
+    """
+    True when starting more work would eat into the time kept for the final answer
+
+    reserve is the share of the request budget kept for the answer,
+    None keeps FINAL_ANSWER_RESERVE_SECONDS.
+    """
+    remaining = remaining_budget(deadline)
+    if reserve is None:
+        reserve = FINAL_ANSWER_RESERVE_SECONDS
+    return remaining is not None and remaining < reserve
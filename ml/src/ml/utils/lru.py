@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Bounded mapping that drops the least recently used entry when it is full
+
+    Entries older than ttl seconds are treated as missing. Expiry uses wall clock
+    time, so persisted entries keep their age across restarts.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        if maxsize < 0:
+            raise ValueError("maxsize must not be negative")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        stored_at, value = entry
+        if self._expired(stored_at):
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V, stored_at: float | None = None) -> K | None:
+        """Stores value and returns the key it evicted, if any"""
+        if self.maxsize == 0:
+            return None
+
+        stored_at = self._clock() if stored_at is None else stored_at
+        if self._expired(stored_at):
+            return None
+
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+
+        if len(self._entries) <= self.maxsize:
+            return None
+
+        evicted, _ = self._entries.popitem(last=False)
+        return evicted
+
+    def pop(self, key: K) -> V | None:
+        entry = self._entries.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def items(self) -> Iterator[tuple[K, float, V]]:
+        """Live entries from the least to the most recently used, with the time they were stored"""
+        for key, (stored_at, value) in list(self._entries.items()):
+            if not self._expired(stored_at):
+                yield key, stored_at, value
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and self._clock() - stored_at > self.ttl
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
+from typing import Any, ParamSpec, TypeVar
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.config import get_config
+from prometheus_client import Counter, Gauge, Histogram
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+UNKNOWN_NODE = "none"
+
+_LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0, 160.0)
+
+NODE_DURATION = Histogram(
+    "ml_node_duration_seconds",
+    "Time spent inside one LangGraph node",
+    ["node"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+LLM_CALL_DURATION = Histogram(
+    "ml_llm_call_duration_seconds",
+    "Duration of one reasoning model call, streams are measured until exhausted",
+    ["method", "node"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+TOOL_DURATION = Histogram(
+    "ml_tool_duration_seconds",
+    "Duration of one tool execution",
+    ["tool"],
+    buckets=_LATENCY_BUCKETS,
+)
+
+FINAL_STREAM_TTFT = Histogram(
+    "ml_final_stream_time_to_first_token_seconds",
+    "Time from the final stream request to its first chunk",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0),
+)
+
+FINAL_STREAM_CHUNKS_PER_SECOND = Histogram(
+    "ml_final_stream_chunks_per_second",
+    "Chunks of the final stream delivered per second after the first one",
+    buckets=(1, 2.5, 5, 10, 20, 40, 80, 160, 320),
+)
+
+REQUESTS_IN_FLIGHT = Gauge(
+    "ml_requests_in_flight",
+    "Workflow requests currently being served",
+    ["endpoint"],
+)
+
+LLM_CALLS_IN_FLIGHT = Gauge(
+    "ml_llm_calls_in_flight",
+    "Reasoning model calls currently waiting for the model",
+    ["method"],
+)
+
+REQUESTS_CANCELLED = Counter(
+    "ml_requests_cancelled",
+    "Workflow requests abandoned by the client before they finished",
+    ["endpoint"],
+)
+
+LLM_CALLS_CANCELLED = Counter(
+    "ml_llm_calls_cancelled",
+    "Reasoning model calls cancelled before the model finished",
+    ["method"],
+)
+
+HTTP_POOL_CONNECTIONS = Gauge(
+    "ml_http_pool_connections",
+    "Connections of the shared model client pool: active serve a request, idle wait for one",
+    ["state"],
+)
+
+HTTP_POOL_QUEUED_REQUESTS = Gauge(
+    "ml_http_pool_queued_requests",
+    "Model requests waiting for a connection of the shared pool",
+)
+
+OLLAMA_BACKEND_OUTSTANDING = Gauge(
+    "ml_ollama_backend_outstanding_requests",
+    "Model requests sent to an Ollama node and not finished yet, streams count until closed",
+    ["backend"],
+)
+
+OLLAMA_BACKEND_HEALTHY = Gauge(
+    "ml_ollama_backend_healthy",
+    "1 while an Ollama node answers its health checks, 0 once it is taken out of rotation",
+    ["backend"],
+)
+
+OLLAMA_BACKEND_FAILOVERS = Counter(
+    "ml_ollama_backend_failovers",
+    "Model requests moved to another Ollama node after a connection error",
+    ["backend"],
+)
+
+LLM_QUEUE_DEPTH = Gauge(
+    "ml_llm_queue_depth",
+    "Reasoning model calls waiting for a free model slot",
+    ["priority"],
+)
+
+LLM_QUEUE_WAIT = Histogram(
+    "ml_llm_queue_wait_seconds",
+    "Time a reasoning model call waited for a free model slot",
+    ["priority"],
+    buckets=(0.0, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0),
+)
+
+REQUESTS_COALESCED = Counter(
+    "ml_requests_coalesced",
+    "Duplicate requests served from an identical pipeline run that was already running",
+    ["mode"],
+)
+
+PIPELINES_QUEUED = Gauge(
+    "ml_pipelines_queued",
+    "Requests waiting for their fair turn to start a pipeline",
+)
+
+PIPELINE_QUEUE_WAIT = Histogram(
+    "ml_pipeline_queue_wait_seconds",
+    "Time a request waited for its fair turn to start a pipeline",
+    ["mode"],
+    buckets=(0.0, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0),
+)
+
+REQUESTS_REJECTED = Counter(
+    "ml_requests_rejected",
+    "Workflow requests turned away with 503 because the model queue was full",
+    ["endpoint"],
+)
+
+CLASSIFIER_CACHE_REQUESTS = Counter(
+    "ml_classifier_cache_requests",
+    "Cached classifier lookups by schema, result is hit or miss",
+    ["schema", "result"],
+)
+
+EMBEDDING_BATCH_SIZE = Histogram(
+    "ml_embedding_batch_size",
+    "Texts merged into one embedding request by the micro-batcher",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+
+EMBEDDING_CACHE_REQUESTS = Counter(
+    "ml_embedding_cache_requests",
+    "Embedding lookups by the tier that answered them: memory, disk or miss",
+    ["result"],
+)
+
+LLM_TOKENS = Counter(
+    "ml_llm_tokens",
+    "Tokens processed by the reasoning model, per request mode",
+    ["mode", "kind"],
+)
+
+LLM_MODEL_SECONDS = Counter(
+    "ml_llm_model_seconds",
+    "Model time reported by Ollama, split into prompt_eval, eval and load phases",
+    ["mode", "phase"],
+)
+
+LLM_PROMPT_EVAL_RATE = Histogram(
+    "ml_llm_prompt_eval_tokens_per_second",
+    "Prompt tokens per second reported by Ollama, split by whether the prompt "
+    "shares a prefix with the previous call of the chat",
+    ["prefix"],
+    buckets=(50, 100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000),
+)
+
+LLM_COLD_LOADS = Counter(
+    "ml_llm_cold_loads",
+    "Model calls that had to load the model first",
+    ["node"],
+)
+
+
+def current_node_name() -> str:
+    """Name of the graph node the caller runs in, 'none' outside of the graph"""
+    try:
+        config = get_config()
+    except RuntimeError:
+        return UNKNOWN_NODE
+
+    metadata = config.get("metadata") or {}
+    node = metadata.get("langgraph_node")
+    return node if isinstance(node, str) else UNKNOWN_NODE
+
+
+def observe_llm_call(
+    method: str,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    def decorator(func: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            histogram = LLM_CALL_DURATION.labels(method=method, node=current_node_name())
+            with LLM_CALLS_IN_FLIGHT.labels(method=method).track_inprogress(), histogram.time():
+                try:
+                    return await func(*args, **kwargs)
+                except asyncio.CancelledError:
+                    LLM_CALLS_CANCELLED.labels(method=method).inc()
+                    raise
+
+        return wrapper
+
+    return decorator
+
+
+def observe_llm_stream(
+    method: str,
+) -> Callable[[Callable[P, AsyncIterator[R]]], Callable[P, AsyncIterator[R]]]:
+    def decorator(func: Callable[P, AsyncIterator[R]]) -> Callable[P, AsyncIterator[R]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> AsyncIterator[R]:
+            histogram = LLM_CALL_DURATION.labels(method=method, node=current_node_name())
+            with LLM_CALLS_IN_FLIGHT.labels(method=method).track_inprogress(), histogram.time():
+                try:
+                    # closing the wrapper must close the wrapped stream and its HTTP response
+                    async with aclosing(func(*args, **kwargs)) as chunks:
+                        async for chunk in chunks:
+                            yield chunk
+                except asyncio.CancelledError:
+                    LLM_CALLS_CANCELLED.labels(method=method).inc()
+                    raise
+                except GeneratorExit:
+                    # a reader that has what it needs closes the stream on purpose,
+                    # only a close forced by cancelling the reader is a cancelled call
+                    task = asyncio.current_task()
+                    if task is not None and task.cancelling():
+                        LLM_CALLS_CANCELLED.labels(method=method).inc()
+                    raise
+
+        return wrapper
+
+    return decorator
+
+
+class StreamRateMeter:
+    """Collects time-to-first-token and chunks/sec of one stream"""
+
+    def __init__(self) -> None:
+        self.started_at = time.perf_counter()
+        self.first_chunk_at: float | None = None
+        self.chunks = 0
+
+    def chunk(self) -> None:
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.perf_counter()
+            FINAL_STREAM_TTFT.observe(self.first_chunk_at - self.started_at)
+        self.chunks += 1
+
+    def finish(self) -> None:
+        if self.first_chunk_at is None or self.chunks < 2:
+            return
+
+        elapsed = time.perf_counter() - self.first_chunk_at
+        if elapsed > 0:
+            # the first chunk only marks the start, the rest are generated in elapsed time;
+            # a chunk is one backend message, token speed is ml_llm_tokens over time
+            FINAL_STREAM_CHUNKS_PER_SECOND.observe((self.chunks - 1) / elapsed)
+
+
+class NodeMetricsCallback(BaseCallbackHandler):
+    """LangGraph callback that records how long every node run takes"""
+
+    def __init__(self) -> None:
+        self._started: dict[UUID, tuple[str, float]] = {}
+
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        tags: list[str] | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        node = (metadata or {}).get("langgraph_node")
+        # node runs are tagged with their graph step, nested runnables are not
+        is_node_run = any(tag.startswith("graph:step:") for tag in tags or [])
+        if isinstance(node, str) and is_node_run and kwargs.get("name") == node:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def _finish(self, run_id: UUID) -> None:
+        started = self._started.pop(run_id, None)
+        if started is None:
+            return
+
+        node, started_at = started
+        NODE_DURATION.labels(node=node).observe(time.perf_counter() - started_at)
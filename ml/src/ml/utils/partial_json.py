@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any
+
+_WHITESPACE = frozenset(" \t\r\n")
+_SENTENCE_END = re.compile(r"[.!?…](?=\s)|\n")
+_HIGH_SURROGATES = range(0xD800, 0xDC00)
+
+
+class PartialJSONObject:
+    """
+    Incremental reader of one JSON object streamed by the model
+
+    feed() takes the text as it is generated and scans every character once.
+    A top-level field appears in fields as soon as its value is closed,
+    elements of a top-level array appear in items one by one, and text holds
+    top-level string fields while they are still being generated.
+    """
+
+    def __init__(self) -> None:
+        self.fields: dict[str, Any] = {}
+        self.items: dict[str, list[Any]] = {}
+        self.text: dict[str, str] = {}
+        self.done = False
+
+        self._raw = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._unicode_left = 0
+        self._string_start = -1
+        # end of the decodable part of the open string, escapes are never split
+        self._safe_end = -1
+
+        self._key: str | None = None
+        self._expect_value = False
+        self._value_start = -1
+        self._array_key: str | None = None
+        self._item_start = -1
+        self._text_from = -1
+
+    def has(self, *names: str) -> bool:
+        return all(name in self.fields for name in names)
+
+    def feed(self, chunk: str) -> None:
+        self._raw += chunk
+        raw = self._raw
+
+        for index in range(self._pos, len(raw)):
+            self._scan(raw[index], index)
+        self._pos = len(raw)
+
+        if self._in_string and self._text_from >= 0:
+            self._advance_text()
+
+    def _scan(self, char: str, index: int) -> None:
+        if self._in_string:
+            if self._unicode_left:
+                self._unicode_left -= 1
+                if not self._unicode_left:
+                    # the first half of a surrogate pair decodes only together with the second
+                    code = int(self._raw[index - 3 : index + 1], 16)
+                    if code not in _HIGH_SURROGATES:
+                        self._safe_end = index + 1
+            elif self._escape:
+                self._escape = False
+                if char == "u":
+                    self._unicode_left = 4
+                else:
+                    self._safe_end = index + 1
+            elif char == "\\":
+                self._escape = True
+            elif char == '"':
+                self._in_string = False
+                self._string_closed(index)
+            else:
+                self._safe_end = index + 1
+            return
+
+        depth = len(self._stack)
+        if self.done or (depth == 0 and char != "{"):
+            # text around the object, e.g. a markdown fence of a provider
+            return
+
+        if char == '"':
+            self._value_begins(index, depth, char)
+            self._in_string = True
+            self._string_start = index
+            self._safe_end = index + 1
+        elif char in "{[":
+            self._value_begins(index, depth, char)
+            self._stack.append(char)
+        elif char in "}]":
+            self._primitive_ends(index, depth)
+            self._stack.pop()
+            self._container_closed(index, len(self._stack))
+        elif char == ",":
+            self._primitive_ends(index, depth)
+        elif char == ":":
+            if depth == 1:
+                self._expect_value = True
+        elif char in _WHITESPACE:
+            self._primitive_ends(index, depth)
+        else:
+            self._value_begins(index, depth, char)
+
+    def _value_begins(self, index: int, depth: int, char: str) -> None:
+        if depth == 1 and self._expect_value and self._value_start < 0:
+            self._value_start = index
+            if char == '"' and self._key is not None:
+                self.text[self._key] = ""
+                self._text_from = index + 1
+            elif char == "[" and self._key is not None:
+                self._array_key = self._key
+                self.items[self._key] = []
+        elif depth == 2 and self._array_key is not None and self._item_start < 0:
+            self._item_start = index
+
+    def _string_closed(self, index: int) -> None:
+        depth = len(self._stack)
+
+        if depth == 1 and not self._expect_value:
+            self._key = json.loads(self._raw[self._string_start : index + 1], strict=False)
+        elif depth == 1 and self._value_start == self._string_start:
+            self._finish_field(index + 1)
+        elif depth == 2 and self._item_start == self._string_start:
+            self._finish_item(index + 1)
+
+    def _container_closed(self, index: int, depth: int) -> None:
+        if depth == 0:
+            self.done = True
+        elif depth == 1 and self._value_start >= 0:
+            self._finish_field(index + 1)
+        elif depth == 2 and self._item_start >= 0:
+            self._finish_item(index + 1)
+
+    def _primitive_ends(self, index: int, depth: int) -> None:
+        if depth == 1 and self._value_start >= 0 and self._raw[self._value_start] not in '"{[':
+            self._finish_field(index)
+        elif depth == 2 and self._item_start >= 0 and self._raw[self._item_start] not in '"{[':
+            self._finish_item(index)
+
+    def _finish_field(self, end: int) -> None:
+        if self._key is not None:
+            value = json.loads(self._raw[self._value_start : end], strict=False)
+            self.fields[self._key] = value
+            if isinstance(value, str):
+                self.text[self._key] = value
+
+        self._key = None
+        self._expect_value = False
+        self._value_start = -1
+        self._array_key = None
+        self._item_start = -1
+        self._text_from = -1
+
+    def _finish_item(self, end: int) -> None:
+        if self._array_key is not None:
+            value = json.loads(self._raw[self._item_start : end], strict=False)
+            self.items[self._array_key].append(value)
+        self._item_start = -1
+
+    def _advance_text(self) -> None:
+        if self._key is None:
+            return
+
+        if self._safe_end > self._text_from:
+            segment = self._raw[self._text_from : self._safe_end]
+            self.text[self._key] += json.loads(f'"{segment}"', strict=False)
+            self._text_from = self._safe_end
+
+
+class SentenceStream:
+    """
+    Cuts a growing text into finished sentences
+
+    push() gets the whole text so far and returns the sentences finished since
+    the previous push, rest() returns what follows the last finished sentence.
+    """
+
+    def __init__(self) -> None:
+        self._sent = 0
+
+    def push(self, text: str) -> str:
+        end = self._sent
+        for match in _SENTENCE_END.finditer(text, self._sent):
+            end = match.end()
+
+        sentences, self._sent = text[self._sent : end], end
+        return sentences.strip()
+
+    def rest(self, text: str) -> str:
+        rest, self._sent = text[self._sent :], len(text)
+        return rest.strip()
@@ -6,23 +6,36 @@ if TYPE_CHECKING:  # pragma: no cover - for type checking only
 
 logger = logging.getLogger(__name__)
 
-
-def get_system_prompt(profile: "UserProfile", evidence: Sequence["Evidence"] | None = None) -> str:
-    """
-    Creates general system prompt for final answer as a string
-    """
-
-    sections: list[str] = []
-
-    # Base assistant role
-    sections.append(
+_STATIC_SYSTEM_PROMPT = "\n\n".join(
+    [
+        # Base assistant role
         "Вы — продвинутый русскоязычный AI-бизнес-ассистент\n"
         "Ваша основная задача — помогать пользователю и выполнять его просьбы\n"
         "Общие правила общения:\n"
         "Всегда обращайтесь к пользователю на «вы» и сохраняйте уважительный, деловой тон.\n"
         "Объясняйте сложные вещи простым языком, по шагам, с конкретными примерами.\n"
-        "прямо говорите об этом и предлагайте, какие данные пользователь может вам дать."
-    )
+        "прямо говорите об этом и предлагайте, какие данные пользователь может вам дать.",
+        # Dialogue behavior
+        "Поведение в диалоге:\n"
+        "Для сложных задач предлагайте пошаговый план действий.\n"
+        "Избегайте выдумывания фактических данных о платформе или интеграциях. "
+        "Если чего-то не знаете, честно скажите об этом и предложите общий подход. "
+        "В первую очередь постарайся ответить на запрос пользователя\n"
+        "Не вставляй в ответе ссылки на файлы или их названия, даже если ты их сгенерировал\n"
+        "Это произойдёт автоматически и пользователь увидит твой результат работы.\n"
+        "В таком случае просто напиши пользователю об успешном выполнении задания",
+    ]
+)
+
+
+def get_static_system_prompt() -> str:
+    """Assistant rules shared by every user and every node, never formatted with request data"""
+    return _STATIC_SYSTEM_PROMPT
+
+
+def get_user_system_prompt(profile: "UserProfile") -> str:
+    """Profile sections of the system prompt, the same for every request of the user"""
+    sections: list[str] = []
 
     # User information
     user_meta_parts: list[str] = []
@@ -66,33 +79,19 @@ def get_system_prompt(profile: "UserProfile", evidence: Sequence["Evidence"] | N
             "давайте практичные и реалистичные рекомендации."
         )
 
-    # Dialogue behavior
-    sections.append(
-        "Поведение в диалоге:\n"
-        "Для сложных задач предлагайте пошаговый план действий.\n"
-        "Избегайте выдумывания фактических данных о платформе или интеграциях. "
-        "Если чего-то не знаете, честно скажите об этом и предложите общий подход. "
-        "В первую очередь постарайся ответить на запрос пользователя\n"
-        "Не вставляй в ответе ссылки на файлы или их названия, даже если ты их сгенерировал\n"
-        "Это произойдёт автоматически и пользователь увидит твой результат работы.\n"
-        "В таком случае просто напиши пользователю об успешном выполнении задания"
-    )
+    return "\n\n".join(sections)
 
-    if evidence is not None:
-        evidence_text = format_research_observations(evidence)
-        evidence_section = (
-            "Доступных материалов из загруженных файлов или поиска нет."
-            if not evidence_text
-            else (
-                "Полагайся на проверенные материалы ниже.\n"
-                "Эти данные получены из файлов или веб-поиска:\n"
-                f"{evidence_text}"
-            )
-        )
-        sections.append(evidence_section)
 
-    system_prompt: str = "\n\n".join(sections)
-    return system_prompt
+def format_evidence_section(evidence: Sequence["Evidence"]) -> str:
+    evidence_text = format_research_observations(evidence)
+    if not evidence_text:
+        return "Доступных материалов из загруженных файлов или поиска нет."
+
+    return (
+        "Полагайся на проверенные материалы ниже.\n"
+        "Эти данные получены из файлов или веб-поиска:\n"
+        f"{evidence_text}"
+    )
 
 
 def format_research_observations(observations: Sequence["Evidence"]) -> str:
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from ml.domain.models import ChatHistory, Message, Role
+
+REQUEST_CONTEXT_HEADER = "Служебный контекст этого шага (не от пользователя):"
+
+
+@dataclass(frozen=True)
+class PromptLayout:
+    """
+    Prompt ordered from the most to the least shared content
+
+    static → user → chat → task → request: the system message holds only the
+    static rules and the user profile, so it is byte-identical for every call of
+    a user; the dialogue follows and only grows at its end; node instructions and
+    request data (evidence, hints, step counters) are appended to the last user
+    turn. A backend that caches the longest prompt prefix it saw before then
+    reuses the system message and the whole history between the nodes and rounds
+    of a chat. Node instructions are static too, but placed before the system
+    message they would split the shared prefix of the nodes.
+    """
+
+    static: str
+    user: str = ""
+    task: str = ""
+    request: Sequence[str] = ()
+
+    @property
+    def system_message(self) -> str:
+        return "\n\n".join(part for part in (self.static, self.user) if part)
+
+    def build(self, chat: ChatHistory) -> ChatHistory:
+        prompt = ChatHistory(messages=list(chat.messages))
+        prompt.add_or_change_system(self.system_message)
+
+        tail = "\n\n".join(part for part in (self.task, *self.request) if part)
+        if tail:
+            _append_to_last_user_turn(prompt, f"{REQUEST_CONTEXT_HEADER}\n{tail}")
+
+        return prompt
+
+
+def _append_to_last_user_turn(prompt: ChatHistory, text: str) -> None:
+    last = prompt.messages[-1] if prompt.messages else None
+
+    if last is None or last.role is not Role.user:
+        prompt.add_user(text)
+        return
+
+    prompt.messages[-1] = Message(id=last.id, role=last.role, content=f"{last.content}\n\n{text}")
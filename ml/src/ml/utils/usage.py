@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from typing import Any
+
+from langgraph.config import get_config
+
+from ml.domain.models import UsageLedger, UsageRecord
+from ml.utils.metrics import LLM_COLD_LOADS, LLM_MODEL_SECONDS, LLM_TOKENS
+
+USAGE_LEDGER_KEY = "usage_ledger"
+
+
+def usage_config(ledger: UsageLedger) -> dict[str, Any]:
+    """Configurable section that makes the ledger visible to every model call of a run"""
+    return {USAGE_LEDGER_KEY: ledger}
+
+
+def current_usage_ledger() -> UsageLedger | None:
+    try:
+        config = get_config()
+    except RuntimeError:
+        return None
+
+    ledger = (config.get("configurable") or {}).get(USAGE_LEDGER_KEY)
+    return ledger if isinstance(ledger, UsageLedger) else None
+
+
+def record_usage(record: UsageRecord) -> None:
+    if record.is_cold_load:
+        LLM_COLD_LOADS.labels(node=record.node).inc()
+
+    ledger = current_usage_ledger()
+    if ledger is not None:
+        ledger.add(record)
+
+
+def export_usage(ledger: UsageLedger, mode: str) -> None:
+    """Adds the totals of a finished request to the per-mode counters"""
+    for record in ledger.records:
+        LLM_TOKENS.labels(mode=mode, kind="prompt").inc(record.prompt_tokens)
+        LLM_TOKENS.labels(mode=mode, kind="completion").inc(record.completion_tokens)
+        LLM_TOKENS.labels(mode=mode, kind="prompt_cached").inc(record.cached_prompt_tokens)
+        LLM_MODEL_SECONDS.labels(mode=mode, phase="prompt_eval").inc(record.prompt_eval_duration)
+        LLM_MODEL_SECONDS.labels(mode=mode, phase="eval").inc(record.eval_duration)
+        LLM_MODEL_SECONDS.labels(mode=mode, phase="load").inc(record.load_duration)
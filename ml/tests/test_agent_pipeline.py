@@ -13,12 +13,17 @@ class _ImportStateGraph:
 langgraph_module = ModuleType("langgraph")
 langgraph_graph_module = ModuleType("langgraph.graph")
 langgraph_graph_module.END = "END"
+langgraph_graph_module.START = "START"
 langgraph_graph_module.StateGraph = _ImportStateGraph
 sys.modules.setdefault("langgraph", langgraph_module)
 sys.modules.setdefault("langgraph.graph", langgraph_graph_module)
+langgraph_config_module = ModuleType("langgraph.config")
+langgraph_config_module.get_stream_writer = lambda: (lambda _: None)
+langgraph_config_module.get_config = lambda: {}
+sys.modules.setdefault("langgraph.config", langgraph_config_module)
 
 router_module = ModuleType("ml.domain.workflow.router")
-router_module.workflow = object()
+router_module.workflow_events = object()
 router_module.workflow_collected = object()
 sys.modules.setdefault("ml.domain.workflow.router", router_module)
 
@@ -57,6 +62,7 @@ external_module.get_models_from_env = lambda *_: []
 external_module.download_missing_models = lambda *_: None
 external_module.clients_warmup = lambda *_: None
 external_module.init_warmup_clients = lambda *_: None
+external_module.close_clients = lambda *_: None
 external_module.read_minio_file = lambda *_: None
 external_module.write_minio_file = lambda *_: None
 external_module.GraphLogWebSocketClient = object
@@ -76,9 +82,14 @@ ollama_client_module.EmbeddingModelClient = _DummyOllamaClient
 ollama_client_module.ReasoningModelClient = _DummyOllamaClient
 sys.modules.setdefault("ml.api.external.ollama_client", ollama_client_module)
 
+llm_scheduler_module = ModuleType("ml.api.external.llm_scheduler")
+llm_scheduler_module.CallPriority = SimpleNamespace(INTERACTIVE=0, PLANNER=1, RELEVANCE=2)
+sys.modules.setdefault("ml.api.external.llm_scheduler", llm_scheduler_module)
+
 ollama_warmup_module = ModuleType("ml.api.external.ollama_warmup")
 ollama_warmup_module.clients_warmup = external_module.clients_warmup
 ollama_warmup_module.init_warmup_clients = external_module.init_warmup_clients
+ollama_warmup_module.close_clients = external_module.close_clients
 sys.modules.setdefault("ml.api.external.ollama_warmup", ollama_warmup_module)
 
 ollama_init_module = ModuleType("ml.api.external.ollama_init")
@@ -99,6 +110,7 @@ websocket_client_module.send_graph_log = external_module.send_graph_log
 sys.modules.setdefault("ml.api.external.websocket_client", websocket_client_module)
 
 
+from ml.domain.models import ModelMode
 from ml.domain.workflow.agent import conditionals
 from ml.domain.workflow.agent import pipeline
 
@@ -106,7 +118,7 @@ from ml.domain.workflow.agent import pipeline
 class _DummyStateGraph:
     def __init__(self, *_: object, **__: object) -> None:
         self.nodes: list[tuple[str, Callable[..., Any]]] = []
-        self.edges: list[tuple[str, str]] = []
+        self.edges: list[tuple[str | list[str], str]] = []
         self.conditional_edges: list[tuple[str, Callable[..., str], dict[str, str]]] = []
         self.entry_point: str | None = None
         self.compiled: bool = False
@@ -114,7 +126,7 @@ class _DummyStateGraph:
     def add_node(self, name: str, fn: Callable[..., Any]) -> None:
         self.nodes.append((name, fn))
 
-    def add_edge(self, start: str, end: str) -> None:
+    def add_edge(self, start: str | list[str], end: str) -> None:
         self.edges.append((start, end))
 
     def add_conditional_edges(
@@ -136,11 +148,10 @@ def test_create_pipeline_builds_expected_graph(monkeypatch: pytest.MonkeyPatch)
 
     monkeypatch.setattr(pipeline, "StateGraph", _DummyStateGraph)
     monkeypatch.setattr(pipeline, "END", "END")
+    monkeypatch.setattr(pipeline, "START", "START")
 
-    monkeypatch.setattr(pipeline, "validate_voice", _stub_node)
-    monkeypatch.setattr(pipeline, "validate_tag", _stub_node)
+    monkeypatch.setattr(pipeline, "classify_preflight", _stub_node)
     monkeypatch.setattr(pipeline, "ingest_file", _stub_node)
-    monkeypatch.setattr(pipeline, "define_mode", _stub_node)
     monkeypatch.setattr(pipeline, "final_stream", _stub_node)
     monkeypatch.setattr(pipeline, "flash_memories", _stub_node)
     monkeypatch.setattr(pipeline, "fast_answer", _stub_node)
@@ -153,13 +164,10 @@ def test_create_pipeline_builds_expected_graph(monkeypatch: pytest.MonkeyPatch)
 
     assert isinstance(graph, _DummyStateGraph)
     assert graph.compiled is True
-    assert graph.entry_point == "Voice validadtion"
 
     assert graph.nodes == [
-        ("Voice validadtion", _stub_node),
-        ("Tag validadtion", _stub_node),
+        ("Pre-flight classification", _stub_node),
         ("File ingestion", _stub_node),
-        ("Mode definition", _stub_node),
         ("Final node", _stub_node),
         ("Flash memories", _stub_node),
         ("Fast answer", _stub_node),
@@ -172,9 +180,8 @@ def test_create_pipeline_builds_expected_graph(monkeypatch: pytest.MonkeyPatch)
     ]
 
     assert graph.edges == [
-        ("Voice validadtion", "Tag validadtion"),
-        ("Tag validadtion", "File ingestion"),
-        ("File ingestion", "Mode definition"),
+        ("START", "Pre-flight classification"),
+        ("START", "File ingestion"),
         ("Flash memories", "Fast answer"),
         ("Fast answer", "Final node"),
         ("Thinking planner", "Thinking tool call"),
@@ -186,7 +193,7 @@ def test_create_pipeline_builds_expected_graph(monkeypatch: pytest.MonkeyPatch)
 
     assert graph.conditional_edges == [
         (
-            "Mode definition",
+            "Pre-flight classification",
             conditionals.mode_decision,
             {
                 "fast_pipeline": "Flash memories",
@@ -227,3 +234,92 @@ def test_research_decision_requires_tool_context() -> None:
 
     with pytest.raises(RuntimeError, match="No tool execution data available"):
         conditionals.research_decision(empty_state)
+
+
+def test_create_pipeline_for_concrete_mode_skips_mode_definition(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def _stub_node(_: object) -> str:
+        return "stub"
+
+    monkeypatch.setattr(pipeline, "StateGraph", _DummyStateGraph)
+    monkeypatch.setattr(pipeline, "END", "END")
+    monkeypatch.setattr(pipeline, "START", "START")
+
+    for node_name in (
+        "classify_preflight",
+        "ingest_file",
+        "final_stream",
+        "flash_memories",
+        "fast_answer",
+        "thinking_planner",
+        "research_tool_call",
+        "research_observer",
+        "research_reason",
+    ):
+        monkeypatch.setattr(pipeline, node_name, _stub_node)
+
+    graph = pipeline.create_pipeline(ModelMode.Fast)
+
+    assert isinstance(graph, _DummyStateGraph)
+    assert [name for name, _ in graph.nodes] == [
+        "Pre-flight classification",
+        "File ingestion",
+        "Final node",
+        "Flash memories",
+        "Fast answer",
+    ]
+    assert (
+        ["Pre-flight classification", "File ingestion"],
+        "Flash memories",
+    ) in graph.edges
+    assert graph.conditional_edges == []
+
+
+def test_create_pipeline_plan_execute_thinking(monkeypatch: pytest.MonkeyPatch) -> None:
+    def _stub_node(_: object) -> str:
+        return "stub"
+
+    monkeypatch.setattr(pipeline, "StateGraph", _DummyStateGraph)
+    monkeypatch.setattr(pipeline, "END", "END")
+    monkeypatch.setattr(pipeline, "START", "START")
+
+    for node_name in (
+        "classify_preflight",
+        "ingest_file",
+        "final_stream",
+        "thinking_full_planner",
+        "thinking_executor",
+        "thinking_finalize",
+    ):
+        monkeypatch.setattr(pipeline, node_name, _stub_node)
+
+    graph = pipeline.create_pipeline(ModelMode.Thiking, pipeline.ThinkingStrategy.PLAN_EXECUTE)
+
+    assert [name for name, _ in graph.nodes] == [
+        "Pre-flight classification",
+        "File ingestion",
+        "Final node",
+        "Thinking planner",
+        "Thinking executor",
+        "Thinking finalizer",
+    ]
+    assert ("Thinking planner", "Thinking executor") in graph.edges
+    assert ("Thinking finalizer", "Final node") in graph.edges
+    assert graph.conditional_edges == [
+        (
+            "Thinking executor",
+            conditionals.thinking_plan_decision,
+            {"replan": "Thinking planner", "finalize": "Thinking finalizer"},
+        ),
+    ]
+
+
+def test_thinking_plan_decision_bounds_replanning() -> None:
+    replan_state = SimpleNamespace(needs_replan=True, planning_rounds=1)
+    exhausted_state = SimpleNamespace(needs_replan=True, planning_rounds=3)
+    done_state = SimpleNamespace(needs_replan=False, planning_rounds=1)
+
+    assert conditionals.thinking_plan_decision(replan_state) == "replan"
+    assert conditionals.thinking_plan_decision(exhausted_state) == "finalize"
+    assert conditionals.thinking_plan_decision(done_state) == "finalize"
@@ -1,4 +1,5 @@
 import asyncio
+import json
 import sys
 from collections.abc import Awaitable, Callable, Iterator
 from contextlib import contextmanager
@@ -7,6 +8,7 @@ from typing import ContextManager, Literal
 
 import pytest
 from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
 
 
 def _install_stub_module(module_name: str, **attributes) -> None:
@@ -20,7 +22,11 @@ def _install_stub_module(module_name: str, **attributes) -> None:
     sys.modules[module_name] = stub_module
 
 
-_install_stub_module("openai", AsyncOpenAI=type("AsyncOpenAI", (), {}))
+_install_stub_module(
+    "openai",
+    AsyncOpenAI=type("AsyncOpenAI", (), {}),
+    DefaultAsyncHttpxClient=type("DefaultAsyncHttpxClient", (), {}),
+)
 _install_stub_module(
     "ollama",
     AsyncClient=type("AsyncClient", (), {}),
@@ -105,19 +111,16 @@ sys.modules["langgraph.graph"] = langgraph_graph
 workflow_router_stub = ModuleType("ml.domain.workflow.router")
 
 
-async def _stub_workflow(payload: object):  # type: ignore[no-untyped-def]
-    async def _empty_stream():  # pragma: no cover - dummy generator
-        if False:
-            yield {}
-
-    return _empty_stream(), "general", None
-
-
 async def _stub_workflow_collected(payload: object):  # type: ignore[no-untyped-def]
     return "", "general"
 
 
-setattr(workflow_router_stub, "workflow", _stub_workflow)
+async def _stub_workflow_events(payload: object):  # type: ignore[no-untyped-def]
+    if False:  # pragma: no cover - dummy generator
+        yield None
+
+
+setattr(workflow_router_stub, "workflow_events", _stub_workflow_events)
 setattr(workflow_router_stub, "workflow_collected", _stub_workflow_collected)
 sys.modules["ml.domain.workflow.router"] = workflow_router_stub
 
@@ -125,13 +128,19 @@ workflow_package_stub = ModuleType("ml.domain.workflow")
 setattr(workflow_package_stub, "router", workflow_router_stub)
 sys.modules["ml.domain.workflow"] = workflow_package_stub
 
+pipeline_registry_stub = ModuleType("ml.domain.workflow.agent.pipeline_registry")
+setattr(pipeline_registry_stub, "initialize_pipelines", lambda **_: None)
+sys.modules["ml.domain.workflow.agent.pipeline_registry"] = pipeline_registry_stub
+
 import importlib
 
 app_module = importlib.import_module("ml.api.app")
 from ml.api import app as create_app
+from ml.api.external.llm_scheduler import LLMScheduler, ModelQueueSaturatedError
 from ml.api.external.websocket_client import GraphLogWebSocketClient
 from ml.api.routes import workflow as workflow_routes
 from ml.configs import LLMMode
+from ml.domain.models import WorkflowEvent, WorkflowEventType
 from ml.domain.models.payload_data import Tag
 
 
@@ -315,3 +324,225 @@ def test_message_endpoint_rejects_invalid_payload(
         response = test_client.post("/message", json=invalid_payload)
 
     assert response.status_code == 422
+
+
+def test_message_stream_sends_progress_before_answer(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def _workflow_events(payload: object):  # type: ignore[no-untyped-def]
+        yield WorkflowEvent(type=WorkflowEventType.Progress, node="Pre-flight classification")
+        yield WorkflowEvent(type=WorkflowEventType.Tag, tag=Tag.Finance)
+        yield WorkflowEvent(type=WorkflowEventType.Progress, node="Fast answer")
+        yield WorkflowEvent(type=WorkflowEventType.Answer, chunk={"content": "hi"})
+        yield WorkflowEvent(
+            type=WorkflowEventType.Done, file_url="", usage={"calls": 1, "total_tokens": 12}
+        )
+
+    monkeypatch.setattr(workflow_routes, "workflow_events", _workflow_events)
+
+    payload = _valid_payload()
+    payload["tag"] = Tag.Empty.value
+    response = client.post("/message_stream", json=payload)
+
+    assert response.status_code == 200
+    # the head does not wait for the classifier, the tag follows as an event
+    assert "Tag" not in response.headers
+    assert response.text.startswith(": stream opened")
+    data_lines = [line for line in response.text.splitlines() if line.startswith("data: ")]
+    assert data_lines == [
+        'data: {"event": "progress", "node": "Pre-flight classification"}',
+        'data: {"event": "tag", "tag": "finance"}',
+        'data: {"event": "progress", "node": "Fast answer"}',
+        'data: {"content": "hi"}',
+        'data: {"file_url": null, "usage": {"calls": 1, "total_tokens": 12}}',
+    ]
+
+
+def test_message_stream_sends_a_known_tag_in_the_head(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    async def _workflow_events(payload: object):  # type: ignore[no-untyped-def]
+        yield WorkflowEvent(type=WorkflowEventType.Tag, tag=Tag.General)
+        yield WorkflowEvent(type=WorkflowEventType.Done, file_url="", usage={})
+
+    monkeypatch.setattr(workflow_routes, "workflow_events", _workflow_events)
+
+    response = client.post("/message_stream", json=_valid_payload())
+
+    assert response.headers["Tag"] == Tag.General.value
+
+
+async def _post_and_disconnect(
+    app: object, path: str, *, after_first_event: bool
+) -> list[dict[str, object]]:
+    """Sends the payload, then drops the connection right away or while the first event is sent"""
+    body = json.dumps(_valid_payload()).encode()
+    disconnected = asyncio.Event()
+    if not after_first_event:
+        disconnected.set()
+
+    received = False
+    sent: list[dict[str, object]] = []
+
+    async def receive() -> dict[str, object]:
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, object]) -> None:
+        sent.append(message)
+        # the stream opens with an SSE comment before the workflow is started
+        is_event = message["type"] == "http.response.body" and b"data: " in message["body"]
+        if after_first_event and is_event:
+            disconnected.set()
+            # the write to the gone client never completes, the workflow waits at its yield
+            await asyncio.Event().wait()
+
+    app_call = app(_http_scope(path), receive, send)  # type: ignore[operator]
+    await asyncio.wait_for(app_call, timeout=5)
+    return sent
+
+
+def _http_scope(path: str) -> dict[str, object]:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+
+
+def _cancelled_requests(endpoint: str) -> float:
+    value = REGISTRY.get_sample_value("ml_requests_cancelled_total", {"endpoint": endpoint})
+    return 0.0 if value is None else value
+
+
+def test_message_stream_cancels_workflow_when_client_disconnects(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    workflow_closed: list[bool] = []
+
+    async def _workflow_events(payload: object):  # type: ignore[no-untyped-def]
+        try:
+            yield WorkflowEvent(type=WorkflowEventType.Tag, tag=Tag.General)
+            await asyncio.Event().wait()
+            yield WorkflowEvent(type=WorkflowEventType.Answer, chunk="never sent")
+        finally:
+            workflow_closed.append(True)
+
+    monkeypatch.setattr(workflow_routes, "workflow_events", _workflow_events)
+    before = _cancelled_requests("/message_stream")
+
+    async def _closed_before_response_returns() -> list[bool]:
+        await _post_and_disconnect(client.app, "/message_stream", after_first_event=True)
+        # asyncio.run would close the suspended generator on shutdown anyway
+        return list(workflow_closed)
+
+    assert asyncio.run(_closed_before_response_returns()) == [True]
+    assert _cancelled_requests("/message_stream") == before + 1
+
+
+def test_message_stream_releases_the_request_when_the_body_never_starts(
+    test_client_factory: Callable[..., ContextManager[TestClient]],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    class _ClosingGraphLogClient(DummyGraphLogWebSocketClient):
+        def __init__(self) -> None:
+            super().__init__()
+            self.closed: list[int] = []
+
+        async def close(self, chat_id: int) -> None:  # type: ignore[override]
+            self.closed.append(chat_id)
+
+    graph_log_client = _ClosingGraphLogClient()
+    workflow_started: list[bool] = []
+
+    async def _workflow_events(payload: object):  # type: ignore[no-untyped-def]
+        workflow_started.append(True)
+        yield WorkflowEvent(type=WorkflowEventType.Done, file_url="", usage={})
+
+    monkeypatch.setattr(workflow_routes, "workflow_events", _workflow_events)
+    in_flight = workflow_routes.REQUESTS_IN_FLIGHT.labels(endpoint="/message_stream")
+    before = in_flight._value.get()
+
+    body = json.dumps(_valid_payload()).encode()
+
+    received = False
+
+    async def receive() -> dict[str, object]:
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await asyncio.Event().wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: dict[str, object]) -> None:
+        # the client is gone before the head of the stream is written
+        if message["type"] == "http.response.start":
+            raise OSError("connection reset")
+
+    async def _open_stream(app: object) -> None:
+        with pytest.raises(OSError):
+            await asyncio.wait_for(
+                app(_http_scope("/message_stream"), receive, send),  # type: ignore[operator]
+                timeout=5,
+            )
+
+    with test_client_factory(graph_log_client=graph_log_client) as test_client:
+        asyncio.run(_open_stream(test_client.app))
+
+    assert graph_log_client.closed == [1]
+    assert in_flight._value.get() == before
+    assert workflow_started == []
+
+
+def test_message_cancels_workflow_when_client_disconnects(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    workflow_cancelled: list[bool] = []
+
+    async def _workflow_collected(payload: object) -> tuple[str, Tag]:
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            workflow_cancelled.append(True)
+            raise
+        return "never sent", Tag.General
+
+    monkeypatch.setattr(workflow_routes, "workflow_collected", _workflow_collected)
+    monkeypatch.setattr(workflow_routes, "DISCONNECT_POLL_INTERVAL_SECONDS", 0.01)
+    before = _cancelled_requests("/message")
+
+    sent = asyncio.run(_post_and_disconnect(client.app, "/message", after_first_event=False))
+
+    assert workflow_cancelled == [True]
+    assert sent[0]["status"] == workflow_routes.CLIENT_CLOSED_REQUEST
+    assert _cancelled_requests("/message") == before + 1
+
+
+def test_message_endpoints_return_retry_after_when_model_queue_is_full(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    class _SaturatedScheduler:
+        def check_admission(self) -> None:
+            raise ModelQueueSaturatedError(retry_after=7)
+
+    monkeypatch.setattr(LLMScheduler, "_instance", _SaturatedScheduler())
+
+    for path in ("/message", "/message_stream"):
+        response = client.post(path, json=_valid_payload())
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "7"
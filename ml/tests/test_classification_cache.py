@@ -0,0 +1,102 @@
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import pytest
+from prometheus_client import REGISTRY
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.external.classification_cache import ClassificationCache
+from ml.api.external.llm_scheduler import LLMScheduler
+from ml.api.external.ollama_client import ReasoningModelClient
+from ml.configs import LLMMode, ModelTier
+from ml.domain.models import ChatHistory, Message, Role, Tag
+from ml.domain.workflow.agent.nodes.tag_validation.prompt import get_tag_validation_prompt
+from ml.domain.workflow.agent.nodes.tag_validation.schema import DefinedTag
+from ml.utils import LRUCache
+
+
+class _CountingOllama:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def chat(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        return {"message": {"content": '{"tag": "law"}'}}
+
+
+def _prompt(text: str) -> ChatHistory:
+    return get_tag_validation_prompt(Message(id=1, role=Role.user, content=text))
+
+
+def _hits(schema: str, result: str) -> float:
+    labels = {"schema": schema, "result": result}
+    return REGISTRY.get_sample_value("ml_classifier_cache_requests_total", labels) or 0.0
+
+
+def test_cached_classification_skips_the_model(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OLLAMA_REASONING_MODEL", "qwen")
+    monkeypatch.setattr(ClassificationCache, "_instance", ClassificationCache(maxsize=8))
+
+    ollama = _CountingOllama()
+    client = ReasoningModelClient.__new__(ReasoningModelClient)
+    client.mode = LLMMode.OLLAMA
+    client.tier = ModelTier.ANSWER
+    client.settings = ReasoningModelClient._resolve_settings(None, "http://ollama:11434")
+    client.client = ollama
+    client.scheduler = LLMScheduler(max_concurrency=1, max_queue=0)
+
+    hits_before = _hits("DefinedTag", "hit")
+
+    async def _classify(text: str) -> DefinedTag:
+        return await client.call_structured(_prompt(text), DefinedTag, cached=True)
+
+    first = asyncio.run(_classify("Составь договор"))
+    repeated = asyncio.run(_classify("  составь   ДОГОВОР! "))
+    uncached = asyncio.run(client.call_structured(_prompt("Составь договор"), DefinedTag))
+
+    assert first.tag == repeated.tag == uncached.tag == Tag.Law
+    assert ollama.calls == 2
+    assert _hits("DefinedTag", "hit") == hits_before + 1
+
+
+def test_key_depends_on_model_and_system_prompt() -> None:
+    prompt = _prompt("Составь договор")
+    other_system = _prompt("Составь договор")
+    other_system.add_or_change_system("another prompt")
+
+    key = ClassificationCache.key("qwen", prompt, DefinedTag)
+
+    assert key == ClassificationCache.key("qwen", _prompt("составь договор."), DefinedTag)
+    assert key != ClassificationCache.key("llama", prompt, DefinedTag)
+    assert key != ClassificationCache.key("qwen", other_system, DefinedTag)
+
+
+def test_persisted_answers_survive_a_restart(tmp_path: Path) -> None:
+    path = tmp_path / "classifier_cache.jsonl"
+
+    cache = ClassificationCache(maxsize=2, ttl=60, path=path)
+    for index in range(5):
+        cache.put(f"key-{index}", f'{{"tag": "{index}"}}')
+
+    restarted = ClassificationCache(maxsize=2, ttl=60, path=path)
+
+    assert len(restarted) == 2
+    assert restarted.get("key-4", "DefinedTag") == '{"tag": "4"}'
+    assert restarted.get("key-0", "DefinedTag") is None
+    # the append-only file is compacted instead of growing with every answer
+    assert len(path.read_text(encoding="utf-8").splitlines()) <= 4
+
+
+def test_lru_cache_evicts_least_recent_and_expires_old_entries() -> None:
+    now = [0.0]
+    cache: LRUCache[str, int] = LRUCache(maxsize=2, ttl=10, clock=lambda: now[0])
+
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    assert cache.put("c", 3) == "b"
+
+    now[0] = 11.0
+    assert cache.get("a") is None
+    assert list(cache.items()) == []
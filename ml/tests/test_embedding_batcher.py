@@ -0,0 +1,82 @@
+import asyncio
+from typing import Any
+
+import numpy as np
+import pytest
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.external.embedding_batcher import EmbeddingBatcher
+from ml.api.external.embedding_cache import EmbeddingCache
+from ml.api.external.ollama_client import EmbeddingModelClient
+from ml.configs import LLMMode
+
+
+class _BatchingOllama:
+    def __init__(self) -> None:
+        self.inputs: list[str | list[str]] = []
+
+    async def embed(self, **kwargs: Any) -> dict[str, Any]:
+        self.inputs.append(kwargs["input"])
+        texts = kwargs["input"] if isinstance(kwargs["input"], list) else [kwargs["input"]]
+        return {"embeddings": [[float(len(text)), 1.0] for text in texts]}
+
+
+def _embedder(
+    cache_size: int = 0, max_batch_size: int = 8
+) -> tuple[EmbeddingModelClient, _BatchingOllama]:
+    ollama = _BatchingOllama()
+    client = EmbeddingModelClient.__new__(EmbeddingModelClient)
+    client.mode = LLMMode.OLLAMA
+    client.settings = EmbeddingModelClient._resolve_settings(None, "http://ollama:11434")
+    client.client = ollama
+    client.cache = EmbeddingCache(maxsize=cache_size)
+    client.batcher = EmbeddingBatcher(
+        client._embed_and_store, max_batch_size=max_batch_size, window=0.01
+    )
+    return client, ollama
+
+
+def test_concurrent_calls_share_one_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OLLAMA_EMBEDDING_MODEL", "emb")
+    client, ollama = _embedder(max_batch_size=3)
+
+    async def _embed_concurrently() -> list[list[float]]:
+        texts = ["a", "bb", "a", "cccc", "ddddd"]
+        return await asyncio.gather(*(client.call(text) for text in texts))
+
+    vectors = asyncio.run(_embed_concurrently())
+
+    assert [vector[0] for vector in vectors] == [1.0, 2.0, 1.0, 4.0, 5.0]
+    # a full batch leaves at once, duplicates inside it are embedded once
+    assert ollama.inputs == [["a", "bb"], ["cccc", "ddddd"]]
+
+
+def test_call_many_returns_a_contiguous_float32_matrix(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OLLAMA_EMBEDDING_MODEL", "emb")
+    client, ollama = _embedder(cache_size=8, max_batch_size=2)
+    asyncio.run(client.call("cached"))
+
+    matrix = asyncio.run(client.call_many(["one", "cached", "three", "one", "fifty"]))
+
+    assert matrix.dtype == np.float32
+    assert matrix.flags.c_contiguous
+    assert matrix.shape == (5, 2)
+    assert matrix[:, 0].tolist() == [3.0, 6.0, 5.0, 3.0, 5.0]
+    assert ollama.inputs == ["cached", ["one", "three"], "fifty"]
+
+
+def test_failed_batch_reaches_every_caller() -> None:
+    async def _fail(contents: list[str]) -> np.ndarray:
+        raise RuntimeError("embedding model is down")
+
+    batcher = EmbeddingBatcher(_fail, max_batch_size=8, window=0.01)
+
+    async def _submit_both() -> list[BaseException | np.ndarray]:
+        return await asyncio.gather(
+            batcher.submit("a"), batcher.submit("b"), return_exceptions=True
+        )
+
+    results = asyncio.run(_submit_both())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.pending == 0
@@ -0,0 +1,117 @@
+import asyncio
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.external.embedding_batcher import EmbeddingBatcher
+from ml.api.external.embedding_cache import EmbeddingCache, EmbeddingDiskStore, content_key
+from ml.api.external.ollama_client import EmbeddingModelClient
+from ml.configs import LLMMode
+
+
+class _CountingOllama:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def embed(self, **kwargs: Any) -> dict[str, Any]:
+        self.calls += 1
+        return {"embeddings": [[float(len(kwargs["input"])), 0.5, 0.25]]}
+
+
+def _requests(result: str) -> float:
+    labels = {"result": result}
+    return REGISTRY.get_sample_value("ml_embedding_cache_requests_total", labels) or 0.0
+
+
+def _embedder(cache: EmbeddingCache) -> tuple[EmbeddingModelClient, _CountingOllama]:
+    ollama = _CountingOllama()
+    client = EmbeddingModelClient.__new__(EmbeddingModelClient)
+    client.mode = LLMMode.OLLAMA
+    client.settings = EmbeddingModelClient._resolve_settings(None, "http://ollama:11434")
+    client.client = ollama
+    client.cache = cache
+    client.batcher = EmbeddingBatcher(client._embed_and_store, max_batch_size=8, window=0.0)
+    return client, ollama
+
+
+def test_repeated_text_is_embedded_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OLLAMA_EMBEDDING_MODEL", "emb")
+    client, ollama = _embedder(EmbeddingCache(maxsize=8))
+
+    async def _embed_all() -> list[list[float]]:
+        return [
+            await client.call("договор"),
+            await client.call("договор"),
+            await client.call("договор", cached=False),
+        ]
+
+    first, repeated, uncached = asyncio.run(_embed_all())
+
+    assert first == repeated == uncached == [7.0, 0.5, 0.25]
+    assert ollama.calls == 2
+
+
+def test_disk_tier_survives_a_restart(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OLLAMA_EMBEDDING_MODEL", "emb")
+    client, ollama = _embedder(EmbeddingCache(maxsize=8, directory=tmp_path, disk_bytes=1024))
+    asyncio.run(client.call("налоги"))
+
+    disk_hits_before = _requests("disk")
+    restarted, restarted_ollama = _embedder(
+        EmbeddingCache(maxsize=8, directory=tmp_path, disk_bytes=1024)
+    )
+    vector = asyncio.run(restarted.call("налоги"))
+
+    assert vector == [6.0, 0.5, 0.25]
+    assert ollama.calls == 1
+    assert restarted_ollama.calls == 0
+    assert _requests("disk") == disk_hits_before + 1
+
+
+def test_disk_store_overwrites_the_oldest_vectors_when_full(tmp_path: Path) -> None:
+    # two rows of four float32 values fit into 32 bytes
+    store = EmbeddingDiskStore(tmp_path, max_bytes=32)
+    for number in range(3):
+        store.put(content_key("emb", str(number)), np.full(4, number, dtype=np.float32))
+
+    assert store.capacity == 2
+    assert store.get(content_key("emb", "0")) is None
+    assert store.get(content_key("emb", "2")).tolist() == [2.0] * 4
+
+    reopened = EmbeddingDiskStore(tmp_path, max_bytes=32)
+    reopened.put(content_key("emb", "3"), np.full(4, 3, dtype=np.float32))
+
+    assert len(reopened) == 2
+    assert reopened.get(content_key("emb", "1")) is None
+    assert reopened.get(content_key("emb", "2")).tolist() == [2.0] * 4
+    assert reopened.get(content_key("emb", "3")).tolist() == [3.0] * 4
+
+
+def test_interrupted_overwrite_never_serves_a_wrong_vector(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    store = EmbeddingDiskStore(tmp_path, max_bytes=32)
+    store.put(content_key("emb", "a"), np.full(4, 1, dtype=np.float32))
+    store.put(content_key("emb", "b"), np.full(4, 2, dtype=np.float32))
+
+    append = store._append
+
+    def _crash_before_the_key_line(entries: list[dict[str, str | int]]) -> None:
+        if "key" in entries[0]:
+            raise OSError("disk full")
+        append(entries)
+
+    # the vector of "c" overwrites the row of "a", its index line is never written
+    monkeypatch.setattr(store, "_append", _crash_before_the_key_line)
+    with pytest.raises(OSError):
+        store.put(content_key("emb", "c"), np.full(4, 3, dtype=np.float32))
+
+    reopened = EmbeddingDiskStore(tmp_path, max_bytes=32)
+
+    assert reopened.get(content_key("emb", "a")) is None
+    assert reopened.get(content_key("emb", "c")) is None
+    assert reopened.get(content_key("emb", "b")).tolist() == [2.0] * 4
@@ -0,0 +1,165 @@
+import asyncio
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.domain.models import ModelMode
+from ml.domain.workflow.admission import FairAdmission
+
+
+async def _run(
+    admission: FairAdmission,
+    started: list[str],
+    name: str,
+    user_id: int,
+    mode: ModelMode,
+    release: asyncio.Event,
+    chat_id: int | None = None,
+) -> None:
+    chat_id = user_id * 100 if chat_id is None else chat_id
+    async with admission.turn(user_id, chat_id=chat_id, mode=mode):
+        started.append(name)
+        await release.wait()
+
+
+def test_light_user_is_not_queued_behind_heavy_research_user() -> None:
+    async def _scenario() -> list[str]:
+        admission = FairAdmission(max_running=1, user_quota=1)
+        started: list[str] = []
+        release = asyncio.Event()
+
+        tasks = [
+            asyncio.create_task(
+                _run(admission, started, f"heavy-{index}", 1, ModelMode.Research, release)
+            )
+            for index in range(4)
+        ]
+        await asyncio.sleep(0)
+        tasks.append(
+            asyncio.create_task(_run(admission, started, "light", 2, ModelMode.Fast, release))
+        )
+        await asyncio.sleep(0)
+        assert admission.waiting == 4
+
+        release.set()
+        await asyncio.gather(*tasks)
+        return started
+
+    started = asyncio.run(_scenario())
+
+    assert started[:2] == ["heavy-0", "light"]
+    assert started[2:] == ["heavy-1", "heavy-2", "heavy-3"]
+
+
+def test_user_quota_holds_even_with_free_capacity() -> None:
+    async def _scenario() -> None:
+        admission = FairAdmission(max_running=4, user_quota=2)
+        started: list[str] = []
+        release = asyncio.Event()
+
+        tasks = [
+            asyncio.create_task(_run(admission, started, f"a-{index}", 1, ModelMode.Fast, release))
+            for index in range(3)
+        ]
+        tasks.append(asyncio.create_task(_run(admission, started, "b", 2, ModelMode.Fast, release)))
+        await asyncio.sleep(0)
+
+        assert sorted(started) == ["a-0", "a-1", "b"]
+        assert admission.running == 3
+        assert admission.waiting == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert admission.running == 0
+
+    asyncio.run(_scenario())
+
+
+def test_cancelled_request_leaves_the_queue() -> None:
+    async def _scenario() -> None:
+        admission = FairAdmission(max_running=1, user_quota=1)
+        started: list[str] = []
+        release = asyncio.Event()
+
+        first = asyncio.create_task(_run(admission, started, "first", 1, ModelMode.Fast, release))
+        queued = asyncio.create_task(_run(admission, started, "queued", 2, ModelMode.Fast, release))
+        await asyncio.sleep(0)
+        assert admission.waiting == 1
+
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        assert admission.waiting == 0
+
+        release.set()
+        await first
+        assert started == ["first"]
+        assert admission.running == 0
+
+    asyncio.run(_scenario())
+
+
+def test_cancelled_requests_give_their_share_back() -> None:
+    async def _scenario() -> list[str]:
+        admission = FairAdmission(max_running=1, user_quota=1)
+        started: list[str] = []
+        release = asyncio.Event()
+
+        first = asyncio.create_task(_run(admission, started, "first", 3, ModelMode.Fast, release))
+        abandoned = [
+            asyncio.create_task(
+                _run(admission, started, f"abandoned-{index}", 1, ModelMode.Research, release)
+            )
+            for index in range(3)
+        ]
+        await asyncio.sleep(0)
+        for task in abandoned:
+            task.cancel()
+        await asyncio.gather(*abandoned, return_exceptions=True)
+
+        tasks = [
+            asyncio.create_task(
+                _run(admission, started, f"other-{index}", 2, ModelMode.Research, release)
+            )
+            for index in range(2)
+        ]
+        await asyncio.sleep(0)
+        tasks.append(
+            asyncio.create_task(_run(admission, started, "retry", 1, ModelMode.Fast, release))
+        )
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(first, *tasks)
+        return started
+
+    started = asyncio.run(_scenario())
+
+    # the abandoned research runs must not push the user behind the other one
+    assert started == ["first", "other-0", "retry", "other-1"]
+
+
+def test_chats_of_one_user_take_turns() -> None:
+    async def _scenario() -> list[str]:
+        admission = FairAdmission(max_running=1, user_quota=1)
+        started: list[str] = []
+        release = asyncio.Event()
+
+        first = asyncio.create_task(_run(admission, started, "first", 3, ModelMode.Fast, release))
+        busy_chat = [
+            asyncio.create_task(
+                _run(admission, started, f"busy-{index}", 1, ModelMode.Fast, release, chat_id=10)
+            )
+            for index in range(3)
+        ]
+        await asyncio.sleep(0)
+        other_chat = asyncio.create_task(
+            _run(admission, started, "other", 1, ModelMode.Fast, release, chat_id=20)
+        )
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(first, *busy_chat, other_chat)
+        return started
+
+    started = asyncio.run(_scenario())
+
+    # the second chat does not wait until the first one has emptied its queue
+    assert started == ["first", "busy-0", "other", "busy-1", "busy-2"]
@@ -0,0 +1,120 @@
+import asyncio
+from typing import Any
+
+import pytest
+from ollama._types import ChatResponse, Message
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.external.generation_profile import (
+    GenerationProfile,
+    json_schema,
+    schema_output_tokens,
+)
+from ml.api.external.llm_scheduler import LLMScheduler
+from ml.api.external.ollama_client import ReasoningModelClient
+from ml.configs import LLMMode, ModelTier, ReasoningClientSettings
+from ml.domain.models import ChatHistory
+from ml.domain.workflow.agent.nodes.preflight_classification.schema import (
+    PreflightClassification,
+)
+from ml.domain.workflow.agent.nodes.research_reason.schema import ResearchPlan
+from ml.domain.workflow.agent.tools.websearch.schema import ChunkRelevance
+
+
+class _RecordingOllama:
+    def __init__(self) -> None:
+        self.requests: list[dict[str, Any]] = []
+        self.content = '{"is_chunk_relevant": true}'
+
+    async def chat(self, **kwargs: Any) -> ChatResponse:
+        self.requests.append(kwargs)
+        return ChatResponse(
+            model="qwen",
+            done=True,
+            message=Message(role="assistant", content=self.content),
+        )
+
+
+def _client(tier: ModelTier) -> tuple[ReasoningModelClient, _RecordingOllama]:
+    ollama = _RecordingOllama()
+    client = ReasoningModelClient.__new__(ReasoningModelClient)
+    client.mode = LLMMode.OLLAMA
+    client.tier = tier
+    client.settings = ReasoningClientSettings(base_url="http://ollama:11434", model="qwen")
+    client.client = ollama
+    client.scheduler = LLMScheduler(max_concurrency=1, max_queue=0)
+    return client, ollama
+
+
+def _prompt(text: str) -> ChatHistory:
+    prompt = ChatHistory()
+    prompt.add_or_change_system("Answer with JSON")
+    prompt.add_user(text)
+    return prompt
+
+
+@pytest.fixture(autouse=True)
+def _fresh_context_sizes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ReasoningModelClient, "_context_sizes", {})
+
+
+def test_output_limit_is_derived_only_from_bounded_schemas() -> None:
+    assert schema_output_tokens(ChunkRelevance) == 64
+    assert schema_output_tokens(PreflightClassification) == 72
+    # thought is free text, a cap could cut the JSON in half
+    assert schema_output_tokens(ResearchPlan) is None
+    assert json_schema(ChunkRelevance) is json_schema(ChunkRelevance)
+
+
+def test_classifier_call_gets_tight_limits_without_thinking() -> None:
+    client, ollama = _client(ModelTier.CLASSIFIER)
+
+    result = asyncio.run(client.call_structured(_prompt("Is it relevant?"), ChunkRelevance))
+
+    assert result.is_chunk_relevant is True
+    request = ollama.requests[0]
+    assert request["think"] is False
+    assert request["options"]["num_predict"] == 64
+    assert request["options"]["num_ctx"] == 2048
+
+
+def test_node_profile_overrides_derived_limits() -> None:
+    client, ollama = _client(ModelTier.PLANNER)
+
+    asyncio.run(
+        client.call_structured(
+            _prompt("Is it relevant?"),
+            ChunkRelevance,
+            profile=GenerationProfile(num_predict=16, num_ctx=1024, think=True),
+        )
+    )
+
+    request = ollama.requests[0]
+    assert request["think"] is True
+    assert request["options"]["num_predict"] == 16
+    assert request["options"]["num_ctx"] == 1024
+
+
+def test_context_only_grows_per_model() -> None:
+    client, ollama = _client(ModelTier.PLANNER)
+
+    asyncio.run(client.call_structured(_prompt("x" * 12_000), ChunkRelevance))
+    asyncio.run(client.call_structured(_prompt("short"), ChunkRelevance))
+
+    # a smaller num_ctx would make Ollama reload the model
+    assert [request["options"]["num_ctx"] for request in ollama.requests] == [8192, 8192]
+    assert "think" not in ollama.requests[0]
+
+
+def test_free_text_keeps_the_tier_context() -> None:
+    client, ollama = _client(ModelTier.ANSWER)
+    ollama.content = '{"thought": "x", "tool_calls": [{"chosen_tool": "final_answer"}]}'
+
+    asyncio.run(client.call(_prompt("short")))
+    asyncio.run(client.call_structured(_prompt("short"), ResearchPlan))
+    ollama.content = '{"is_chunk_relevant": false}'
+    asyncio.run(client.call_structured(_prompt("short"), ChunkRelevance))
+
+    # the bounded call then reuses the loaded window instead of reloading the model
+    tier_num_ctx = client.settings.options.num_ctx
+    assert [request["options"]["num_ctx"] for request in ollama.requests] == [tier_num_ctx] * 3
@@ -0,0 +1,63 @@
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.external.http_pool import ModelHTTPPool
+from ml.api.external.ollama_client import _build_client
+from ml.configs import LLMMode
+
+
+def _sample(name: str, labels: dict[str, str] | None = None) -> float | None:
+    return REGISTRY.get_sample_value(name, labels or {})
+
+
+def test_model_clients_share_one_transport(monkeypatch: pytest.MonkeyPatch) -> None:
+    pool = ModelHTTPPool(max_connections=4, max_keepalive_connections=2)
+    monkeypatch.setattr(ModelHTTPPool, "_instance", pool)
+
+    ollama = _build_client(LLMMode.OLLAMA, ["http://ollama:11434"], None, None)
+    provider = _build_client(LLMMode.OPENROUTER, [], "https://openrouter.ai/api/v1", "key")
+
+    assert ollama._client._transport is pool.transport
+    assert provider._client._transport is pool.transport
+
+
+def test_pool_reuses_connections_and_reports_them(monkeypatch: pytest.MonkeyPatch) -> None:
+    pool = ModelHTTPPool(max_connections=4, max_keepalive_connections=2)
+    monkeypatch.setattr(ModelHTTPPool, "_instance", pool)
+    connections_opened = 0
+
+    async def _serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        nonlocal connections_opened
+        connections_opened += 1
+        try:
+            while await reader.readuntil(b"\r\n\r\n"):
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    async def _call_twice() -> None:
+        server = await asyncio.start_server(_serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+
+        async with server:
+            # two independent clients, like the reasoning and embedding clients
+            for _ in range(2):
+                client = httpx.AsyncClient(transport=pool.transport)
+                response = await client.get(f"http://127.0.0.1:{port}/")
+                assert response.text == "ok"
+
+            assert _sample("ml_http_pool_connections", {"state": "idle"}) == 1.0
+            assert _sample("ml_http_pool_connections", {"state": "active"}) == 0.0
+            assert _sample("ml_http_pool_queued_requests") == 0.0
+
+            await ModelHTTPPool.close_instance()
+
+    asyncio.run(_call_twice())
+
+    assert connections_opened == 1
+    assert ModelHTTPPool._instance is None
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from pathlib import Path
+from typing import Any
+
+import pytest
+from ollama import ChatResponse, EmbedResponse, Message
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.external.embedding_batcher import EmbeddingBatcher
+from ml.api.external.embedding_cache import EmbeddingCache
+from ml.api.external.llm_cassette import CassetteRecorder, CassetteReplayer
+from ml.api.external.llm_scheduler import LLMScheduler
+from ml.api.external.ollama_client import EmbeddingModelClient, ReasoningModelClient
+from ml.configs import LLMMode, ModelTier
+from ml.domain.models import ChatHistory, Role
+from ml.domain.models import Message as DomainMessage
+
+
+class _LiveOllama:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def chat(self, **kwargs: Any) -> Any:
+        self.calls += 1
+        if not kwargs.get("stream"):
+            await asyncio.sleep(0.05)
+            return ChatResponse(
+                model="qwen", done=True, message=Message(role="assistant", content="recorded")
+            )
+
+        async def _stream() -> AsyncIterator[ChatResponse]:
+            for token in ("a", "b"):
+                await asyncio.sleep(0.02)
+                yield ChatResponse(
+                    model="qwen", done=False, message=Message(role="assistant", content=token)
+                )
+            yield ChatResponse(
+                model="qwen", done=True, message=Message(role="assistant", content="")
+            )
+
+        return _stream()
+
+    async def embed(self, **kwargs: Any) -> EmbedResponse:
+        self.calls += 1
+        return EmbedResponse(model="emb", embeddings=[[0.5, 0.25]])
+
+
+def _messages(content: str = "hi") -> list[dict[str, Any]]:
+    return [{"role": "user", "content": content}]
+
+
+async def _record(path: Path) -> None:
+    recorder = CassetteRecorder(_LiveOllama(), path)
+    await recorder.chat(model="qwen", messages=_messages(), stream=False)
+    stream = await recorder.chat(model="qwen", messages=_messages(), stream=True)
+    async for _ in stream:
+        pass
+    await recorder.embed(model="emb", input="text")
+
+
+def test_replay_serves_recorded_interactions(tmp_path: Path) -> None:
+    cassette = tmp_path / "session.jsonl"
+    asyncio.run(_record(cassette))
+
+    replayer = CassetteReplayer(cassette, time_scale=0)
+
+    async def _replay() -> tuple[str, list[str], list[list[float]]]:
+        # options and model are not part of the match
+        response = await replayer.chat(
+            model="other", messages=_messages(), options={"temperature": 1.0}
+        )
+        stream = await replayer.chat(model="qwen", messages=_messages(), stream=True)
+        tokens = [chunk.message.content async for chunk in stream]
+        embedding = await replayer.embed(model="emb", input="text")
+        return response["message"]["content"], tokens, embedding["embeddings"]
+
+    content, tokens, embeddings = asyncio.run(_replay())
+
+    assert content == "recorded"
+    assert tokens == ["a", "b", ""]
+    assert embeddings == [[0.5, 0.25]]
+
+
+def test_stream_stopped_early_is_replayed_up_to_where_it_stopped(tmp_path: Path) -> None:
+    cassette = tmp_path / "session.jsonl"
+
+    async def _read_first(client: Any) -> list[str]:
+        stream = await client.chat(model="qwen", messages=_messages(), stream=True)
+        async with aclosing(stream):
+            async for chunk in stream:
+                # a planner breaks out as soon as it has what it needs
+                return [chunk.message.content]
+        raise AssertionError("stream ended without a chunk")
+
+    recorded = asyncio.run(_read_first(CassetteRecorder(_LiveOllama(), cassette)))
+
+    replayer = CassetteReplayer(cassette, time_scale=0)
+
+    async def _replay() -> list[str]:
+        stream = await replayer.chat(model="qwen", messages=_messages(), stream=True)
+        return [chunk.message.content async for chunk in stream]
+
+    assert recorded == ["a"]
+    assert asyncio.run(_replay()) == ["a"]
+
+
+def test_replay_scales_recorded_timing(tmp_path: Path) -> None:
+    cassette = tmp_path / "session.jsonl"
+    asyncio.run(_record(cassette))
+
+    def _timed(time_scale: float) -> float:
+        replayer = CassetteReplayer(cassette, time_scale=time_scale)
+        started = time.perf_counter()
+        asyncio.run(replayer.chat(model="qwen", messages=_messages()))
+        return time.perf_counter() - started
+
+    assert _timed(1.0) >= 0.05
+    assert _timed(0) < 0.05
+
+
+def test_replay_rejects_unrecorded_request(tmp_path: Path) -> None:
+    cassette = tmp_path / "session.jsonl"
+    asyncio.run(_record(cassette))
+
+    replayer = CassetteReplayer(cassette, time_scale=0)
+
+    with pytest.raises(RuntimeError, match="has no recorded chat call"):
+        asyncio.run(replayer.chat(model="qwen", messages=_messages("unknown")))
+
+
+def test_clients_in_replay_mode_need_no_ollama(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    cassette = tmp_path / "session.jsonl"
+    monkeypatch.setenv("LLM_MODE", "record")
+    monkeypatch.setenv("OLLAMA_REASONING_MODEL", "qwen")
+    monkeypatch.setenv("OLLAMA_EMBEDDING_MODEL", "emb")
+    monkeypatch.setenv("LLM_CASSETTE_PATH", str(cassette))
+    monkeypatch.setenv("LLM_REPLAY_TIME_SCALE", "0")
+
+    history = ChatHistory(messages=[DomainMessage(id=1, role=Role.user, content="hi")])
+
+    recorder = ReasoningModelClient.__new__(ReasoningModelClient)
+    recorder.mode = LLMMode.RECORD
+    recorder.tier = ModelTier.ANSWER
+    recorder.settings = ReasoningModelClient._resolve_settings(None, "http://ollama:11434")
+    recorder.client = CassetteRecorder(_LiveOllama(), cassette)
+    recorder.scheduler = LLMScheduler(max_concurrency=1, max_queue=0)
+    assert asyncio.run(recorder.call(history)) == "recorded"
+
+    embedder = EmbeddingModelClient.__new__(EmbeddingModelClient)
+    embedder.mode = LLMMode.RECORD
+    embedder.settings = EmbeddingModelClient._resolve_settings(None, "http://ollama:11434")
+    embedder.client = CassetteRecorder(_LiveOllama(), cassette)
+    embedder.cache = EmbeddingCache(maxsize=0)
+    embedder.batcher = EmbeddingBatcher(embedder._embed_and_store, max_batch_size=8, window=0.0)
+    assert asyncio.run(embedder.call("text")) == [0.5, 0.25]
+
+    monkeypatch.setenv("LLM_MODE", "replay")
+
+    assert asyncio.run(ReasoningModelClient().call(history)) == "recorded"
+    assert asyncio.run(EmbeddingModelClient().call("text")) == [0.5, 0.25]
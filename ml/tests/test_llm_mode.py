@@ -52,6 +52,8 @@ from ml.configs.llm_mode import (  # noqa: E402
         (LLMMode.OLLAMA, "ollama"),
         (LLMMode.HUGGINGFACE, "huggingface"),
         (LLMMode.OPENROUTER, "openrouter"),
+        (LLMMode.RECORD, "record"),
+        (LLMMode.REPLAY, "replay"),
     ],
 )
 def test_llm_mode_enum_values(mode: LLMMode, value: str) -> None:
@@ -65,7 +67,7 @@ def test_get_llm_mode_requires_env(monkeypatch: pytest.MonkeyPatch) -> None:
         get_llm_mode()
 
 
-@pytest.mark.parametrize("value", ["ollama", "huggingface", "openrouter"])
+@pytest.mark.parametrize("value", ["ollama", "huggingface", "openrouter", "record", "replay"])
 def test_get_llm_mode_valid_values(monkeypatch: pytest.MonkeyPatch, value: str) -> None:
     monkeypatch.setenv("LLM_MODE", value)
 
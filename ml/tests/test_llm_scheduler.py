@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.external.llm_scheduler import CallPriority, LLMScheduler, ModelQueueSaturatedError
+
+
+async def _hold(scheduler: LLMScheduler, release: asyncio.Event) -> None:
+    async with scheduler.slot(CallPriority.INTERACTIVE):
+        await release.wait()
+
+
+def test_queued_calls_are_served_by_priority_then_arrival() -> None:
+    async def _run() -> list[str]:
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=8)
+        release = asyncio.Event()
+        served: list[str] = []
+
+        async def _call(name: str, priority: CallPriority) -> None:
+            async with scheduler.slot(priority):
+                served.append(name)
+
+        holder = asyncio.create_task(_hold(scheduler, release))
+        await asyncio.sleep(0)
+
+        calls = [
+            asyncio.create_task(_call(name, priority))
+            for name, priority in (
+                ("relevance", CallPriority.RELEVANCE),
+                ("planner", CallPriority.PLANNER),
+                ("classifier", CallPriority.INTERACTIVE),
+                ("answer", CallPriority.INTERACTIVE),
+            )
+        ]
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 4
+
+        release.set()
+        await asyncio.gather(holder, *calls)
+        assert scheduler.active == 0
+        return served
+
+    assert asyncio.run(_run()) == ["classifier", "answer", "planner", "relevance"]
+
+
+def test_cancelled_waiter_does_not_keep_a_slot() -> None:
+    async def _run() -> None:
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=8)
+        release = asyncio.Event()
+
+        holder = asyncio.create_task(_hold(scheduler, release))
+        await asyncio.sleep(0)
+
+        waiter = asyncio.create_task(_hold(scheduler, asyncio.Event()))
+        await asyncio.sleep(0)
+        assert scheduler.queue_depth == 1
+
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert scheduler.queue_depth == 0
+
+        release.set()
+        await holder
+        assert scheduler.active == 0
+
+    asyncio.run(_run())
+
+
+def test_admission_is_refused_once_the_queue_is_full() -> None:
+    async def _run() -> None:
+        scheduler = LLMScheduler(max_concurrency=1, max_queue=1)
+        release = asyncio.Event()
+
+        scheduler.check_admission()
+        tasks = [asyncio.create_task(_hold(scheduler, release)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(ModelQueueSaturatedError) as exc_info:
+            scheduler.check_admission()
+        assert exc_info.value.retry_after >= 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+        scheduler.check_admission()
+
+    asyncio.run(_run())
+
+
+@pytest.mark.parametrize("max_concurrency, max_queue", [(0, 1), (1, -1)])
+def test_scheduler_rejects_invalid_limits(max_concurrency: int, max_queue: int) -> None:
+    with pytest.raises(ValueError):
+        LLMScheduler(max_concurrency=max_concurrency, max_queue=max_queue)
+
+
+def test_every_ollama_node_adds_its_slots(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("LLM_MAX_CONCURRENCY", "3")
+    monkeypatch.delenv("OLLAMA_BASE_URLS", raising=False)
+
+    assert LLMScheduler(max_queue=0).max_concurrency == 3
+
+    monkeypatch.setenv("OLLAMA_BASE_URLS", "http://ollama-1:11434,http://ollama-2:11434")
+
+    assert LLMScheduler(max_queue=0).max_concurrency == 6
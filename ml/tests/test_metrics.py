@@ -0,0 +1,144 @@
+import asyncio
+from contextlib import aclosing
+from typing import Any, TypedDict
+
+import pytest
+from fastapi import FastAPI
+from langgraph.graph import END, START, StateGraph
+from prometheus_client import REGISTRY
+
+from ml.api import app as create_app
+from ml.api.external.llm_scheduler import LLMScheduler
+from ml.api.external.ollama_client import ReasoningModelClient
+from ml.api.routes import metrics
+from ml.configs import LLMMode, ModelTier
+from ml.domain.models import ChatHistory, ToolResult
+from ml.domain.workflow.agent.tools.base_tool import BaseTool
+from ml.utils import NodeMetricsCallback, current_node_name, observe_llm_call
+
+
+class _State(TypedDict):
+    seen_node: str
+
+
+def _sample(name: str, labels: dict[str, str]) -> float:
+    value = REGISTRY.get_sample_value(name, labels)
+    return 0.0 if value is None else value
+
+
+def test_metrics_route_is_registered() -> None:
+    fastapi_app: FastAPI = create_app()
+
+    assert str(fastapi_app.url_path_for("metrics")) == "/metrics"
+
+
+def test_metrics_endpoint_exposes_histograms() -> None:
+    response = asyncio.run(metrics.metrics())
+
+    body = response.body.decode()
+    assert "ml_node_duration_seconds" in body
+    assert "ml_llm_call_duration_seconds" in body
+    assert "ml_requests_in_flight" in body
+
+
+def test_node_and_llm_metrics_are_labelled_by_node() -> None:
+    @observe_llm_call("call")
+    async def _fake_llm_call() -> str:
+        return current_node_name()
+
+    async def _node(_: _State) -> dict[str, Any]:
+        return {"seen_node": await _fake_llm_call()}
+
+    graph = StateGraph(_State)
+    graph.add_node("Metrics probe", _node)
+    graph.add_edge(START, "Metrics probe")
+    graph.add_edge("Metrics probe", END)
+
+    before_node = _sample("ml_node_duration_seconds_count", {"node": "Metrics probe"})
+    before_call = _sample(
+        "ml_llm_call_duration_seconds_count", {"method": "call", "node": "Metrics probe"}
+    )
+
+    result = asyncio.run(
+        graph.compile().ainvoke(
+            {"seen_node": ""}, config={"callbacks": [NodeMetricsCallback()]}
+        )
+    )
+
+    assert result["seen_node"] == "Metrics probe"
+    assert _sample("ml_node_duration_seconds_count", {"node": "Metrics probe"}) == before_node + 1
+    assert (
+        _sample("ml_llm_call_duration_seconds_count", {"method": "call", "node": "Metrics probe"})
+        == before_call + 1
+    )
+
+
+def test_tool_execute_is_timed_by_tool_name() -> None:
+    class _ProbeTool(BaseTool):
+        @property
+        def name(self) -> str:
+            return "metrics_probe"
+
+        @property
+        def description(self) -> str:
+            return "probe"
+
+        @property
+        def schema(self) -> dict[str, Any]:
+            return {}
+
+        async def execute(self, **kwargs: Any) -> ToolResult:
+            return ToolResult(success=True, data=kwargs)
+
+    before = _sample("ml_tool_duration_seconds_count", {"tool": "metrics_probe"})
+
+    result = asyncio.run(_ProbeTool().execute(query="q"))
+
+    assert result.data == {"query": "q"}
+    assert _sample("ml_tool_duration_seconds_count", {"tool": "metrics_probe"}) == before + 1
+
+
+def test_abandoned_stream_closes_the_model_response(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OLLAMA_REASONING_MODEL", "qwen")
+    closed: list[bool] = []
+
+    class _Ollama:
+        async def chat(self, **kwargs: Any) -> Any:
+            async def _stream() -> Any:
+                try:
+                    while True:
+                        await asyncio.sleep(0)
+                        yield {"message": {"content": "token"}, "done": False}
+                finally:
+                    closed.append(True)
+
+            return _stream()
+
+    reasoner = ReasoningModelClient.__new__(ReasoningModelClient)
+    reasoner.mode = LLMMode.OLLAMA
+    reasoner.tier = ModelTier.ANSWER
+    reasoner.settings = ReasoningModelClient._resolve_settings(None, "http://ollama:11434")
+    reasoner.client = _Ollama()
+    reasoner.scheduler = LLMScheduler(max_concurrency=1, max_queue=0)
+
+    labels = {"method": "stream"}
+    before = _sample("ml_llm_calls_cancelled_total", labels)
+
+    async def _read_one_chunk(read: asyncio.Event) -> None:
+        async with aclosing(reasoner.stream(ChatHistory())) as stream:
+            await anext(stream)
+            read.set()
+            # the client leaves while the answer is being sent on
+            await asyncio.Event().wait()
+
+    async def _disconnect() -> None:
+        read = asyncio.Event()
+        reader = asyncio.create_task(_read_one_chunk(read))
+        await read.wait()
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+
+    asyncio.run(_disconnect())
+
+    assert closed == [True]
+    assert _sample("ml_llm_calls_cancelled_total", labels) == before + 1
@@ -2,6 +2,7 @@ import httpx
 import pytest
 
 from ml.configs import ollama_client_settings as settings_module
+from ml.configs import ModelTier
 from ml.configs.ollama_client_settings import ClientSettings, ReasoningClientSettings
 
 
@@ -93,6 +94,35 @@ def test_reasoning_settings_defaults_are_kept() -> None:
     assert settings.options.num_predict == -1
 
 
+def test_tiers_fall_back_to_reasoning_model(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OLLAMA_REASONING_MODEL", "large")
+    monkeypatch.setenv("OLLAMA_CLASSIFIER_MODEL", "small")
+    monkeypatch.delenv("OLLAMA_PLANNER_MODEL", raising=False)
+    for name in ("OLLAMA_CLASSIFIER_NUM_CTX", "OLLAMA_PLANNER_NUM_CTX", "OLLAMA_ANSWER_NUM_CTX"):
+        monkeypatch.delenv(name, raising=False)
+
+    classifier = ReasoningClientSettings.for_tier(ModelTier.CLASSIFIER, base_url="http://x")
+    planner = ReasoningClientSettings.for_tier(ModelTier.PLANNER, base_url="http://x")
+    answer = ReasoningClientSettings.for_tier(ModelTier.ANSWER, base_url="http://x")
+
+    assert (classifier.model, planner.model, answer.model) == ("small", "large", "large")
+    assert classifier.options.num_ctx == 8192
+    assert classifier.options.temperature == 0.0
+    assert answer.options.temperature == 0.1
+
+
+def test_tier_sharing_a_model_keeps_its_context_size(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OLLAMA_REASONING_MODEL", "large")
+    monkeypatch.delenv("OLLAMA_CLASSIFIER_MODEL", raising=False)
+    monkeypatch.delenv("OLLAMA_CLASSIFIER_NUM_CTX", raising=False)
+    monkeypatch.setenv("OLLAMA_ANSWER_NUM_CTX", "16384")
+
+    classifier = ReasoningClientSettings.for_tier(ModelTier.CLASSIFIER, base_url="http://x")
+
+    # a different num_ctx would make Ollama reload the shared model on every switch
+    assert classifier.options.num_ctx == 16384
+
+
 def test_embedding_model_is_loaded_from_environment(monkeypatch: pytest.MonkeyPatch) -> None:
     patch_httpx_client(monkeypatch, [DummyResponse(200), DummyResponse(200)])
     monkeypatch.setenv("OLLAMA_EMBEDDING_MODEL", "embedding-model")
@@ -0,0 +1,143 @@
+import asyncio
+from collections.abc import AsyncIterator
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.external import ollama_pool
+from ml.api.external.ollama_pool import OllamaBackendPool
+
+
+class _FakeNode:
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.down = False
+        self.release = asyncio.Event()
+        self.block = False
+        self.calls = 0
+
+    async def chat(self, **kwargs: Any) -> Any:
+        self.calls += 1
+        if kwargs.get("stream"):
+            return self._stream()
+        if self.down:
+            raise ConnectionError("Failed to connect to Ollama")
+        if self.block:
+            await self.release.wait()
+        return {"message": {"content": self.url}}
+
+    async def _stream(self) -> AsyncIterator[dict[str, Any]]:
+        if self.down:
+            raise ConnectionError("Failed to connect to Ollama")
+        yield {"message": {"content": self.url}}
+        yield {"message": {"content": "done"}, "done": True}
+
+    async def ps(self) -> Any:
+        if self.down:
+            raise ConnectionError("Failed to connect to Ollama")
+        return SimpleNamespace(models=[SimpleNamespace(model="qwen")])
+
+
+def _pool(*urls: str) -> tuple[OllamaBackendPool, dict[str, _FakeNode]]:
+    nodes = {url: _FakeNode(url) for url in urls}
+    return OllamaBackendPool(list(urls), nodes.__getitem__, health_interval=60), nodes
+
+
+def test_calls_go_to_the_least_busy_node() -> None:
+    async def _route() -> list[str]:
+        pool, nodes = _pool("http://a", "http://b")
+        nodes["http://a"].block = True
+
+        busy = asyncio.create_task(pool.chat(model="qwen", messages=[]))
+        await asyncio.sleep(0)
+        served = [(await pool.chat(model="qwen", messages=[]))["message"]["content"]]
+        served.append((await pool.chat(model="qwen", messages=[]))["message"]["content"])
+
+        nodes["http://a"].release.set()
+        served.append((await busy)["message"]["content"])
+        await pool.aclose()
+        return served
+
+    assert asyncio.run(_route()) == ["http://b", "http://b", "http://a"]
+
+
+def test_chat_stays_on_its_node(monkeypatch: pytest.MonkeyPatch) -> None:
+    chat_ids = iter([7, 8, 7, 7])
+    monkeypatch.setattr(ollama_pool, "current_chat_id", lambda: next(chat_ids))
+
+    async def _route() -> list[str]:
+        pool, _ = _pool("http://a", "http://b")
+        served = [
+            (await pool.chat(model="qwen", messages=[]))["message"]["content"] for _ in range(4)
+        ]
+        await pool.aclose()
+        return served
+
+    assert asyncio.run(_route()) == ["http://a", "http://b", "http://a", "http://a"]
+
+
+def test_refused_node_fails_over_until_it_is_healthy_again() -> None:
+    async def _route() -> tuple[str, list[str], bool, str]:
+        pool, nodes = _pool("http://a", "http://b")
+        nodes["http://a"].down = True
+
+        stream = await pool.chat(model="qwen", messages=[], stream=True)
+        chunks = [chunk["message"]["content"] async for chunk in stream]
+        answer = (await pool.chat(model="qwen", messages=[]))["message"]["content"]
+        healthy_while_down = pool.backends[0].healthy
+        assert nodes["http://a"].calls == 1
+
+        nodes["http://a"].down = False
+        await pool.check_health()
+        # b served two calls, the recovered a is the least recently picked node now
+        recovered = (await pool.chat(model="qwen", messages=[]))["message"]["content"]
+        await pool.aclose()
+        return answer, chunks, healthy_while_down, recovered
+
+    answer, chunks, healthy_while_down, recovered = asyncio.run(_route())
+
+    assert answer == "http://b"
+    assert chunks == ["http://b", "done"]
+    assert healthy_while_down is False
+    assert recovered == "http://a"
+
+
+def test_error_is_raised_when_every_node_refuses() -> None:
+    async def _route() -> None:
+        pool, nodes = _pool("http://a", "http://b")
+        for node in nodes.values():
+            node.down = True
+        try:
+            await pool.chat(model="qwen", messages=[])
+        finally:
+            await pool.aclose()
+
+    with pytest.raises(ConnectionError):
+        asyncio.run(_route())
+
+
+def test_clients_of_one_node_list_share_a_pool() -> None:
+    nodes = {url: _FakeNode(url) for url in ("http://a", "http://b", "http://c")}
+    try:
+        pool = OllamaBackendPool.instance(["http://a", "http://b"], nodes.__getitem__)
+
+        assert OllamaBackendPool.instance(["http://a", "http://b"], nodes.__getitem__) is pool
+        assert OllamaBackendPool.instance(["http://a", "http://c"], nodes.__getitem__) is not pool
+    finally:
+        OllamaBackendPool.reset_instance()
+
+
+def test_close_instances_stops_the_health_checks() -> None:
+    async def _close() -> tuple[bool, bool]:
+        nodes = {url: _FakeNode(url) for url in ("http://a", "http://b")}
+        pool = OllamaBackendPool.instance(["http://a", "http://b"], nodes.__getitem__)
+        await pool.chat(model="qwen", messages=[])
+        health_task = pool._health_task
+        assert health_task is not None and not health_task.done()
+
+        await OllamaBackendPool.close_instances()
+        return health_task.cancelled(), OllamaBackendPool._instances == {}
+
+    assert asyncio.run(_close()) == (True, True)
@@ -0,0 +1,137 @@
+from typing import Any
+
+import pytest
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.domain.models import (
+    ChatHistory,
+    GraphState,
+    Message,
+    MetaData,
+    ModelMode,
+    Role,
+    Tag,
+    UserProfile,
+)
+from ml.domain.workflow.agent.nodes.preflight_classification import node as preflight_node
+from ml.domain.workflow.agent.nodes.preflight_classification.schema import (
+    PreflightClassification,
+)
+
+
+class _StubClient:
+    def __init__(self, response: Any) -> None:
+        self.response = response
+        self.calls: list[type[Any]] = []
+
+    async def call_structured(
+        self, messages: ChatHistory, output_schema: type[Any], **kwargs: Any
+    ) -> Any:
+        self.calls.append(output_schema)
+        if isinstance(self.response, Exception):
+            raise self.response
+        return self.response
+
+
+def _build_state(*, is_voice: bool, tag: Tag, mode: ModelMode) -> GraphState:
+    return GraphState(
+        chat_id=1,
+        chat=ChatHistory(messages=[Message(id=1, role=Role.user, content="Составь договор")]),
+        user=UserProfile(
+            id=1,
+            login="user",
+            username="Test User",
+            user_info="",
+            business_info="",
+            additional_instructions="",
+        ),
+        meta=MetaData(is_voice=is_voice, tag=tag),
+        file_url=None,
+        model_mode=mode,
+        voice_is_valid=None,
+        final_prompt=None,
+    )
+
+
+@pytest.fixture()
+def stub_graph_log(monkeypatch: pytest.MonkeyPatch) -> list[str]:
+    logs: list[str] = []
+
+    async def _send_graph_log(**kwargs: Any) -> None:
+        logs.append(kwargs["message"])
+
+    monkeypatch.setattr(preflight_node, "send_graph_log", _send_graph_log)
+    return logs
+
+
+def _patch_client(monkeypatch: pytest.MonkeyPatch, client: _StubClient) -> None:
+    monkeypatch.setattr(preflight_node.ReasoningModelClient, "instance", lambda tier: client)
+
+
+@pytest.mark.anyio("asyncio")
+async def test_fused_call_returns_all_decisions(
+    monkeypatch: pytest.MonkeyPatch, stub_graph_log: list[str]
+) -> None:
+    decision = PreflightClassification(
+        voice_is_valid=True,
+        tag=Tag.Law,
+        mode="fast",  # type: ignore[arg-type]
+    )
+    client = _StubClient(decision)
+    _patch_client(monkeypatch, client)
+
+    state = _build_state(is_voice=True, tag=Tag.Empty, mode=ModelMode.Auto)
+    updates = await preflight_node.classify_preflight(state)
+
+    assert client.calls == [PreflightClassification]
+    assert updates["voice_is_valid"] is True
+    assert updates["meta"].tag is Tag.Law
+    assert updates["model_mode"] is ModelMode.Fast
+    assert state.meta.tag is Tag.Empty
+    assert stub_graph_log == ["Распознаю голосовой запрос", "Определяю Tag"]
+
+
+@pytest.mark.anyio("asyncio")
+async def test_invalid_fused_output_falls_back_to_individual_nodes(
+    monkeypatch: pytest.MonkeyPatch, stub_graph_log: list[str]
+) -> None:
+    _patch_client(monkeypatch, _StubClient(ValueError("bad json")))
+
+    async def _voice(_: GraphState) -> dict[str, Any]:
+        return {"voice_is_valid": False}
+
+    async def _tag(state: GraphState) -> dict[str, Any]:
+        return {"meta": state.meta.model_copy(update={"tag": Tag.Finance})}
+
+    async def _mode(_: GraphState) -> dict[str, Any]:
+        return {"model_mode": ModelMode.Thiking}
+
+    monkeypatch.setattr(preflight_node, "validate_voice", _voice)
+    monkeypatch.setattr(preflight_node, "validate_tag", _tag)
+    monkeypatch.setattr(preflight_node, "define_mode", _mode)
+
+    state = _build_state(is_voice=True, tag=Tag.Empty, mode=ModelMode.Auto)
+    updates = await preflight_node.classify_preflight(state)
+
+    assert updates["voice_is_valid"] is False
+    assert updates["meta"].tag is Tag.Finance
+    assert updates["model_mode"] is ModelMode.Thiking
+    # the individual nodes log their own steps, the fused node must not log them twice
+    assert stub_graph_log == []
+
+
+@pytest.mark.anyio("asyncio")
+async def test_single_decision_skips_fused_call(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = _StubClient(ValueError("fused call must not happen"))
+    _patch_client(monkeypatch, client)
+
+    async def _mode(_: GraphState) -> dict[str, Any]:
+        return {"model_mode": ModelMode.Fast}
+
+    monkeypatch.setattr(preflight_node, "define_mode", _mode)
+
+    state = _build_state(is_voice=False, tag=Tag.General, mode=ModelMode.Auto)
+    updates = await preflight_node.classify_preflight(state)
+
+    assert client.calls == []
+    assert updates == {"model_mode": ModelMode.Fast}
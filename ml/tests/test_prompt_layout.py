@@ -0,0 +1,91 @@
+from ml.api.external.prompt_prefix import PromptPrefixTracker
+from ml.domain.models import ChatHistory, Role
+from ml.domain.models.payload_data import UserProfile
+from ml.domain.models.tools_data import Evidence, ToolResult
+from ml.utils import PromptLayout, format_evidence_section
+from ml.utils.pipeline_data_formatters import get_static_system_prompt, get_user_system_prompt
+from ml.utils.prompt_layout import REQUEST_CONTEXT_HEADER
+
+
+def _profile() -> UserProfile:
+    return UserProfile(
+        id=1,
+        login="ivanov",
+        username="Иванов Иван Петрович",
+        user_info="Владелец кофейни",
+        business_info="Две точки в Казани",
+        additional_instructions="",
+    )
+
+
+def _chat() -> ChatHistory:
+    chat = ChatHistory()
+    chat.add_user("Привет")
+    chat.add_assistant("Здравствуйте, Иван Петрович!")
+    chat.add_user("Сколько стоит аренда?")
+    return chat
+
+
+def _layout(evidence_text: str) -> PromptLayout:
+    evidence = Evidence(
+        tool_name="custom",
+        summary=evidence_text,
+        source=ToolResult(success=True, data="unused", error=None),
+    )
+    return PromptLayout(
+        static=get_static_system_prompt(),
+        user=get_user_system_prompt(_profile()),
+        task="Ответь кратко.",
+        request=[format_evidence_section([evidence])],
+    )
+
+
+def test_request_data_does_not_change_the_shared_prefix() -> None:
+    chat = _chat()
+
+    first = _layout("аренда 100 000 ₽").build(chat).model_dump_chat()
+    second = _layout("аренда 120 000 ₽").build(chat).model_dump_chat()
+
+    # system message and history are byte-identical, only the last user turn differs
+    assert first[:-1] == second[:-1]
+    assert first[0]["role"] == "system"
+    assert "аренда" not in first[0]["content"]
+    assert first[-1]["content"].startswith("Сколько стоит аренда?\n\n" + REQUEST_CONTEXT_HEADER)
+    assert "100 000" in first[-1]["content"] and "120 000" in second[-1]["content"]
+    # the chat of the state stays untouched
+    assert chat.messages[-1].content == "Сколько стоит аренда?"
+
+
+def test_request_data_after_assistant_turn_becomes_user_turn() -> None:
+    chat = _chat()
+    chat.add_assistant("Уточняю")
+
+    prompt = PromptLayout(static="static", request=["шаг 2 из 3"]).build(chat)
+
+    assert prompt.messages[-1].role is Role.user
+    assert prompt.messages[-1].content == f"{REQUEST_CONTEXT_HEADER}\nшаг 2 из 3"
+
+
+def test_tracker_reports_shared_prefix_of_the_chat() -> None:
+    tracker = PromptPrefixTracker(maxsize=4)
+    first = [{"role": "system", "content": "abc"}, {"role": "user", "content": "one"}]
+    second = [{"role": "system", "content": "abc"}, {"role": "user", "content": "two"}]
+
+    assert tracker.shared_share("m", 1, first) == 0.0
+    share = tracker.shared_share("m", 1, second)
+    assert share == len("system\nabc\nuser\n") / len("system\nabc\nuser\ntwo\n")
+    # other chats, models and calls outside of a chat start from scratch
+    assert tracker.shared_share("m", 2, second) == 0.0
+    assert tracker.shared_share("other", 1, second) == 0.0
+    assert tracker.shared_share("m", None, second) == 0.0
+
+
+def test_cached_tokens_are_read_off_the_prompt_eval_time() -> None:
+    tracker = PromptPrefixTracker(maxsize=4)
+
+    # nothing is known about the model until a fresh prompt was timed
+    assert tracker.cached_tokens("m", 0.9, 1000, 0.5) == 0
+    assert tracker.cached_tokens("m", 0.0, 1000, 1.0) == 0
+    # 1000 tokens/s: a quarter second evaluates 250 of the prompt, the rest was reused
+    assert tracker.cached_tokens("m", 0.9, 1000, 0.25) == 750
+    assert tracker.cached_tokens("m", 0.9, 1000, 2.0) == 0
@@ -0,0 +1,125 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import pytest
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.schemas import MessagePayload
+from ml.domain.models import (
+    ChatHistory,
+    Message,
+    ModelMode,
+    Role,
+    Tag,
+    UserProfile,
+    WorkflowEvent,
+    WorkflowEventType,
+)
+from ml.domain.workflow import router
+from ml.domain.workflow.coalescing import RequestCoalescer
+
+
+class _StubPipeline:
+    def __init__(self) -> None:
+        self.started = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def events(self, payload: MessagePayload) -> AsyncIterator[WorkflowEvent]:
+        self.started += 1
+        try:
+            yield WorkflowEvent(type=WorkflowEventType.Tag, tag=Tag.General)
+            await self.release.wait()
+            yield WorkflowEvent(type=WorkflowEventType.Answer, chunk=f"answer {self.started}")
+            yield WorkflowEvent(type=WorkflowEventType.Done)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+
+
+def _payload(message_id: int | None = 1, mode: ModelMode = ModelMode.Fast) -> MessagePayload:
+    return MessagePayload(
+        messages=ChatHistory(messages=[Message(id=message_id, role=Role.user, content="hi")]),
+        chat_id=1,
+        tag=Tag.General,
+        mode=mode,
+        file_url=None,
+        is_voice=False,
+        profile=UserProfile(
+            id=1,
+            login="user",
+            username="Test User",
+            user_info="",
+            business_info="",
+            additional_instructions="",
+        ),
+    )
+
+
+@pytest.fixture()
+def pipeline(monkeypatch: pytest.MonkeyPatch) -> _StubPipeline:
+    stub = _StubPipeline()
+    monkeypatch.setattr(router, "_pipeline_events", stub.events)
+    monkeypatch.setattr(RequestCoalescer, "_instance", RequestCoalescer())
+    return stub
+
+
+async def _collect(payload: MessagePayload) -> list[object]:
+    return [event.chunk async for event in router.workflow_events(payload) if event.chunk]
+
+
+def test_duplicate_requests_share_one_pipeline_run(pipeline: _StubPipeline) -> None:
+    async def _scenario() -> list[list[object]]:
+        leader = asyncio.create_task(_collect(_payload()))
+        await asyncio.sleep(0.01)
+        # the duplicate attaches after the leader already got its first events
+        follower = asyncio.create_task(_collect(_payload()))
+        await asyncio.sleep(0.01)
+        pipeline.release.set()
+        return await asyncio.gather(leader, follower)
+
+    answers = asyncio.run(_scenario())
+
+    assert pipeline.started == 1
+    assert answers == [["answer 1"], ["answer 1"]]
+    assert RequestCoalescer.instance().running == 0
+
+
+@pytest.mark.parametrize(
+    "first, second",
+    [
+        (_payload(message_id=1), _payload(message_id=2)),
+        (_payload(mode=ModelMode.Fast), _payload(mode=ModelMode.Research)),
+        # without a message id two requests can not be told apart
+        (_payload(message_id=None), _payload(message_id=None)),
+    ],
+)
+def test_different_requests_run_separately(
+    pipeline: _StubPipeline, first: MessagePayload, second: MessagePayload
+) -> None:
+    async def _scenario() -> None:
+        tasks = [asyncio.create_task(_collect(payload)) for payload in (first, second)]
+        await asyncio.sleep(0.01)
+        pipeline.release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(_scenario())
+
+    assert pipeline.started == 2
+
+
+def test_run_is_cancelled_only_when_every_request_left(pipeline: _StubPipeline) -> None:
+    async def _scenario() -> None:
+        leader = router.workflow_events(_payload())
+        follower = router.workflow_events(_payload())
+        await anext(leader)
+        await anext(follower)
+
+        await leader.aclose()
+        assert pipeline.cancelled == 0
+
+        await follower.aclose()
+        assert pipeline.cancelled == 1
+        assert RequestCoalescer.instance().running == 0
+
+    asyncio.run(_scenario())
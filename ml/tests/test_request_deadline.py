@@ -0,0 +1,159 @@
+from typing import Any
+
+import pytest
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.routes.workflow import _with_deadline
+from ml.configs import get_final_answer_reserve
+from ml.api.schemas import MessagePayload
+from ml.domain.models import (
+    ChatHistory,
+    GraphState,
+    Message,
+    MetaData,
+    ModelMode,
+    Role,
+    Tag,
+    UserProfile,
+)
+from ml.domain.workflow.agent.nodes.research_reason import node as reason_node
+from ml.domain.workflow.agent.tools.websearch import tool as websearch_module
+from ml.domain.workflow.agent.tools.websearch.tool import SearchHit, WebSearchTool
+from ml.domain.workflow.router import _build_initial_state
+from ml.utils import budget_is_low, deadline_after
+
+
+class _UnreachableClient:
+    def __init__(self, tier: Any = None) -> None:
+        return
+
+    async def call_structured(
+        self, messages: ChatHistory, output_schema: type[Any], **kwargs: Any
+    ) -> Any:
+        raise AssertionError("model must not be called once the budget is spent")
+
+    def stream_structured(
+        self, messages: ChatHistory, output_schema: type[Any], **kwargs: Any
+    ) -> Any:
+        raise AssertionError("model must not be called once the budget is spent")
+
+
+def _profile() -> UserProfile:
+    return UserProfile(
+        id=1,
+        login="user",
+        username="Test User",
+        user_info="",
+        business_info="",
+        additional_instructions="",
+    )
+
+
+def _build_state(deadline: float | None) -> GraphState:
+    return GraphState(
+        chat_id=1,
+        chat=ChatHistory(messages=[Message(id=1, role=Role.user, content="Сравни банки")]),
+        user=_profile(),
+        meta=MetaData(is_voice=False, tag=Tag.General),
+        file_url=None,
+        deadline=deadline,
+        model_mode=ModelMode.Research,
+        voice_is_valid=None,
+        final_prompt=None,
+    )
+
+
+async def _noop_graph_log(**_: Any) -> None:
+    return None
+
+
+def test_budget_is_low_only_within_reserve() -> None:
+    assert not budget_is_low(None)
+    assert not budget_is_low(deadline_after(60), reserve=10)
+    assert budget_is_low(deadline_after(5), reserve=10)
+
+
+def test_short_budget_keeps_time_for_research() -> None:
+    assert get_final_answer_reserve(600) == 20
+    assert get_final_answer_reserve(8) == 2
+
+    payload = _payload().model_copy(update={"deadline_seconds": 8.0})
+    state = _build_initial_state(payload)
+
+    assert state.deadline_reserve == 2
+    assert not budget_is_low(state.deadline, state.deadline_reserve)
+
+
+@pytest.mark.anyio("asyncio")
+async def test_research_reason_finalizes_when_budget_is_spent(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(reason_node, "send_graph_log", _noop_graph_log)
+    monkeypatch.setattr(reason_node.ReasoningModelClient, "instance", _UnreachableClient)
+
+    state = await reason_node.research_reason(_build_state(deadline=deadline_after(1)))
+
+    assert [call.name for call in state.pending_tool_calls] == ["final_answer"]
+
+
+@pytest.mark.anyio("asyncio")
+async def test_web_search_stops_opening_pages_when_budget_is_spent(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    tool = WebSearchTool()
+    opened: list[str] = []
+
+    async def _perform_search(query: str) -> list[SearchHit]:
+        return [SearchHit(url="https://example.com/a", title="a", snippet="a")]
+
+    async def _gather(
+        query: str, hit: SearchHit, deadline: float | None = None, reserve: float | None = None
+    ) -> str:
+        opened.append(hit.url)
+        return "text"
+
+    monkeypatch.setattr(tool, "_perform_search", _perform_search)
+    monkeypatch.setattr(tool, "_gather_relevant_text", _gather)
+    monkeypatch.setattr(tool, "_dispatch_graph_log", _noop_graph_log)
+
+    spent = await tool.execute(query="q", chat_id=1, answer_id=1, deadline=deadline_after(1))
+    fresh = await tool.execute(query="q", chat_id=1, answer_id=1, deadline=deadline_after(600))
+
+    assert spent.data["results"] == []
+    assert len(fresh.data["results"]) == 1
+    assert opened == ["https://example.com/a"]
+
+
+@pytest.mark.anyio("asyncio")
+async def test_chunk_relevance_is_not_checked_when_budget_is_spent(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(websearch_module.ReasoningModelClient, "instance", _UnreachableClient)
+
+    selected = await WebSearchTool()._evaluate_chunk_relevance(
+        "q", ["chunk"], deadline=deadline_after(1)
+    )
+
+    assert selected == []
+
+
+def test_payload_deadline_wins_over_header() -> None:
+    payload = _payload()
+
+    assert _with_deadline(payload, 30.0).deadline_seconds == 30.0
+    assert _with_deadline(payload, None).deadline_seconds is None
+
+    explicit = payload.model_copy(update={"deadline_seconds": 10.0})
+    assert _with_deadline(explicit, 30.0).deadline_seconds == 10.0
+
+
+def _payload() -> MessagePayload:
+    return MessagePayload(
+        messages=ChatHistory(messages=[Message(id=1, role=Role.user, content="hi")]),
+        chat_id=1,
+        tag=Tag.General,
+        mode=ModelMode.Fast,
+        file_url=None,
+        is_voice=False,
+        profile=_profile(),
+    )
@@ -0,0 +1,145 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.domain.models import (
+    ChatHistory,
+    GraphState,
+    Message,
+    MetaData,
+    ModelMode,
+    Role,
+    Tag,
+    ToolResult,
+    UserProfile,
+)
+from ml.domain.workflow.agent.nodes import research_observer
+from ml.domain.workflow.agent.nodes.research_reason import node as reason_node
+from ml.domain.workflow.agent.nodes.research_reason.schema import ResearchPlan
+from ml.domain.workflow.agent.nodes.research_tool_call import node as tool_call_node
+from ml.utils import PartialJSONObject
+
+
+class _SlowSearchTool:
+    name = "web_search"
+
+    def __init__(self) -> None:
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def execute(self, **kwargs: Any) -> ToolResult:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # later calls finish first, evidence must still follow the planned order
+        await asyncio.sleep(0.05 / len(kwargs["query"]))
+        self.in_flight -= 1
+        return ToolResult(success=True, data={"query": kwargs["query"]})
+
+
+class _StubClient:
+    def __init__(self, response: ResearchPlan) -> None:
+        self.raw = response.model_dump_json()
+        self.streamed = 0
+
+    async def stream_structured(
+        self, messages: ChatHistory, output_schema: type[Any], **kwargs: Any
+    ) -> AsyncIterator[PartialJSONObject]:
+        answer = PartialJSONObject()
+        for start in range(0, len(self.raw), 8):
+            self.streamed = start + 8
+            answer.feed(self.raw[start : start + 8])
+            yield answer
+
+
+def _build_state(max_parallel_tool_calls: int) -> GraphState:
+    return GraphState(
+        chat_id=1,
+        chat=ChatHistory(messages=[Message(id=1, role=Role.user, content="Сравни банки")]),
+        user=UserProfile(
+            id=1,
+            login="user",
+            username="Test User",
+            user_info="",
+            business_info="",
+            additional_instructions="",
+        ),
+        meta=MetaData(is_voice=False, tag=Tag.General),
+        file_url=None,
+        model_mode=ModelMode.Research,
+        voice_is_valid=None,
+        final_prompt=None,
+        max_parallel_tool_calls=max_parallel_tool_calls,
+    )
+
+
+@pytest.fixture()
+def stub_graph_log(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def _send_graph_log(**_: Any) -> None:
+        return None
+
+    monkeypatch.setattr(reason_node, "send_graph_log", _send_graph_log)
+    monkeypatch.setattr(tool_call_node, "send_graph_log", _send_graph_log)
+
+
+def _plan(*calls: tuple[str, dict[str, Any]]) -> ResearchPlan:
+    return ResearchPlan.model_validate(
+        {
+            "thought": "need facts",
+            "tool_calls": [{"chosen_tool": name, "tool_args": args} for name, args in calls],
+        }
+    )
+
+
+@pytest.mark.anyio("asyncio")
+@pytest.mark.usefixtures("stub_graph_log")
+async def test_batched_calls_run_concurrently_and_keep_order(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    tool = _SlowSearchTool()
+    plan = _plan(
+        ("web_search", {"query": "a"}),
+        ("web_search", {"query": "bb"}),
+        ("web_search", {"query": "ccc"}),
+    )
+    monkeypatch.setattr(reason_node.ReasoningModelClient, "instance", lambda tier: _StubClient(plan))
+    monkeypatch.setattr(tool_call_node, "get_tool", lambda _: tool)
+
+    state = await reason_node.research_reason(_build_state(max_parallel_tool_calls=3))
+    state = await tool_call_node.research_tool_call(state)
+    state = research_observer(state)
+
+    assert tool.max_in_flight == 3
+    assert [evidence.source.data["query"] for evidence in state.evidence_list] == [
+        "a",
+        "bb",
+        "ccc",
+    ]
+    assert state.pending_tool_calls == []
+    assert state.pending_tool_call is None
+
+
+@pytest.mark.anyio("asyncio")
+@pytest.mark.usefixtures("stub_graph_log")
+async def test_fan_out_is_capped_and_final_answer_postponed(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    plan = _plan(
+        ("web_search", {"query": "a"}),
+        ("final_answer", {}),
+        ("web_search", {"query": "bb"}),
+        ("web_search", {"query": "ccc"}),
+    )
+    client = _StubClient(plan)
+    monkeypatch.setattr(reason_node.ReasoningModelClient, "instance", lambda tier: client)
+
+    state = await reason_node.research_reason(_build_state(max_parallel_tool_calls=2))
+
+    # the stream is dropped once the two calls of the step are complete
+    assert client.streamed < len(client.raw)
+
+    assert [call.name for call in state.pending_tool_calls] == ["web_search", "web_search"]
+    assert [call.arguments["query"] for call in state.pending_tool_calls] == ["a", "bb"]
+    assert state.pending_tool_call is state.pending_tool_calls[0]
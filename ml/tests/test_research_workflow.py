@@ -1,5 +1,3 @@
-from collections.abc import AsyncIterator
-
 import pytest
 
 from ml.domain.models import (
@@ -21,11 +19,6 @@ from ml.domain.workflow.agent.nodes import (
 )
 
 
-async def _empty_stream() -> AsyncIterator[dict[str, str]]:
-    if False:
-        yield {}
-
-
 def _build_state() -> GraphState:
     chat = ChatHistory(messages=[Message(id=1, role=Role.user, content="Find AI news")])
 
@@ -45,7 +38,6 @@ def _build_state() -> GraphState:
         model_mode=ModelMode.Research,
         voice_is_valid=None,
         final_prompt=None,
-        output_stream=_empty_stream(),
     )
 
 
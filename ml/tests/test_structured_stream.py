@@ -0,0 +1,211 @@
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from contextlib import aclosing
+from typing import Any
+
+import pytest
+from ollama._types import ChatResponse, Message
+from prometheus_client import REGISTRY
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.external import ollama_client as ollama_client_module
+from ml.api.external.llm_scheduler import LLMScheduler
+from ml.api.external.ollama_client import ReasoningModelClient
+from ml.configs import LLMMode, ModelTier, ReasoningClientSettings
+from ml.domain.models import (
+    ChatHistory,
+    GraphState,
+    MetaData,
+    ModelMode,
+    Role,
+    Tag,
+    UsageRecord,
+    UserProfile,
+)
+from ml.domain.models import Message as DomainMessage
+from ml.domain.workflow.agent.nodes.thinking_planner import node as planner_node
+from ml.domain.workflow.agent.nodes.thinking_planner.schema import ThinkingPlan
+from ml.utils import PartialJSONObject, SentenceStream
+
+_PLAN = {
+    "thought": 'Нужен свежий курс. Ищу "USD"\\сегодня 😀',
+    "chosen_tool": "web_search",
+    "tool_args": {"query": "курс {usd}", "limit": 3},
+}
+
+
+def test_fields_are_read_as_soon_as_they_close() -> None:
+    raw = json.dumps(_PLAN, ensure_ascii=True, indent=2)
+    answer = PartialJSONObject()
+    seen_thoughts: list[str] = []
+
+    for start in range(0, len(raw), 3):
+        answer.feed(raw[start : start + 3])
+        seen_thoughts.append(answer.text.get("thought", ""))
+        if "tool_args" not in answer.fields:
+            assert not answer.done
+
+    assert answer.fields == _PLAN
+    assert answer.done
+    # every partial thought is a prefix of the real one, escapes are never split
+    assert all(_PLAN["thought"].startswith(thought) for thought in seen_thoughts)
+    assert len(set(seen_thoughts)) > 10
+
+
+def test_array_items_are_read_one_by_one() -> None:
+    answer = PartialJSONObject()
+
+    answer.feed('{"thought": "x", "tool_calls": [{"chosen_tool": "a"}, {"chosen_tool": "b"')
+
+    assert answer.items["tool_calls"] == [{"chosen_tool": "a"}]
+    assert "tool_calls" not in answer.fields
+
+    answer.feed("}], \"n\": 12}")
+
+    assert answer.items["tool_calls"] == [{"chosen_tool": "a"}, {"chosen_tool": "b"}]
+    assert answer.fields["n"] == 12
+
+
+def test_sentence_stream_returns_finished_sentences() -> None:
+    sentences = SentenceStream()
+
+    assert sentences.push("Сначала ищу") == ""
+    assert sentences.push("Сначала ищу курс. Потом сравниваю") == "Сначала ищу курс."
+    assert sentences.push("Сначала ищу курс. Потом сравниваю банки! Итог") == (
+        "Потом сравниваю банки!"
+    )
+    assert sentences.rest("Сначала ищу курс. Потом сравниваю банки! Итог") == "Итог"
+
+
+class _StreamingOllama:
+    def __init__(self, raw: str) -> None:
+        self.raw = raw
+        self.requests: list[dict[str, Any]] = []
+        self.sent = 0
+        self.closed = False
+
+    async def chat(self, **kwargs: Any) -> AsyncIterator[ChatResponse]:
+        self.requests.append(kwargs)
+        return self._chunks()
+
+    async def _chunks(self) -> AsyncIterator[ChatResponse]:
+        try:
+            for start in range(0, len(self.raw), 4):
+                self.sent = start + 4
+                yield ChatResponse(
+                    model="qwen",
+                    done=False,
+                    message=Message(role="assistant", content=self.raw[start : start + 4]),
+                )
+            yield ChatResponse(model="qwen", done=True, message=Message(role="assistant"))
+        finally:
+            self.closed = True
+
+
+def _client(raw: str) -> tuple[ReasoningModelClient, _StreamingOllama]:
+    ollama = _StreamingOllama(raw)
+    client = ReasoningModelClient.__new__(ReasoningModelClient)
+    client.mode = LLMMode.OLLAMA
+    client.tier = ModelTier.PLANNER
+    client.settings = ReasoningClientSettings(base_url="http://ollama:11434", model="qwen")
+    client.client = ollama
+    client.scheduler = LLMScheduler(max_concurrency=1, max_queue=0)
+    return client, ollama
+
+
+def test_stream_structured_reads_the_schema_and_stops_early() -> None:
+    raw = json.dumps(_PLAN, ensure_ascii=False) + " " * 40
+    client, ollama = _client(raw)
+
+    async def _read() -> PartialJSONObject:
+        async with aclosing(client.stream_structured(_history(), ThinkingPlan)) as answers:
+            async for answer in answers:
+                if answer.has("chosen_tool"):
+                    return answer
+        raise AssertionError("chosen_tool was never read")
+
+    answer = asyncio.run(_read())
+
+    assert answer.fields["chosen_tool"] == "web_search"
+    assert ollama.requests[0]["format"] == ThinkingPlan.model_json_schema()
+    assert ollama.requests[0]["stream"] is True
+    assert ollama.closed and ollama.sent < len(raw)
+
+
+@pytest.mark.anyio("asyncio")
+async def test_planner_logs_thought_and_dispatches_before_the_stream_ends(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    raw = json.dumps(_PLAN, ensure_ascii=False) + " " * 40
+    client, ollama = _client(raw)
+    logs: list[str] = []
+
+    async def _send_graph_log(**kwargs: Any) -> None:
+        logs.append(kwargs["message"])
+
+    monkeypatch.setattr(planner_node, "send_graph_log", _send_graph_log)
+    monkeypatch.setattr(planner_node.ReasoningModelClient, "instance", lambda tier: client)
+
+    state = await planner_node.thinking_planner(_state())
+
+    assert state.pending_tool_call is not None
+    assert state.pending_tool_call.name == "web_search"
+    assert state.pending_tool_call.arguments["query"] == "курс {usd}"
+    assert state.planned_tool_call is not None
+    assert state.planned_tool_call.thought == _PLAN["thought"]
+    assert logs == ["Думаю", "Нужен свежий курс.", 'Ищу "USD"\\сегодня 😀']
+    assert ollama.closed and ollama.sent < len(raw)
+
+
+@pytest.mark.anyio("asyncio")
+async def test_planner_stopping_early_is_counted_as_a_finished_call(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    raw = json.dumps(_PLAN, ensure_ascii=False) + " " * 40
+    client, ollama = _client(raw)
+    records: list[UsageRecord] = []
+
+    async def _send_graph_log(**_: Any) -> None:
+        return None
+
+    monkeypatch.setattr(planner_node, "send_graph_log", _send_graph_log)
+    monkeypatch.setattr(planner_node.ReasoningModelClient, "instance", lambda tier: client)
+    monkeypatch.setattr(ollama_client_module, "record_usage", records.append)
+
+    labels = {"method": "stream_structured"}
+    before = REGISTRY.get_sample_value("ml_llm_calls_cancelled_total", labels) or 0.0
+
+    await planner_node.thinking_planner(_state())
+
+    assert ollama.closed and ollama.sent < len(raw)
+    # the closing chunk with the counters was dropped, the usage is still recorded
+    assert len(records) == 1
+    assert records[0].method == "stream_structured"
+    assert records[0].completion_tokens == ollama.sent // 4
+    assert records[0].prompt_tokens > 0
+    assert (REGISTRY.get_sample_value("ml_llm_calls_cancelled_total", labels) or 0.0) == before
+
+
+def _history() -> ChatHistory:
+    return ChatHistory(messages=[DomainMessage(id=1, role=Role.user, content="Курс доллара?")])
+
+
+def _state() -> GraphState:
+    return GraphState(
+        chat_id=1,
+        chat=_history(),
+        user=UserProfile(
+            id=1,
+            login="user",
+            username="Test User",
+            user_info="",
+            business_info="",
+            additional_instructions="",
+        ),
+        meta=MetaData(is_voice=False, tag=Tag.General),
+        file_url=None,
+        model_mode=ModelMode.Thiking,
+        voice_is_valid=None,
+        final_prompt=None,
+    )
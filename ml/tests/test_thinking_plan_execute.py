@@ -0,0 +1,122 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.domain.models import (
+    ChatHistory,
+    GraphState,
+    Message,
+    MetaData,
+    ModelMode,
+    PlanStep,
+    Role,
+    Tag,
+    ToolResult,
+    UserProfile,
+)
+from ml.domain.workflow.agent.nodes.research_tool_call import node as tool_call_node
+from ml.domain.workflow.agent.nodes.thinking_executor.node import thinking_executor
+from ml.utils import deadline_after
+
+
+class _RecordingSearchTool:
+    name = "web_search"
+
+    def __init__(self, empty_queries: set[str]) -> None:
+        self.empty_queries = empty_queries
+        self.waves: list[list[str]] = []
+        self._current: list[str] = []
+
+    async def execute(self, **kwargs: Any) -> ToolResult:
+        query = kwargs["query"]
+        self._current.append(query)
+        await asyncio.sleep(0)
+        if self._current:
+            self.waves.append(sorted(self._current))
+            self._current = []
+        results = [] if query in self.empty_queries else [f"doc for {query}"]
+        return ToolResult(success=True, data={"query": query, "results": results})
+
+
+def _build_state(plan: list[PlanStep], deadline: float | None = None) -> GraphState:
+    return GraphState(
+        chat_id=1,
+        chat=ChatHistory(messages=[Message(id=1, role=Role.user, content="Сравни вклады")]),
+        user=UserProfile(
+            id=1,
+            login="user",
+            username="Test User",
+            user_info="",
+            business_info="",
+            additional_instructions="",
+        ),
+        meta=MetaData(is_voice=False, tag=Tag.Finance),
+        file_url=None,
+        deadline=deadline,
+        model_mode=ModelMode.Thiking,
+        voice_is_valid=None,
+        final_prompt=None,
+        max_parallel_tool_calls=3,
+        execution_plan=plan,
+        planning_rounds=1,
+    )
+
+
+def _search_step(step_id: int, query: str, depends_on: list[int] | None = None) -> PlanStep:
+    return PlanStep(
+        id=step_id, tool="web_search", tool_args={"query": query}, depends_on=depends_on or []
+    )
+
+
+@pytest.fixture()
+def search_tool(monkeypatch: pytest.MonkeyPatch) -> _RecordingSearchTool:
+    async def _send_graph_log(**_: Any) -> None:
+        return None
+
+    tool = _RecordingSearchTool(empty_queries={"empty"})
+    monkeypatch.setattr(tool_call_node, "send_graph_log", _send_graph_log)
+    monkeypatch.setattr(tool_call_node, "get_tool", lambda _: tool)
+    return tool
+
+
+@pytest.mark.anyio("asyncio")
+async def test_executor_runs_independent_steps_together(
+    search_tool: _RecordingSearchTool,
+) -> None:
+    state = _build_state(
+        [_search_step(1, "a"), _search_step(2, "b"), _search_step(3, "c", depends_on=[1, 2])]
+    )
+
+    state = await thinking_executor(state)
+
+    assert search_tool.waves == [["a", "b"], ["c"]]
+    assert [evidence.source.data["query"] for evidence in state.evidence_list] == ["a", "b", "c"]
+    assert state.needs_replan is False
+    assert state.execution_plan == []
+
+
+@pytest.mark.anyio("asyncio")
+async def test_executor_requests_replan_on_empty_evidence(
+    search_tool: _RecordingSearchTool,
+) -> None:
+    state = _build_state([_search_step(1, "empty"), _search_step(2, "c", depends_on=[1])])
+
+    state = await thinking_executor(state)
+
+    assert search_tool.waves == [["empty"]]
+    assert state.needs_replan is True
+
+
+@pytest.mark.anyio("asyncio")
+async def test_executor_stops_between_waves_when_budget_is_spent(
+    search_tool: _RecordingSearchTool,
+) -> None:
+    state = _build_state([_search_step(1, "a"), _search_step(2, "b")], deadline=deadline_after(1))
+
+    state = await thinking_executor(state)
+
+    assert search_tool.waves == []
+    assert state.needs_replan is False
+    assert state.execution_plan == []
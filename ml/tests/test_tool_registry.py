@@ -7,7 +7,7 @@ import types
 import pytest
 
 dummy_router = types.ModuleType("ml.domain.workflow.router")
-dummy_router.workflow = lambda *_, **__: None
+dummy_router.workflow_events = lambda *_, **__: None
 dummy_router.workflow_collected = lambda *_, **__: None
 sys.modules.setdefault("ml.domain.workflow.router", dummy_router)
 
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Any, TypedDict
+
+from langgraph.graph import END, START, StateGraph
+from ollama._types import ChatResponse, Message
+from prometheus_client import REGISTRY
+
+import ml.api  # noqa: F401  # app entrypoint resolves the api <-> domain import order
+from ml.api.external.llm_scheduler import LLMScheduler
+from ml.api.external.ollama_client import ReasoningModelClient
+from ml.configs import LLMMode, ModelTier, ReasoningClientSettings
+from ml.domain.models import ChatHistory, Role, UsageLedger, UsageRecord
+from ml.domain.models import Message as DomainMessage
+from ml.utils import export_usage, usage_config
+
+
+class _State(TypedDict):
+    answer: str
+
+
+class _FakeOllama:
+    async def chat(self, **kwargs: Any) -> ChatResponse:
+        return ChatResponse(
+            model="qwen",
+            done=True,
+            message=Message(role="assistant", content="ok"),
+            prompt_eval_count=120,
+            eval_count=8,
+            prompt_eval_duration=300_000_000,
+            eval_duration=200_000_000,
+            load_duration=2_000_000_000,
+            total_duration=2_600_000_000,
+        )
+
+
+def _client() -> ReasoningModelClient:
+    client = ReasoningModelClient.__new__(ReasoningModelClient)
+    client.mode = LLMMode.OLLAMA
+    client.tier = ModelTier.ANSWER
+    client.settings = ReasoningClientSettings(base_url="http://ollama:11434", model="qwen")
+    client.client = _FakeOllama()
+    client.scheduler = LLMScheduler(max_concurrency=1, max_queue=0)
+    return client
+
+
+def test_reasoning_calls_are_recorded_in_run_ledger() -> None:
+    client = _client()
+    history = ChatHistory(messages=[DomainMessage(id=1, role=Role.user, content="hi")])
+
+    async def _node(_: _State) -> dict[str, Any]:
+        return {"answer": await client.call(history)}
+
+    graph = StateGraph(_State)
+    graph.add_node("Usage probe", _node)
+    graph.add_edge(START, "Usage probe")
+    graph.add_edge("Usage probe", END)
+
+    ledger = UsageLedger()
+    asyncio.run(
+        graph.compile().ainvoke({"answer": ""}, config={"configurable": usage_config(ledger)})
+    )
+
+    assert len(ledger.records) == 1
+    record = ledger.records[0]
+    assert (record.node, record.method, record.model) == ("Usage probe", "call", "qwen")
+    assert (record.prompt_tokens, record.completion_tokens) == (120, 8)
+    assert record.load_duration == 2.0
+    assert record.is_cold_load
+
+    summary = ledger.summary()
+    assert summary["total_tokens"] == 128
+    assert summary["cold_loads"] == 1
+    assert summary["by_node"] == {
+        "Usage probe": {"calls": 1, "prompt_tokens": 120, "completion_tokens": 8}
+    }
+
+
+def test_calls_outside_of_a_run_are_not_recorded() -> None:
+    history = ChatHistory(messages=[DomainMessage(id=1, role=Role.user, content="hi")])
+
+    assert asyncio.run(_client().call(history)) == "ok"
+
+
+def test_export_adds_request_totals_per_mode() -> None:
+    ledger = UsageLedger()
+    ledger.add(
+        UsageRecord(
+            node="Fast answer",
+            method="stream",
+            model="qwen",
+            prompt_tokens=50,
+            completion_tokens=10,
+            eval_duration=0.5,
+        )
+    )
+    labels = {"mode": "usage-test", "kind": "prompt"}
+    before = REGISTRY.get_sample_value("ml_llm_tokens_total", labels) or 0.0
+
+    export_usage(ledger, "usage-test")
+
+    assert REGISTRY.get_sample_value("ml_llm_tokens_total", labels) == before + 50
+    assert (
+        REGISTRY.get_sample_value(
+            "ml_llm_model_seconds_total", {"mode": "usage-test", "phase": "eval"}
+        )
+        == 0.5
+    )
@@ -9,8 +9,9 @@ from ml.utils.pipeline_data_formatters import (
     _format_created_file_evidence,
     _format_file_evidence,
     _format_web_evidence,
+    format_evidence_section,
     format_research_observations,
-    get_system_prompt,
+    get_user_system_prompt,
 )
 
 
@@ -246,7 +247,7 @@ def test_format_research_observations_combines_entries() -> None:
     assert "2. Источник: веб-поиск" in formatted
 
 
-def test_get_system_prompt_includes_user_data_and_evidence() -> None:
+def test_system_prompt_sections_include_user_data_and_evidence() -> None:
     profile = UserProfile(
         id=1,
         login="user",
@@ -263,8 +264,8 @@ def test_get_system_prompt_includes_user_data_and_evidence() -> None:
         )
     ]
 
-    prompt = get_system_prompt(profile, evidence)
+    user_prompt = get_user_system_prompt(profile)
 
-    assert "Имя Отчество" in prompt
-    assert "file text" in prompt
-    assert "дополнительных инструкций" not in prompt
+    assert "Имя Отчество" in user_prompt
+    assert "дополнительных инструкций" not in user_prompt
+    assert "file text" in format_evidence_section(evidence)
@@ -10,6 +10,7 @@ import pytest
 from ollama._types import ChatResponse, Message
 from ml.domain.models import ChatHistory, GraphState, MetaData, Message as DomainMessage
 from ml.domain.models import ModelMode, Role, Tag, UserProfile
+from ml.domain.models import WorkflowEvent, WorkflowEventType
 
 
 class StubPayload:
@@ -23,6 +24,7 @@ class StubPayload:
         file_url: str | None,
         is_voice: bool,
         profile: UserProfile,
+        deadline_seconds: float | None = None,
     ) -> None:
         self.messages = messages
         self.chat_id = chat_id
@@ -31,16 +33,31 @@ class StubPayload:
         self.file_url = file_url
         self.is_voice = is_voice
         self.profile = profile
+        self.deadline_seconds = deadline_seconds
 
 
 class StubPipeline:
-    def __init__(self, result_state: Any) -> None:
+    def __init__(
+        self,
+        result_state: Any,
+        updates: list[dict[str, Any]] | None = None,
+        chunks: list[Any] | None = None,
+    ) -> None:
         self.result_state = result_state
+        self.updates = updates or []
+        self.chunks = chunks or []
         self.calls: list[tuple[GraphState, dict[str, Any]]] = []
 
-    async def ainvoke(self, state: GraphState, config: dict[str, Any]) -> Any:
+    async def astream(
+        self, state: GraphState, config: dict[str, Any], stream_mode: list[str]
+    ) -> AsyncIterator[tuple[str, Any]]:
         self.calls.append((state, config))
-        return self.result_state
+        yield "values", state.model_dump()
+        for update in self.updates:
+            yield "updates", update
+        for chunk in self.chunks:
+            yield "custom", WorkflowEvent(type=WorkflowEventType.Answer, chunk=chunk)
+        yield "values", self.result_state
 
 
 @pytest.fixture()
@@ -59,12 +76,12 @@ def router(monkeypatch: pytest.MonkeyPatch) -> Any:
     stub_api_module = types.ModuleType("ml.api")
     stub_api_module.schemas = stub_schemas_module
 
-    stub_pipeline_module = types.ModuleType("ml.domain.workflow.agent.pipeline")
+    stub_pipeline_module = types.ModuleType("ml.domain.workflow.agent.pipeline_registry")
 
-    def create_pipeline() -> Any:
+    def get_pipeline(_: ModelMode) -> Any:
         raise RuntimeError("Stub pipeline should be patched within tests")
 
-    stub_pipeline_module.create_pipeline = create_pipeline
+    stub_pipeline_module.get_pipeline = get_pipeline
 
     monkeypatch.setitem(sys.modules, "ml.api", stub_api_module)
     monkeypatch.setitem(sys.modules, "ml.api.schemas", stub_schemas_module)
@@ -72,28 +89,20 @@ def router(monkeypatch: pytest.MonkeyPatch) -> Any:
         sys.modules, "ml.api.schemas.message_payload", stub_message_payload_module
     )
     monkeypatch.setitem(
-        sys.modules, "ml.domain.workflow.agent.pipeline", stub_pipeline_module
+        sys.modules, "ml.domain.workflow.agent.pipeline_registry", stub_pipeline_module
     )
     monkeypatch.delitem(sys.modules, "ml.domain.workflow.router", raising=False)
 
     return importlib.import_module("ml.domain.workflow.router")
 
 
-def _async_stream(values: list[Any]) -> AsyncIterator[Any]:
-    async def _generator() -> AsyncIterator[Any]:
-        for value in values:
-            yield value
-
-    return _generator()
-
-
-def _build_payload(file_url: str | None = None) -> StubPayload:
+def _build_payload(file_url: str | None = None, tag: Tag = Tag.General) -> StubPayload:
     chat = ChatHistory(messages=[DomainMessage(id=1, role=Role.user, content="Hi")])
 
     return StubPayload(
         messages=chat,
         chat_id=1,
-        tag=Tag.General,
+        tag=tag,
         mode=ModelMode.Research,
         file_url=file_url,
         is_voice=False,
@@ -110,9 +119,9 @@ def _build_payload(file_url: str | None = None) -> StubPayload:
 
 def _base_state(
     *,
-    output_stream: AsyncIterator[dict[str, Any]] | Any,
+    final_prompt: ChatHistory | None = None,
     meta_tag: Any = Tag.General,
-    file_url: Any = None,
+    written_file_url: Any = None,
 ) -> GraphState:
     chat = ChatHistory(messages=[DomainMessage(id=1, role=Role.user, content="Hi")])
     if isinstance(meta_tag, Tag):
@@ -132,104 +141,95 @@ def _base_state(
             additional_instructions="",
         ),
         meta=meta,
-        file_url=file_url,
+        file_url=None,
+        written_file_url=written_file_url,
         model_mode=ModelMode.Research,
         voice_is_valid=None,
-        final_prompt=None,
-        output_stream=output_stream,
+        final_prompt=chat if final_prompt is None else final_prompt,
     )
 
 
+async def _collect_events(router: Any, payload: StubPayload) -> list[WorkflowEvent]:
+    return [event async for event in router.workflow_events(payload)]
+
+
 @pytest.mark.anyio("asyncio")
-async def test_workflow_accepts_graphstate(
+async def test_workflow_events_accepts_graphstate(
     router: Any, monkeypatch: pytest.MonkeyPatch
 ) -> None:
-    output_stream = _async_stream([{"text": "hello"}])
-    result_state = _base_state(output_stream=output_stream, file_url="/tmp/file.txt")
-    pipeline = StubPipeline(result_state)
-    monkeypatch.setattr(router, "create_pipeline", lambda: pipeline)
+    result_state = _base_state(written_file_url="/tmp/file.txt")
+    pipeline = StubPipeline(result_state, chunks=[{"text": "hello"}])
+    monkeypatch.setattr(router, "get_pipeline", lambda _: pipeline)
 
-    stream, tag, file_url = await router.workflow(_build_payload(file_url="/tmp/file.txt"))
+    events = await _collect_events(router, _build_payload())
 
-    assert stream is output_stream
-    assert tag is Tag.General
-    assert file_url == "/tmp/file.txt"
+    assert events[0].tag is Tag.General
+    assert events[1].chunk == {"text": "hello"}
+    assert events[-1].file_url == "/tmp/file.txt"
+    assert events[-1].usage is not None and events[-1].usage["calls"] == 0
     assert pipeline.calls[0][1]["run_name"] == "main_pipeline"
+    assert pipeline.calls[0][1]["configurable"]["usage_ledger"] is pipeline.calls[0][0].usage
 
 
 @pytest.mark.anyio("asyncio")
-async def test_workflow_accepts_dict_state(
+async def test_workflow_events_accepts_dict_state(
     router: Any, monkeypatch: pytest.MonkeyPatch
 ) -> None:
-    output_stream = _async_stream([{"text": "hello"}])
-    state_dict = _base_state(output_stream=output_stream)
+    state_dict = _base_state()
     pipeline = StubPipeline(state_dict.model_dump())
-    monkeypatch.setattr(router, "create_pipeline", lambda: pipeline)
+    monkeypatch.setattr(router, "get_pipeline", lambda _: pipeline)
 
-    stream, tag, file_url = await router.workflow(_build_payload())
+    events = await _collect_events(router, _build_payload())
 
-    assert isinstance(stream, AsyncIterator)
-    assert tag is Tag.General
-    assert file_url is None
+    assert events[-1].type is WorkflowEventType.Done
+    assert events[-1].file_url is None
 
 
 @pytest.mark.anyio("asyncio")
-async def test_workflow_raises_for_unknown_state_type(
+async def test_workflow_events_raises_for_unknown_state_type(
     router: Any, monkeypatch: pytest.MonkeyPatch
 ) -> None:
     pipeline = StubPipeline(result_state=123)
-    monkeypatch.setattr(router, "create_pipeline", lambda: pipeline)
+    monkeypatch.setattr(router, "get_pipeline", lambda _: pipeline)
 
     with pytest.raises(TypeError):
-        await router.workflow(_build_payload())
+        await _collect_events(router, _build_payload())
 
 
 @pytest.mark.anyio("asyncio")
-async def test_workflow_requires_output_stream(
+async def test_workflow_events_requires_final_node(
     router: Any, monkeypatch: pytest.MonkeyPatch
 ) -> None:
-    result_state = _base_state(output_stream=None)
+    result_state = _base_state().model_copy(update={"final_prompt": None})
     pipeline = StubPipeline(result_state)
-    monkeypatch.setattr(router, "create_pipeline", lambda: pipeline)
+    monkeypatch.setattr(router, "get_pipeline", lambda _: pipeline)
 
     with pytest.raises(RuntimeError):
-        await router.workflow(_build_payload())
-
-
-@pytest.mark.anyio("asyncio")
-async def test_workflow_validates_output_stream_type(
-    router: Any, monkeypatch: pytest.MonkeyPatch
-) -> None:
-    result_state = _base_state(output_stream="not a stream")
-    pipeline = StubPipeline(result_state)
-    monkeypatch.setattr(router, "create_pipeline", lambda: pipeline)
-
-    with pytest.raises(TypeError):
-        await router.workflow(_build_payload())
+        await _collect_events(router, _build_payload())
 
 
 @pytest.mark.anyio("asyncio")
-async def test_workflow_validates_meta_tag(
+async def test_workflow_events_validates_meta_tag(
     router: Any, monkeypatch: pytest.MonkeyPatch
 ) -> None:
-    result_state = _base_state(output_stream=_async_stream([{"text": "hello"}]), meta_tag="tag")
+    result_state = _base_state(meta_tag="tag")
     pipeline = StubPipeline(result_state)
-    monkeypatch.setattr(router, "create_pipeline", lambda: pipeline)
+    monkeypatch.setattr(router, "get_pipeline", lambda _: pipeline)
 
     with pytest.raises(TypeError):
-        await router.workflow(_build_payload())
+        await _collect_events(router, _build_payload())
 
 
 @pytest.mark.anyio("asyncio")
-async def test_workflow_validates_file_url(
+async def test_workflow_events_validates_file_url(
     router: Any, monkeypatch: pytest.MonkeyPatch
 ) -> None:
-    result_state = _base_state(output_stream=_async_stream([{"text": "hello"}]), file_url=123)
+    result_state = _base_state(written_file_url=123)
     pipeline = StubPipeline(result_state)
-    monkeypatch.setattr(router, "create_pipeline", lambda: pipeline)
+    monkeypatch.setattr(router, "get_pipeline", lambda _: pipeline)
 
     with pytest.raises(TypeError):
-        await router.workflow(_build_payload())
+        await _collect_events(router, _build_payload())
 
 
 @pytest.mark.anyio("asyncio")
@@ -240,15 +240,12 @@ async def test_workflow_collected_streams_chunks(
         model="model",
         message=Message(role="assistant", thinking="T", content="C"),
     )
-    output_stream = _async_stream([
-        chat_response,
-        {"choices": [{"delta": {"content": "D"}}]},
-        "E",
-        b"F",
-    ])
-    result_state = _base_state(output_stream=output_stream)
-    pipeline = StubPipeline(result_state)
-    monkeypatch.setattr(router, "create_pipeline", lambda: pipeline)
+    result_state = _base_state()
+    pipeline = StubPipeline(
+        result_state,
+        chunks=[chat_response, {"choices": [{"delta": {"content": "D"}}]}, "E", b"F"],
+    )
+    monkeypatch.setattr(router, "get_pipeline", lambda _: pipeline)
 
     collected, tag = await router.workflow_collected(_build_payload())
 
@@ -260,10 +257,55 @@ async def test_workflow_collected_streams_chunks(
 async def test_workflow_collected_rejects_unsupported_chunk(
     router: Any, monkeypatch: pytest.MonkeyPatch
 ) -> None:
-    output_stream = _async_stream([object()])
-    result_state = _base_state(output_stream=output_stream)
-    pipeline = StubPipeline(result_state)
-    monkeypatch.setattr(router, "create_pipeline", lambda: pipeline)
+    pipeline = StubPipeline(_base_state(), chunks=[object()])
+    monkeypatch.setattr(router, "get_pipeline", lambda _: pipeline)
 
     with pytest.raises(TypeError):
         await router.workflow_collected(_build_payload())
+
+
+@pytest.mark.anyio("asyncio")
+async def test_workflow_events_streams_progress_then_answer(
+    router: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    result_state = _base_state(written_file_url="/tmp/file.txt")
+    pipeline = StubPipeline(
+        result_state,
+        updates=[{"Pre-flight classification": {}}, {"Research reason": {}}],
+        chunks=["A", "B"],
+    )
+    monkeypatch.setattr(router, "get_pipeline", lambda _: pipeline)
+
+    events = await _collect_events(router, _build_payload())
+
+    assert [(event.type.value, event.node) for event in events] == [
+        ("tag", None),
+        ("progress", "Pre-flight classification"),
+        ("progress", "Research reason"),
+        ("answer", None),
+        ("answer", None),
+        ("done", None),
+    ]
+    assert events[0].tag is Tag.General
+    assert [event.chunk for event in events[3:5]] == ["A", "B"]
+    assert events[-1].file_url == "/tmp/file.txt"
+
+
+@pytest.mark.anyio("asyncio")
+async def test_workflow_events_resolves_tag_from_preflight_update(
+    router: Any, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    result_state = _base_state(meta_tag=Tag.Law)
+    pipeline = StubPipeline(
+        result_state,
+        updates=[
+            {"Pre-flight classification": {"meta": MetaData(is_voice=False, tag=Tag.Law)}},
+            {"Research reason": {}},
+        ],
+    )
+    monkeypatch.setattr(router, "get_pipeline", lambda _: pipeline)
+
+    events = await _collect_events(router, _build_payload(tag=Tag.Empty))
+
+    assert [event.type.value for event in events] == ["tag", "progress", "progress", "done"]
+    assert events[0].tag is Tag.Law
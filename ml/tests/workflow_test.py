@@ -9,6 +9,7 @@ from httpx import ASGITransport, AsyncClient
 
 langgraph_module = types.ModuleType("langgraph")
 langgraph_graph_module = types.ModuleType("langgraph.graph")
+langgraph_config_module = types.ModuleType("langgraph.config")
 ddgs_module = types.ModuleType("ddgs")
 bs4_module = types.ModuleType("bs4")
 
@@ -34,7 +35,10 @@ class _DummyStateGraph:
 
 
 langgraph_graph_module.END = "END"
+langgraph_graph_module.START = "START"
 langgraph_graph_module.StateGraph = _DummyStateGraph
+langgraph_config_module.get_stream_writer = lambda: (lambda _: None)
+langgraph_config_module.get_config = lambda: {}
 
 
 class _DummyDDGS:
@@ -60,6 +64,7 @@ bs4_module.BeautifulSoup = _DummyBeautifulSoup
 
 sys.modules.setdefault("langgraph", langgraph_module)
 sys.modules.setdefault("langgraph.graph", langgraph_graph_module)
+sys.modules.setdefault("langgraph.config", langgraph_config_module)
 sys.modules.setdefault("ddgs", ddgs_module)
 sys.modules.setdefault("bs4", bs4_module)
 
@@ -67,6 +72,7 @@ from ml.api import app as create_app
 from ml.api.routes import workflow as workflow_routes
 from ml.api.schemas import MessagePayload
 from ml.domain.models import ChatHistory, Message, ModelMode, Role, Tag, UserProfile
+from ml.domain.models import WorkflowEvent, WorkflowEventType
 
 
 @pytest.fixture()
@@ -82,16 +88,15 @@ def test_message_stream_sets_tag_header(
     fastapi_app: FastAPI, monkeypatch: pytest.MonkeyPatch
 ) -> None:
     async def _run() -> None:
-        async def _dummy_output_stream() -> AsyncIterator[dict[str, str]]:
-            yield {"message": "test"}
-
-        async def _dummy_workflow(_: MessagePayload) -> tuple[AsyncIterator[dict[str, str]], Tag, str | None]:
-            return _dummy_output_stream(), Tag.Law, None
+        async def _dummy_workflow_events(_: MessagePayload) -> AsyncIterator[WorkflowEvent]:
+            yield WorkflowEvent(type=WorkflowEventType.Tag, tag=Tag.Law)
+            yield WorkflowEvent(type=WorkflowEventType.Answer, chunk={"message": "test"})
+            yield WorkflowEvent(type=WorkflowEventType.Done, file_url=None)
 
         fastapi_app.state.model_ready = asyncio.Event()
         fastapi_app.state.model_ready.set()
 
-        monkeypatch.setattr(workflow_routes, "workflow", _dummy_workflow)
+        monkeypatch.setattr(workflow_routes, "workflow_events", _dummy_workflow_events)
 
         payload = MessagePayload(
             messages=ChatHistory(messages=[Message(role=Role.user, content="hello")]),
@@ -119,7 +124,8 @@ def test_message_stream_sets_tag_header(
             )
 
         assert response.status_code == 200
-        assert response.headers.get("X-Tag") == Tag.Law.value
+        # a classified tag is streamed as an event, the head does not wait for it
+        assert 'data: {"event": "tag", "tag": "law"}' in response.text
 
     asyncio.run(_run())
 
@@ -128,16 +134,15 @@ def test_message_stream_emits_null_file_url_when_missing(
     fastapi_app: FastAPI, monkeypatch: pytest.MonkeyPatch
 ) -> None:
     async def _run() -> None:
-        async def _dummy_output_stream() -> AsyncIterator[dict[str, str]]:
-            yield {"message": "test"}
-
-        async def _dummy_workflow(_: MessagePayload) -> tuple[AsyncIterator[dict[str, str]], Tag, str | None]:
-            return _dummy_output_stream(), Tag.Sport, ""
+        async def _dummy_workflow_events(_: MessagePayload) -> AsyncIterator[WorkflowEvent]:
+            yield WorkflowEvent(type=WorkflowEventType.Tag, tag=Tag.Sport)
+            yield WorkflowEvent(type=WorkflowEventType.Answer, chunk={"message": "test"})
+            yield WorkflowEvent(type=WorkflowEventType.Done, file_url="")
 
         fastapi_app.state.model_ready = asyncio.Event()
         fastapi_app.state.model_ready.set()
 
-        monkeypatch.setattr(workflow_routes, "workflow", _dummy_workflow)
+        monkeypatch.setattr(workflow_routes, "workflow_events", _dummy_workflow_events)
 
         payload = MessagePayload(
             messages=ChatHistory(messages=[Message(role=Role.user, content="hello")]),
@@ -168,6 +173,6 @@ def test_message_stream_emits_null_file_url_when_missing(
 
         data_lines = [line for line in response.text.splitlines() if line.startswith("data: ")]
 
-        assert data_lines[-1] == 'data: {"file_url": null}'
+        assert data_lines[-1].startswith('data: {"file_url": null, "usage": ')
 
     asyncio.run(_run())